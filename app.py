@@ -1,12 +1,44 @@
 # -*- coding: utf-8 -*-
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g, has_app_context, has_request_context
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity
+from flask_jwt_extended import (JWTManager, jwt_required, create_access_token, get_jwt, get_jwt_identity,
+                                verify_jwt_in_request)
 import sqlite3
 import bcrypt
+import click
+import atexit
+import base64
+import csv
+import io
+import functools
+import html
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import TimeoutError as FutureTimeout
 from datetime import datetime, timedelta
+from urllib.parse import urlencode
 import os
 
+from db import ConnectionPool, PoolTimeout
+from cache import TTLCache, VersionedCache
+from passwords import HasherBusy, PasswordHasher
+from writebehind import QueueFull, WriteBehindQueue
+from events import ChangeFeed, EventStream, SQLiteChangeLog
+from metrics import Registry
+from profiling import RequestProfiler, SlowQueryLog, explain
+from logs import parse_sample_rates, setup_logging
+from dedupe import KeyReused, SubmissionKeys, fingerprint
+from static import precompress, serve_file
+from migrations import BUMP_TESTIMONIALS_VERSION_SQL, RECONCILE_COUNTERS_SQL, REBUILD_TESTIMONIAL_SUMMARY_SQL, migrate
+from retention import Archiver, enable_incremental_vacuum, parse_policy
+from ratelimit import MemoryBucketStore, RateLimiter, SQLiteBucketStore, parse_rate
+
 # Initialize Flask app
 app = Flask(__name__)
 
@@ -14,95 +46,1194 @@ app = Flask(__name__)
 app.config['JWT_SECRET_KEY'] = 'your-super-secret-jwt-key-2024'  # Change this in production
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)
 
+# SQLite connection pool settings
+app.config['SQLITE_POOL_SIZE'] = int(os.environ.get('SQLITE_POOL_SIZE', 8))
+app.config['SQLITE_POOL_TIMEOUT'] = float(os.environ.get('SQLITE_POOL_TIMEOUT', 10))
+app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_CACHE_SIZE'] = int(os.environ.get('SQLITE_CACHE_SIZE', -16000))  # negative = KiB
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024))
+app.config['SQLITE_BUSY_TIMEOUT'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # ms
+
+# Public testimonials response caching (seconds)
+app.config['TESTIMONIALS_CACHE_MAX_AGE'] = int(os.environ.get('TESTIMONIALS_CACHE_MAX_AGE', 60))
+app.config['TESTIMONIALS_CACHE_SWR'] = int(os.environ.get('TESTIMONIALS_CACHE_SWR', 300))
+
+# Admin authorization: how long a user's role is trusted before re-reading it
+app.config['ROLE_CACHE_TTL'] = float(os.environ.get('ROLE_CACHE_TTL', 30))
+app.config['ROLE_CACHE_SIZE'] = int(os.environ.get('ROLE_CACHE_SIZE', 1024))
+
+# bcrypt runs on its own bounded pool ('thread' or 'process')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+app.config['PASSWORD_HASH_QUEUE'] = int(os.environ.get('PASSWORD_HASH_QUEUE', 32))
+app.config['PASSWORD_HASH_EXECUTOR'] = os.environ.get('PASSWORD_HASH_EXECUTOR', 'thread')
+app.config['PASSWORD_HASH_TIMEOUT'] = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+
+# ASGI serving (asgi.py): view threads, requests allowed to wait for one,
+# threads polling event streams, and the largest request body accepted
+app.config['ASGI_WORKERS'] = int(os.environ.get('ASGI_WORKERS', 16))
+app.config['ASGI_MAX_QUEUE'] = int(os.environ.get('ASGI_MAX_QUEUE', 512))
+app.config['ASGI_STREAM_WORKERS'] = int(os.environ.get('ASGI_STREAM_WORKERS', 2))
+app.config['ASGI_MAX_BODY'] = int(os.environ.get('ASGI_MAX_BODY', 1024 * 1024))
+
+# Optional group-commit ingestion for contact/testimonial submissions
+app.config['WRITE_BEHIND'] = os.environ.get('WRITE_BEHIND', 'false').lower() in ('1', 'true', 'yes')
+app.config['WRITE_BEHIND_MAX_BATCH'] = int(os.environ.get('WRITE_BEHIND_MAX_BATCH', 100))
+app.config['WRITE_BEHIND_MAX_DELAY_MS'] = float(os.environ.get('WRITE_BEHIND_MAX_DELAY_MS', 10))
+app.config['WRITE_BEHIND_MAX_PENDING'] = int(os.environ.get('WRITE_BEHIND_MAX_PENDING', 10000))
+app.config['WRITE_BEHIND_SYNCHRONOUS'] = os.environ.get('WRITE_BEHIND_SYNCHRONOUS', 'NORMAL')  # FULL / NORMAL / OFF
+app.config['WRITE_BEHIND_TIMEOUT'] = float(os.environ.get('WRITE_BEHIND_TIMEOUT', 5))
+
+# Admin live feed: 'memory' (this process only) or 'sqlite' (shared change_log table)
+app.config['CHANGE_FEED_STORE'] = os.environ.get('CHANGE_FEED_STORE', 'memory')
+app.config['CHANGE_FEED_HISTORY'] = int(os.environ.get('CHANGE_FEED_HISTORY', 1000))
+app.config['CHANGE_FEED_POLL_INTERVAL'] = float(os.environ.get('CHANGE_FEED_POLL_INTERVAL', 1))
+app.config['CHANGE_FEED_HEARTBEAT'] = float(os.environ.get('CHANGE_FEED_HEARTBEAT', 15))
+
+# Observability: optional bearer token for /metrics, readiness probe timeout (seconds)
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+app.config['HEALTH_DB_TIMEOUT'] = float(os.environ.get('HEALTH_DB_TIMEOUT', 1))
+
+# Diagnostics: cProfile a sample of requests (admins can force one with X-Profile: 1)
+# and capture statements slower than SLOW_QUERY_MS with their query plan (0 = off)
+app.config['PROFILE_ENABLED'] = os.environ.get('PROFILE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0.01))
+app.config['PROFILE_KEEP'] = int(os.environ.get('PROFILE_KEEP', 20))
+app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 100))
+app.config['SLOW_QUERY_KEEP'] = int(os.environ.get('SLOW_QUERY_KEEP', 200))
+
+# Structured logging: sink is 'stderr' or a file path (rotated)
+app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO')
+app.config['LOG_SINK'] = os.environ.get('LOG_SINK', 'stderr')
+app.config['LOG_SAMPLE_RATES'] = parse_sample_rates(os.environ.get('LOG_SAMPLE_RATES', ''))  # e.g. DEBUG=0.01,INFO=0.5
+app.config['LOG_FILE_MAX_BYTES'] = int(os.environ.get('LOG_FILE_MAX_BYTES', 10 * 1024 * 1024))
+app.config['LOG_FILE_BACKUPS'] = int(os.environ.get('LOG_FILE_BACKUPS', 5))
+app.config['LOG_QUEUE_SIZE'] = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+
+# Serve the built frontend from this process; dist/ is precompressed on first use
+app.config['STATIC_ROOT'] = os.environ.get('STATIC_ROOT', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dist'))
+app.config['STATIC_ENABLED'] = os.environ.get('STATIC_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+app.config['STATIC_PRECOMPRESS'] = os.environ.get('STATIC_PRECOMPRESS', 'true').lower() in ('1', 'true', 'yes')
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', 'false').lower() in ('1', 'true', 'yes')
+
+# ?view=summary on the testimonial/message lists truncates message to this many characters
+app.config['SUMMARY_MESSAGE_CHARS'] = int(os.environ.get('SUMMARY_MESSAGE_CHARS', 160))
+
+# Retention: '<table>:<status>=<days>' rules moved to ARCHIVE_DB_PATH by `flask archive`
+# or, with RETENTION_INTERVAL > 0 (seconds), by a background thread
+app.config['RETENTION_POLICY'] = parse_policy(os.environ.get('RETENTION_POLICY', 'contact_messages:read=180,testimonials:rejected=30'))
+app.config['RETENTION_INTERVAL'] = float(os.environ.get('RETENTION_INTERVAL', 0))
+app.config['RETENTION_BATCH_SIZE'] = int(os.environ.get('RETENTION_BATCH_SIZE', 500))
+app.config['RETENTION_BATCH_PAUSE'] = float(os.environ.get('RETENTION_BATCH_PAUSE', 0.05))
+app.config['RETENTION_CHECKPOINT'] = os.environ.get('RETENTION_CHECKPOINT', 'PASSIVE')  # PASSIVE / FULL / RESTART / TRUNCATE
+
+# Repeated submissions (same normalized email/subject/message, or same Idempotency-Key)
+# within this many seconds return the original id instead of inserting again
+app.config['DEDUP_ENABLED'] = os.environ.get('DEDUP_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+app.config['DEDUP_WINDOW'] = float(os.environ.get('DEDUP_WINDOW', 86400))
+app.config['DEDUP_FILTER_CAPACITY'] = int(os.environ.get('DEDUP_FILTER_CAPACITY', 100000))
+
+# Rate limits for the unauthenticated endpoints, '<count>/<second|minute|hour|day>' or 'off',
+# per client IP and per target account/email; store is 'memory' (per process) or 'sqlite' (shared)
+app.config['RATE_LIMIT_ENABLED'] = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+app.config['RATE_LIMIT_STORE'] = os.environ.get('RATE_LIMIT_STORE', 'memory')
+app.config['RATE_LIMIT_MAX_KEYS'] = int(os.environ.get('RATE_LIMIT_MAX_KEYS', 10000))
+# Number of reverse proxies in front of the app ('true' = 1); 0 keys limits on the socket address
+_trust_proxy = os.environ.get('RATE_LIMIT_TRUST_PROXY', '0').lower()
+app.config['RATE_LIMIT_TRUST_PROXY'] = 1 if _trust_proxy in ('true', 'yes') else int(_trust_proxy) if _trust_proxy.isdigit() else 0
+app.config['RATE_LIMIT_LOGIN_IP'] = os.environ.get('RATE_LIMIT_LOGIN_IP', '20/minute')
+app.config['RATE_LIMIT_LOGIN_ACCOUNT'] = os.environ.get('RATE_LIMIT_LOGIN_ACCOUNT', '5/minute')
+app.config['RATE_LIMIT_REGISTER_IP'] = os.environ.get('RATE_LIMIT_REGISTER_IP', '5/hour')
+app.config['RATE_LIMIT_REGISTER_ACCOUNT'] = os.environ.get('RATE_LIMIT_REGISTER_ACCOUNT', '3/hour')
+app.config['RATE_LIMIT_CONTACT_IP'] = os.environ.get('RATE_LIMIT_CONTACT_IP', '10/hour')
+app.config['RATE_LIMIT_CONTACT_ACCOUNT'] = os.environ.get('RATE_LIMIT_CONTACT_ACCOUNT', '5/hour')
+app.config['RATE_LIMIT_TESTIMONIAL_IP'] = os.environ.get('RATE_LIMIT_TESTIMONIAL_IP', '5/hour')
+app.config['RATE_LIMIT_TESTIMONIAL_ACCOUNT'] = os.environ.get('RATE_LIMIT_TESTIMONIAL_ACCOUNT', '3/hour')
+
 # Initialize extensions
 jwt = JWTManager(app)
-CORS(app, origins=['http://localhost:5173', 'http://localhost:3000', 'http://localhost:5174', 'http://localhost:5175'])
+CORS(app, origins=['http://localhost:5173', 'http://localhost:3000', 'http://localhost:5174', 'http://localhost:5175'],
+     expose_headers=['X-Next-Cursor', 'Link', 'X-Request-ID', 'Retry-After', 'Idempotent-Replayed',
+                     'X-Profile-Id'])
+
+# =====================
+# LOGGING
+# =====================
+
+log = logging.getLogger('portfolio')
+
+def log_context():
+    """Request fields attached to every log record emitted during a request"""
+    if not has_request_context():
+        return {}
+    context = {
+        'request_id': g.get('request_id'),
+        'method': request.method,
+        'route': request.url_rule.rule if request.url_rule else request.path,
+    }
+    try:
+        context['user_id'] = get_jwt_identity()
+    except RuntimeError:
+        pass
+    return context
+
+log_handler, log_listener = setup_logging(
+    log,
+    level=app.config['LOG_LEVEL'],
+    sink=app.config['LOG_SINK'],
+    sample_rates=app.config['LOG_SAMPLE_RATES'],
+    context=log_context,
+    max_bytes=app.config['LOG_FILE_MAX_BYTES'],
+    backups=app.config['LOG_FILE_BACKUPS'],
+    queue_size=app.config['LOG_QUEUE_SIZE'],
+)
+atexit.register(log_listener.stop)
 
 # Database path
-DB_PATH = 'portfolio.db'
+DB_PATH = os.environ.get('DB_PATH', 'portfolio.db')
+ARCHIVE_DB_PATH = os.environ.get('ARCHIVE_DB_PATH', os.path.splitext(DB_PATH)[0] + '-archive.db')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Get (lazily creating) the shared connection pool"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    DB_PATH,
+                    size=app.config['SQLITE_POOL_SIZE'],
+                    timeout=app.config['SQLITE_POOL_TIMEOUT'],
+                    synchronous=app.config['SQLITE_SYNCHRONOUS'],
+                    cache_size=app.config['SQLITE_CACHE_SIZE'],
+                    mmap_size=app.config['SQLITE_MMAP_SIZE'],
+                    busy_timeout=app.config['SQLITE_BUSY_TIMEOUT'],
+                    query_observer=observe_query,
+                    slow_query_observer=record_slow_query,
+                    slow_query_threshold=app.config['SLOW_QUERY_MS'] / 1000.0 if app.config['SLOW_QUERY_MS'] > 0 else None,
+                )
+    return _pool
 
 def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # This allows us to access columns by name
+    """Get database connection
+
+    Inside a request the same pooled connection is reused and handed back
+    on teardown; outside one, close() returns it to the pool.
+    """
+    if not has_app_context():
+        return get_pool().acquire()
+
+    conn = g.get('_db_conn')
+    if conn is None or not conn.checked_out:
+        conn = get_pool().acquire()
+        conn.context_bound = True
+        g._db_conn = conn
+    return conn
+
+_write_queue = None
+
+def get_write_queue():
+    """Get the write-behind queue, or None when WRITE_BEHIND is off"""
+    global _write_queue
+    if not app.config['WRITE_BEHIND']:
+        return None
+    if _write_queue is None:
+        pool = get_pool()  # takes _pool_lock itself
+        with _pool_lock:
+            if _write_queue is None:
+                _write_queue = WriteBehindQueue(
+                    pool.connect,
+                    max_batch=app.config['WRITE_BEHIND_MAX_BATCH'],
+                    max_delay=app.config['WRITE_BEHIND_MAX_DELAY_MS'] / 1000.0,
+                    max_pending=app.config['WRITE_BEHIND_MAX_PENDING'],
+                    synchronous=app.config['WRITE_BEHIND_SYNCHRONOUS'],
+                )
+                atexit.register(_write_queue.close)
+    return _write_queue
+
+def insert_submission(sql, params, on_late_commit=None):
+    """Insert a public form submission and return its row id
+
+    With WRITE_BEHIND on, the insert is committed by the write-behind
+    thread together with other submissions and this waits for that batch.
+    If the wait times out the row is still queued; `on_late_commit` is
+    then called with its Future once the batch settles.
+    """
+    write_queue = get_write_queue()
+    if write_queue is not None:
+        future = write_queue.submit(sql, params)
+        try:
+            return future.result(timeout=app.config['WRITE_BEHIND_TIMEOUT'])
+        except FutureTimeout:
+            if on_late_commit is not None:
+                future.add_done_callback(on_late_commit)
+            raise
+    
+    conn = get_db_connection()
+    cursor = conn.execute(sql, params)
+    conn.commit()
+    conn.close()
+    return cursor.lastrowid
+
+_change_feed = None
+
+def get_change_feed():
+    """Get (lazily creating) the feed behind /api/admin/events"""
+    global _change_feed
+    if _change_feed is None:
+        with _pool_lock:
+            if _change_feed is None:
+                store = None
+                if app.config['CHANGE_FEED_STORE'] == 'sqlite':
+                    # The request's own connection when publishing from a
+                    # view, so a write never waits on a second pool slot
+                    store = SQLiteChangeLog(get_db_connection, max_rows=app.config['CHANGE_FEED_HISTORY'])
+                _change_feed = ChangeFeed(
+                    history=app.config['CHANGE_FEED_HISTORY'],
+                    store=store,
+                    poll_interval=app.config['CHANGE_FEED_POLL_INTERVAL'],
+                )
+    return _change_feed
+
+def publish_change(event, data):
+    """Publish a change event; never fails the write that triggered it"""
+    try:
+        get_change_feed().publish(event, data)
+    except Exception:
+        log.exception("Change feed publish error")
+
+_submission_keys = None
+
+def get_submission_keys():
+    """Get the duplicate-submission tracker, or None when DEDUP_ENABLED is off"""
+    global _submission_keys
+    if not app.config['DEDUP_ENABLED']:
+        return None
+    if _submission_keys is None:
+        with _pool_lock:
+            if _submission_keys is None:
+                _submission_keys = SubmissionKeys(
+                    get_db_connection,
+                    window=app.config['DEDUP_WINDOW'],
+                    capacity=app.config['DEDUP_FILTER_CAPACITY'],
+                )
+    return _submission_keys
+
+def submission_key(table, email, *fields):
+    """The client's Idempotency-Key if sent, else a fingerprint of the content
+
+    Idempotency-Keys are scoped to the submitter's email, so two clients
+    picking the same value don't collide or replay each other's rows.
+    """
+    idempotency_key = request.headers.get('Idempotency-Key', '').strip()
+    if idempotency_key:
+        return fingerprint(table, email, idempotency_key[:200], prefix='idem')
+    return fingerprint(table, email, *fields)
+
+def insert_submission_once(key, sql, params):
+    """insert_submission() unless key was already used within DEDUP_WINDOW
+
+    Returns (row_id, duplicate). For a duplicate, row_id is the original
+    row, or 0 while the original request is still writing it. Raises
+    KeyReused when an Idempotency-Key comes back with different params.
+    """
+    keys = get_submission_keys()
+    if keys is None:
+        return insert_submission(sql, params), False
+
+    payload = fingerprint('payload', sql, *params) if key.startswith('idem:') else None
+    existing = keys.claim(key, payload)
+    if existing is not None:
+        return existing, True
+    try:
+        row_id = insert_submission(sql, params, functools.partial(settle_submission_key, keys, key))
+    except FutureTimeout:
+        # Still queued and may yet commit: the claim stays pending, so a
+        # retry gets 409 rather than inserting a second row
+        raise
+    except Exception:
+        keys.release(key)
+        raise
+    keys.complete(key, row_id)
+    return row_id, False
+
+def settle_submission_key(keys, key, future):
+    """Complete or release a claim whose write-behind insert timed out"""
+    try:
+        if future.exception() is None:
+            keys.complete(key, future.result())
+        else:
+            keys.release(key)
+    except Exception:
+        log.exception("Submission key settle error")
+
+def replayed_response(body, status, row_id):
+    """Answer a duplicate submission like the original one"""
+    if not row_id:
+        response = jsonify({'error': 'An identical submission is still being processed'})
+        response.headers['Retry-After'] = '1'
+        return response, 409
+    response = jsonify(dict(body, id=row_id))
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response, status
+
+_archiver = None
+
+def get_archiver():
+    """Get (lazily creating) the retention archiver"""
+    global _archiver
+    if _archiver is None:
+        pool = get_pool()  # takes _pool_lock itself
+        with _pool_lock:
+            if _archiver is None:
+                _archiver = Archiver(
+                    pool.connect,
+                    ARCHIVE_DB_PATH,
+                    app.config['RETENTION_POLICY'],
+                    batch_size=app.config['RETENTION_BATCH_SIZE'],
+                    pause=app.config['RETENTION_BATCH_PAUSE'],
+                    checkpoint=app.config['RETENTION_CHECKPOINT'],
+                )
+                if app.config['RETENTION_INTERVAL'] > 0:
+                    _archiver.start(app.config['RETENTION_INTERVAL'])
+                    atexit.register(_archiver.stop)
+    return _archiver
+
+def get_archive_connection():
+    """Read-only connection to the archive database, or None if nothing was archived yet"""
+    if not os.path.exists(ARCHIVE_DB_PATH):
+        return None
+    conn = sqlite3.connect(f'file:{ARCHIVE_DB_PATH}?mode=ro', uri=True)
+    conn.row_factory = sqlite3.Row
     return conn
 
+# Serialized approved-testimonials JSON, invalidated by testimonial writes
+testimonials_cache = VersionedCache()
+
+def sync_testimonials_cache(conn):
+    """Check the shared testimonials version (one primary-key read)"""
+    version = conn.execute("SELECT version FROM cache_versions WHERE name = 'testimonials'").fetchone()
+    return testimonials_cache.sync(version[0] if version else None)
+
+@app.teardown_appcontext
+def release_db_connection(exception):
+    conn = g.pop('_db_conn', None)
+    if conn is not None:
+        conn.context_bound = False
+        conn.close()
+
 def init_database():
-    """Initialize database with tables"""
+    """Bring the schema up to date; one PRAGMA read when it already is"""
     conn = get_db_connection()
-    
-    # Create users table
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            role TEXT DEFAULT 'user',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create testimonials table
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS testimonials (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            company TEXT,
-            position TEXT,
-            message TEXT NOT NULL,
-            rating INTEGER DEFAULT 5,
-            status TEXT DEFAULT 'pending',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create contact_messages table
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS contact_messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            subject TEXT,
-            message TEXT NOT NULL,
-            status TEXT DEFAULT 'unread',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    applied = migrate(conn)
+    conn.close()
+    if applied:
+        log.info("Applied schema migrations: %s", applied)
+
+# Created by `flask seed-users` / `python init_db.py`, never on startup
+DEFAULT_USERS = [
+    ('admin', 'admin@rasulmamishov.com', os.environ.get('SEED_ADMIN_PASSWORD', 'admin123'), 'admin'),
+    ('testuser', 'test@example.com', os.environ.get('SEED_TEST_PASSWORD', 'password123'), 'user'),
+]
+
+def seed_default_users():
+    """Create the default users that don't exist yet; returns their usernames
+
+    Existing users are checked first so no bcrypt work is wasted on them.
+    """
+    conn = get_db_connection()
+    created = []
+    for username, email, password, role in DEFAULT_USERS:
+        exists = conn.execute(
+            'SELECT 1 FROM users WHERE username = ? OR email = ?', (username, email)
+        ).fetchone()
+        if exists:
+            continue
+        hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        conn.execute(
+            'INSERT INTO users (username, email, password, role) VALUES (?, ?, ?, ?)',
+            (username, email, hashed, role)
         )
-    ''')
+        created.append(username)
+    conn.commit()
+    conn.close()
+    return created
+
+@app.cli.command('seed-users')
+def seed_users_command():
+    """Apply migrations and create the default admin and test users"""
+    init_database()
+    created = seed_default_users()
+    print(f"✅ Created users: {', '.join(created)}" if created else "✅ Default users already exist")
+
+def reconcile_counters(conn):
+    """Recompute admin_counters from the base tables; returns the fixed drift"""
+    before = conn.execute('SELECT * FROM admin_counters WHERE id = 1').fetchone()
+    conn.execute(RECONCILE_COUNTERS_SQL)
+    after = conn.execute('SELECT * FROM admin_counters WHERE id = 1').fetchone()
+    conn.commit()
+    
+    return {
+        key: after[key] - (before[key] if before else 0)
+        for key in after.keys() if key != 'id' and after[key] != (before[key] if before else 0)
+    }
+
+def read_stats(conn):
+    """Dashboard statistics from the trigger-maintained admin_counters row"""
+    counters = conn.execute('SELECT * FROM admin_counters WHERE id = 1').fetchone()
+    if counters is None:
+        reconcile_counters(conn)
+        counters = conn.execute('SELECT * FROM admin_counters WHERE id = 1').fetchone()
+    
+    return {
+        'totalUsers': counters['total_users'],
+        'totalTestimonials': counters['total_testimonials'],
+        'pendingTestimonials': counters['pending_testimonials'],
+        'totalMessages': counters['total_messages'],
+        'unreadMessages': counters['unread_messages'],
+    }
+
+@app.cli.command('reconcile-counters')
+def reconcile_counters_command():
+    """Recompute the admin dashboard counters from scratch"""
+    conn = get_db_connection()
+    drift = reconcile_counters(conn)
+    conn.close()
+    
+    if drift:
+        print(f"✅ Counters reconciled, corrected drift: {drift}")
+    else:
+        print("✅ Counters already consistent")
+
+def rebuild_testimonial_summary(conn):
+    """Recompute testimonial_summary from approved testimonials"""
+    conn.execute(REBUILD_TESTIMONIAL_SUMMARY_SQL)
+    # Tells every worker's cache, not just this process's, to re-read it
+    conn.execute(BUMP_TESTIMONIALS_VERSION_SQL)
+    summary = conn.execute('SELECT * FROM testimonial_summary WHERE id = 1').fetchone()
+    conn.commit()
+    return summary
+
+def read_testimonial_summary(conn):
+    """Public rating aggregates from the trigger-maintained summary row"""
+    summary = conn.execute('SELECT * FROM testimonial_summary WHERE id = 1').fetchone()
+    if summary is None:
+        summary = rebuild_testimonial_summary(conn)
+    
+    count = summary['approved_count']
+    return {
+        'count': count,
+        'average': round(summary['rating_sum'] / count, 2) if count else None,
+        'distribution': {str(rating): summary[f'rating_{rating}'] for rating in range(1, 6)},
+        'lastApprovedAt': summary['last_approved_at'],
+    }
+
+@app.cli.command('rebuild-testimonial-summary')
+def rebuild_testimonial_summary_command():
+    """Recompute the public testimonial rating summary from scratch"""
+    conn = get_db_connection()
+    summary = dict(rebuild_testimonial_summary(conn))
+    conn.close()
+    print(f"✅ Testimonial summary rebuilt: {summary}")
+
+@app.cli.command('archive')
+@click.option('--dry-run', is_flag=True, help='Only count the rows the policy would move')
+@click.option('--vacuum', is_flag=True,
+              help='First switch the database to incremental auto-vacuum (one-time full VACUUM)')
+def archive_command(dry_run, vacuum):
+    """Move rows selected by RETENTION_POLICY into the archive database"""
+    if vacuum:
+        conn = get_pool().connect()
+        enable_incremental_vacuum(conn)
+        conn.close()
+        print("✅ auto_vacuum set to INCREMENTAL")
     
-    # Insert admin user if not exists
-    admin_password = bcrypt.hashpw('admin123'.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    archiver = get_archiver()
+    counts = archiver.pending() if dry_run else archiver.run_once()
+    for rule, count in counts.items():
+        print(f"{'Would archive' if dry_run else 'Archived'} {count} rows ({rule})")
+
+# =====================
+# METRICS
+# =====================
+
+metrics = Registry()
+http_requests = metrics.counter(
+    'http_requests_total', 'HTTP requests by route and status', ['method', 'endpoint', 'status'])
+http_latency = metrics.histogram(
+    'http_request_duration_seconds', 'Time until the response is returned', ['method', 'endpoint'])
+http_in_flight = metrics.gauge('http_requests_in_flight', 'Requests currently being handled')
+sqlite_queries = metrics.histogram(
+    'sqlite_queries_per_request', 'SQLite statements executed per request', ['endpoint'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+sqlite_request_time = metrics.histogram(
+    'sqlite_time_per_request_seconds', 'Time spent in SQLite execute() per request', ['endpoint'])
+sqlite_query_latency = metrics.histogram(
+    'sqlite_query_duration_seconds', 'Latency of individual SQLite execute() calls',
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0))
+bcrypt_latency = metrics.histogram(
+    'bcrypt_duration_seconds', 'bcrypt hash/verify time on the hashing pool', ['op'],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0))
+
+def observe_query(sql, seconds):
+    sqlite_query_latency.observe(seconds)
+    if has_request_context():
+        g._db_queries = g.get('_db_queries', 0) + 1
+        g._db_time = g.get('_db_time', 0.0) + seconds
+
+profiler = RequestProfiler(keep=app.config['PROFILE_KEEP'])
+slow_queries = SlowQueryLog(keep=app.config['SLOW_QUERY_KEEP'])
+
+def record_slow_query(conn, sql, params, seconds):
     try:
-        conn.execute('''
-            INSERT OR IGNORE INTO users (username, email, password, role)
-            VALUES (?, ?, ?, ?)
-        ''', ('admin', 'admin@rasulmamishov.com', admin_password, 'admin'))
-    except:
-        pass
+        plan = explain(conn, sql, params)
+    except sqlite3.Error as e:
+        plan = [f'EXPLAIN failed: {e}']
+    in_request = has_request_context()
+    entry = {
+        'sql': ' '.join(sql.split()),
+        'duration_ms': round(seconds * 1000, 3),
+        'plan': plan,
+        'at': time.time(),
+        'endpoint': request_endpoint() if in_request else None,
+        'request_id': g.get('request_id') if in_request else None,
+    }
+    slow_queries.record(entry)
+    log.warning("Slow query (%.1f ms): %s", entry['duration_ms'], entry['sql'][:200], extra={'plan': plan})
+
+def request_endpoint():
+    # Route templates, not raw paths, keep label cardinality bounded
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+@app.before_request
+def start_request_timer():
+    g._request_started = time.perf_counter()
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+    http_in_flight.inc()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('_request_started')
+    if started is not None:
+        endpoint = request_endpoint()
+        latency = time.perf_counter() - started
+        http_latency.observe(latency, method=request.method, endpoint=endpoint)
+        log.info('%s %s %s', request.method, request.path, response.status_code, extra={
+            'status': response.status_code,
+            'latency_ms': round(latency * 1000, 3),
+            'db_queries': g.get('_db_queries', 0),
+        })
+        http_requests.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+        sqlite_queries.observe(g.get('_db_queries', 0), endpoint=endpoint)
+        sqlite_request_time.observe(g.get('_db_time', 0.0), endpoint=endpoint)
+    response.headers['X-Request-ID'] = g.get('request_id', '')
+    return response
+
+def wants_profile():
+    """Sampled when PROFILE_ENABLED, or forced by an admin with X-Profile: 1"""
+    if request.headers.get('X-Profile') == '1':
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+        except Exception:
+            return False
+        return (identity is not None and get_jwt().get('role') == 'admin'
+                and get_user_role(int(identity)) == 'admin')
+    return app.config['PROFILE_ENABLED'] and random.random() < app.config['PROFILE_SAMPLE_RATE']
+
+@app.before_request
+def start_profile():
+    if wants_profile():
+        g._profile = profiler.start()
+
+@app.after_request
+def finish_profile(response):
+    handle = g.pop('_profile', None)
+    if handle is not None:
+        profile_id = profiler.finish(
+            handle, method=request.method, path=request.path,
+            endpoint=request_endpoint(), status=response.status_code, request_id=g.get('request_id')
+        )
+        if profile_id is not None:
+            response.headers['X-Profile-Id'] = str(profile_id)
+    return response
+
+@app.before_request
+def start_background_jobs():
+    if _archiver is None and app.config['RETENTION_INTERVAL'] > 0:
+        get_archiver()
+
+@app.teardown_request
+def end_request(exception):
+    http_in_flight.dec()
+    handle = g.pop('_profile', None)
+    if handle is not None:  # after_request was skipped
+        handle[0].disable()
+
+@metrics.collector
+def collect_component_stats():
+    pool = get_pool().stats()
+    hasher = password_hasher.stats()
+    samples = [
+        ('sqlite_pool_size', 'gauge', 'Maximum pooled connections', pool['size']),
+        ('sqlite_pool_in_use', 'gauge', 'Pooled connections checked out', pool['in_use']),
+        ('sqlite_pool_hits_total', 'counter', 'Acquires served by an idle connection', pool['hits']),
+        ('sqlite_pool_misses_total', 'counter', 'Acquires that opened a new connection', pool['misses']),
+        ('sqlite_pool_waits_total', 'counter', 'Acquires that had to wait', pool['waits']),
+        ('sqlite_pool_timeouts_total', 'counter', 'Acquires that timed out', pool['timeouts']),
+        ('sqlite_pool_wait_seconds_total', 'counter', 'Time spent waiting for a connection',
+         pool['wait_time_ms'] / 1000.0),
+        ('bcrypt_queue_depth', 'gauge', 'Password operations waiting for a worker', hasher['queue_depth']),
+        ('bcrypt_in_flight', 'gauge', 'Password operations queued or running', hasher['in_flight']),
+        ('bcrypt_rejected_total', 'counter', 'Password operations rejected by admission control',
+         hasher['rejected']),
+        ('testimonials_cache_hits_total', 'counter', 'Public testimonials served from cache',
+         testimonials_cache.hits),
+        ('testimonials_cache_misses_total', 'counter', 'Public testimonials rebuilt from SQLite',
+         testimonials_cache.misses),
+    ]
+    write_queue = get_write_queue()
+    if write_queue is not None:
+        queue_stats = write_queue.stats()
+        samples += [
+            ('write_behind_pending', 'gauge', 'Submissions waiting for the writer', queue_stats['pending']),
+            ('write_behind_batches_total', 'counter', 'Committed write-behind batches', queue_stats['batches']),
+            ('write_behind_rows_total', 'counter', 'Rows committed by the writer', queue_stats['rows']),
+        ]
+    if _archiver is not None:
+        samples.append(('archived_rows_total', 'counter', 'Rows moved to the archive database',
+                        _archiver.archived))
+    keys = get_submission_keys()
+    if keys is not None:
+        samples.append(('duplicate_submissions_total', 'counter', 'Submissions answered with an existing id',
+                        keys.duplicates))
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        samples.append(('rate_limit_evicted_total', 'counter', 'Rate limit buckets dropped by eviction',
+                        limiter.store.evicted))
+        if isinstance(limiter.store, MemoryBucketStore):
+            samples.append(('rate_limit_keys', 'gauge', 'Rate limit buckets held in memory',
+                            len(limiter.store)))
+    return samples
+
+def check_database(timeout):
+    """Run a cheap query against DB_PATH, giving up after `timeout` seconds"""
+    deadline = time.monotonic() + timeout
+    conn = sqlite3.connect(f'file:{DB_PATH}?mode=ro', uri=True, timeout=timeout)
+    try:
+        # Abort the statement if it is still running past the deadline
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
+        conn.execute('SELECT id FROM users LIMIT 1').fetchone()
+    finally:
+        conn.close()
+
+# =====================
+# PAGINATION HELPERS
+# =====================
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(row):
+    """Opaque keyset cursor for the (created_at, id) of the last row on a page"""
+    raw = json.dumps([row['created_at'], row['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return str(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE):
+    if value is None or value == '':
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE)
+
+def parse_offset(value):
+    if value is None or value == '':
+        return 0
+    try:
+        offset = int(value)
+    except ValueError:
+        raise ValueError('offset must be an integer')
+    if offset < 0:
+        raise ValueError('offset must not be negative')
+    return offset
+
+def build_list_filters(args, filters=('status', 'email')):
+    """WHERE clauses and params for the status/email/since/until filters
+
+    `since` is inclusive and `until` exclusive; both are compared against
+    created_at, so dates (2024-01-31) and timestamps both work.
+    """
+    clauses = []
+    params = []
+    if 'status' in filters and args.get('status'):
+        clauses.append('status = ?')
+        params.append(args['status'])
+    if 'email' in filters and args.get('email'):
+        clauses.append('email = ? COLLATE NOCASE')
+        params.append(args['email'])
+    if args.get('since'):
+        clauses.append('created_at >= ?')
+        params.append(args['since'])
+    if args.get('until'):
+        clauses.append('created_at < ?')
+        params.append(args['until'])
+    return clauses, params
+
+def fetch_page(conn, table, columns, args, filters=('status', 'email')):
+    """Fetch one keyset page, newest first; returns (rows, next_cursor)"""
+    limit = parse_limit(args.get('limit'))
+    clauses, params = build_list_filters(args, filters)
+    
+    if args.get('after'):
+        created_at, row_id = decode_cursor(args['after'])
+        clauses.append('(created_at < ? OR (created_at = ? AND id < ?))')
+        params.extend([created_at, created_at, row_id])
     
-    # Insert test user if not exists
-    test_password = bcrypt.hashpw('password123'.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    rows = conn.execute(
+        f'SELECT {columns} FROM {table} {where} ORDER BY created_at DESC, id DESC LIMIT ?',
+        params + [limit + 1]
+    ).fetchall()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+    return rows, next_cursor
+
+def page_response(rows, next_cursor):
+    """JSON array of rows, with the next cursor in X-Next-Cursor and Link"""
+    response = jsonify([dict(row) for row in rows])
+    if next_cursor:
+        args = request.args.to_dict()
+        args['after'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
+
+# Selectable columns per table, in output order, and the ?view=summary subset
+LIST_COLUMNS = {
+    'testimonials': ('id', 'name', 'email', 'company', 'position', 'message', 'rating', 'status', 'created_at'),
+    'contact_messages': ('id', 'name', 'email', 'subject', 'message', 'status', 'created_at'),
+}
+SUMMARY_COLUMNS = {
+    'testimonials': ('id', 'name', 'company', 'position', 'message', 'rating', 'status', 'created_at'),
+    'contact_messages': ('id', 'name', 'email', 'subject', 'message', 'status', 'created_at'),
+}
+# Always selected: keyset cursors are built from them
+KEY_COLUMNS = ('id', 'created_at')
+
+def list_columns(table, args):
+    """SQL select list for ?fields=a,b,c and ?view=full|summary
+
+    The summary view truncates message to SUMMARY_MESSAGE_CHARS in SQL.
+    Leaving message out of ?fields= lets the covering list indexes answer
+    the query without touching the table.
+    """
+    view = args.get('view', 'full')
+    if view not in ('full', 'summary'):
+        raise ValueError('view must be full or summary')
+    
+    allowed = LIST_COLUMNS[table]
+    if args.get('fields'):
+        requested = {field.strip() for field in args['fields'].split(',') if field.strip()}
+        unknown = sorted(requested - set(allowed))
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    elif view == 'summary':
+        requested = set(SUMMARY_COLUMNS[table])
+    else:
+        requested = set(allowed)
+    
+    columns = []
+    for column in allowed:
+        if column not in requested and column not in KEY_COLUMNS:
+            continue
+        if column == 'message' and view == 'summary':
+            column = f"substr(message, 1, {app.config['SUMMARY_MESSAGE_CHARS']:d}) AS message"
+        columns.append(column)
+    return ', '.join(columns)
+
+def fetch_list_page(table, args):
+    """One keyset page of table, or of its archived rows with ?archived=true"""
+    columns = list_columns(table, args)
+    if args.get('archived') != 'true':
+        conn = get_db_connection()
+        rows, next_cursor = fetch_page(conn, table, columns, args)
+        conn.close()
+        return rows, next_cursor
+    
+    conn = get_archive_connection()
+    if conn is None:
+        return [], None
     try:
-        conn.execute('''
-            INSERT OR IGNORE INTO users (username, email, password, role)
-            VALUES (?, ?, ?, ?)
-        ''', ('testuser', 'test@example.com', test_password, 'user'))
-    except:
-        pass
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone():
+            return [], None
+        return fetch_page(conn, table, f'{columns}, archived_at', args)
+    finally:
+        conn.close()
+
+# =====================
+# BULK MODERATION
+# =====================
+
+BULK_MAX_ITEMS = 10000
+SQL_CHUNK_SIZE = 500
+
+def select_bulk_targets(conn, table, data, skip_status=None):
+    """Ids a bulk request applies to: explicit `ids` or a `filter` object
+
+    Returns (target_ids, not_found_ids, remaining). Filters accept status,
+    email, since/until and older_than_days; they select at most
+    BULK_MAX_ITEMS rows, skipping rows already in `skip_status`, and
+    `remaining` counts the matches left for another request.
+    """
+    if 'ids' in data:
+        ids = data['ids']
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            raise ValueError('ids must be a list of integers')
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > BULK_MAX_ITEMS:
+            raise ValueError(f'At most {BULK_MAX_ITEMS} ids per request')
+        
+        found = set()
+        for start in range(0, len(ids), SQL_CHUNK_SIZE):
+            chunk = ids[start:start + SQL_CHUNK_SIZE]
+            placeholders = ', '.join('?' * len(chunk))
+            found.update(row['id'] for row in conn.execute(
+                f'SELECT id FROM {table} WHERE id IN ({placeholders})', chunk
+            ))
+        return [i for i in ids if i in found], [i for i in ids if i not in found], 0
+    
+    criteria = data.get('filter')
+    if not isinstance(criteria, dict) or not criteria:
+        raise ValueError('Provide either ids or a filter')
+    
+    for key in ('status', 'email', 'since', 'until'):
+        if criteria.get(key) is not None and not isinstance(criteria[key], str):
+            raise ValueError(f'filter.{key} must be a string')
+    clauses, params = build_list_filters(criteria)
+    if criteria.get('older_than_days') is not None:
+        try:
+            older_than_days = int(criteria['older_than_days'])
+        except (TypeError, ValueError):
+            raise ValueError('filter.older_than_days must be an integer')
+        clauses.append("created_at < datetime('now', ?)")
+        params.append(f'-{older_than_days} days')
+    if not clauses:
+        raise ValueError('Filter matches nothing it can apply')
+    if skip_status is not None:
+        # Already done, so re-sending a truncated request moves on to the rest
+        clauses.append('status IS NOT ?')
+        params.append(skip_status)
+    
+    where = ' AND '.join(clauses)
+    rows = conn.execute(
+        f'SELECT id FROM {table} WHERE {where} ORDER BY id LIMIT ?',
+        params + [BULK_MAX_ITEMS]
+    ).fetchall()
+    remaining = 0
+    if len(rows) == BULK_MAX_ITEMS:
+        remaining = conn.execute(f'SELECT COUNT(*) FROM {table} WHERE {where}', params).fetchone()[0] - len(rows)
+    return [row['id'] for row in rows], [], remaining
+
+def bulk_moderate(table, valid_statuses=None):
+    """Apply a bulk status change or delete to `table` in one transaction
+
+    Body: {"action": "update" | "delete", "status": ..., "ids": [...]}
+    or {"action": ..., "filter": {"status": "pending", "older_than_days": 30}}.
+    A filter matching more than BULK_MAX_ITEMS rows is applied to the
+    first ones and answered with truncated/remaining; send it again for
+    the rest.
+    """
+    data = request.get_json() or {}
+    action = data.get('action')
+    status = data.get('status')
+    
+    if action not in ['update', 'delete']:
+        raise ValueError('action must be update or delete')
+    if action == 'update' and (not status or (valid_statuses and status not in valid_statuses)):
+        raise ValueError('Invalid status')
     
-    # Sample testimonials removed - using only real user submissions
-    # No longer inserting sample data to keep database clean
+    conn = get_db_connection()
+    conn.execute('BEGIN IMMEDIATE')
+    target_ids, missing_ids, remaining = select_bulk_targets(
+        conn, table, data, skip_status=status if action == 'update' else None)
     
+    if action == 'update':
+        conn.executemany(
+            f'UPDATE {table} SET status = ? WHERE id = ?',
+            [(status, target_id) for target_id in target_ids]
+        )
+        outcome = 'updated'
+    else:
+        conn.executemany(f'DELETE FROM {table} WHERE id = ?', [(target_id,) for target_id in target_ids])
+        outcome = 'deleted'
     conn.commit()
     conn.close()
-    print("✅ Database initialized successfully")
+    
+    results = [{'id': target_id, 'result': outcome} for target_id in target_ids]
+    results += [{'id': missing_id, 'result': 'not_found'} for missing_id in missing_ids]
+    
+    if target_ids:
+        topic = 'testimonial' if table == 'testimonials' else 'message'
+        publish_change(f'{topic}.bulk', {'action': action, 'status': status, 'ids': target_ids})
+    
+    log.info("Bulk %s on %s: %s rows, %s remaining", action, table, len(target_ids), remaining)
+    return {
+        'action': action,
+        'affected': len(target_ids),
+        'truncated': remaining > 0,
+        'remaining': remaining,
+        'results': results
+    }
+
+# =====================
+# EXPORT HELPERS
+# =====================
+
+EXPORT_CHUNK_SIZE = 1000
+
+def stream_export(table, args, export_format='ndjson', compress=False):
+    """Generator yielding `table` rows as NDJSON or CSV, chunk by chunk
+
+    Uses its own pooled connection so the stream can outlive the request
+    context; memory use is bounded by EXPORT_CHUNK_SIZE rows.
+    """
+    clauses, params = build_list_filters(args)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    
+    def encode(text):
+        data = text.encode('utf-8')
+        return compressor.compress(data) if compressor else data
+    
+    conn = get_pool().acquire()
+    try:
+        cursor = conn.execute(f'SELECT * FROM {table} {where} ORDER BY id', params)
+        columns = [column[0] for column in cursor.description]
+        
+        if export_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield encode(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+        
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            if not rows:
+                break
+            if export_format == 'csv':
+                writer.writerows(rows)
+                chunk = buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                chunk = ''.join(json.dumps(dict(row), ensure_ascii=False) + '\n' for row in rows)
+            data = encode(chunk)
+            if data:
+                yield data
+        
+        if compressor:
+            yield compressor.flush()
+    finally:
+        conn.close()
+
+def export_response(table):
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ['ndjson', 'csv']:
+        raise ValueError('format must be ndjson or csv')
+    compress = request.args.get('compress') == 'gzip'
+    
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    filename = f"{table}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    response = Response(
+        stream_export(table, request.args.to_dict(), export_format, compress),
+        mimetype=mimetype
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+# =====================
+# SEARCH HELPERS
+# =====================
+
+SEARCH_SCOPES = {'messages': 'contact_messages', 'testimonials': 'testimonials'}
+
+# Match markers for snippet(); swapped for <mark> after the visitor text is escaped
+SNIPPET_OPEN, SNIPPET_CLOSE = '\x02', '\x03'
+
+def mark_snippet(snippet):
+    """HTML-safe snippet with matches wrapped in <mark>"""
+    if snippet is None:
+        return None
+    escaped = html.escape(snippet)
+    return escaped.replace(SNIPPET_OPEN, '<mark>').replace(SNIPPET_CLOSE, '</mark>')
+
+def build_fts_query(text):
+    """Turn free text into an FTS5 query of quoted prefix terms (AND-ed)
+
+    Quoting keeps user input from being parsed as FTS5 syntax.
+    """
+    terms = [term.replace('"', '""') for term in text.split()]
+    return ' '.join(f'"{term}"*' for term in terms if term)
+
+# =====================
+# AUTH HELPERS
+# =====================
+
+# user id -> role (None for deleted users); bounds how long a revoked
+# admin keeps access to ROLE_CACHE_TTL seconds
+role_cache = TTLCache(maxsize=app.config['ROLE_CACHE_SIZE'], ttl=app.config['ROLE_CACHE_TTL'])
+
+def get_user_role(user_id):
+    """Current role for user_id, served from role_cache when fresh"""
+    missing = object()
+    role = role_cache.get(user_id, missing)
+    if role is missing:
+        conn = get_db_connection()
+        user = conn.execute('SELECT role FROM users WHERE id = ?', (user_id,)).fetchone()
+        conn.close()
+        role = user['role'] if user else None
+        role_cache.set(user_id, role)
+    return role
+
+def invalidate_user_role(user_id):
+    """Drop a cached role; call after changing or deleting a user"""
+    role_cache.invalidate(int(user_id))
+
+password_hasher = PasswordHasher(
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_queue=app.config['PASSWORD_HASH_QUEUE'],
+    kind=app.config['PASSWORD_HASH_EXECUTOR'],
+    timeout=app.config['PASSWORD_HASH_TIMEOUT'],
+    observer=lambda op, seconds: bcrypt_latency.observe(seconds, op=op),
+)
+
+def hasher_busy_response():
+    response = jsonify({'error': 'Too many login attempts in progress, please retry shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def admin_required(fn=None, *, locations=None):
+    """jwt_required() plus an admin check against the token's role claim
+
+    The claim is verified by the JWT signature; the cached role lookup
+    only exists so demoted or deleted admins lose access within the TTL.
+    """
+    if fn is None:
+        return functools.partial(admin_required, locations=locations)
+    
+    @functools.wraps(fn)
+    @jwt_required(locations=locations)
+    def wrapper(*args, **kwargs):
+        current_user = get_jwt_identity()
+        if get_jwt().get('role') != 'admin' or get_user_role(int(current_user)) != 'admin':
+            log.warning("Access denied for user ID: %s", current_user)
+            return jsonify({'error': 'Admin access required'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+# =====================
+# RATE LIMITING
+# =====================
+
+RATE_LIMITED_ROUTES = ('login', 'register', 'contact', 'testimonial')
+
+rate_limit_rejections = metrics.counter(
+    'rate_limit_rejections_total', 'Requests rejected by the rate limiter', ['limit'])
+
+_rate_limiter = None
+
+def get_rate_limiter():
+    """Get (lazily creating) the limiter, or None when RATE_LIMIT_ENABLED is off"""
+    global _rate_limiter
+    if not app.config['RATE_LIMIT_ENABLED']:
+        return None
+    if _rate_limiter is None:
+        with _pool_lock:
+            if _rate_limiter is None:
+                if app.config['RATE_LIMIT_STORE'] == 'sqlite':
+                    store = SQLiteBucketStore(get_db_connection)
+                else:
+                    store = MemoryBucketStore(max_keys=app.config['RATE_LIMIT_MAX_KEYS'])
+                limits = {}
+                for route in RATE_LIMITED_ROUTES:
+                    for scope in ('ip', 'account'):
+                        limits[f'{route}:{scope}'] = parse_rate(
+                            app.config[f'RATE_LIMIT_{route.upper()}_{scope.upper()}'])
+                _rate_limiter = RateLimiter(store, limits)
+    return _rate_limiter
+
+def client_ip():
+    """Client address for rate limiting
+
+    Each trusted proxy appends the address it saw to X-Forwarded-For, so
+    the client is RATE_LIMIT_TRUST_PROXY entries from the right; anything
+    further left was sent by the client and can be forged.
+    """
+    hops = app.config['RATE_LIMIT_TRUST_PROXY']
+    if hops and len(request.access_route) >= hops:
+        return request.access_route[-hops]
+    return request.remote_addr
+
+def rate_limited(route, account_field='email'):
+    """Reject with 429 once the client IP or the account named by
+    `account_field` in the JSON body runs out of tokens for `route`"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            limiter = get_rate_limiter()
+            if limiter is None:
+                return fn(*args, **kwargs)
+            
+            data = request.get_json(silent=True)
+            account = data.get(account_field) if isinstance(data, dict) else None
+            checks = [(f'{route}:ip', client_ip())]
+            if isinstance(account, str):
+                checks.append((f'{route}:account', account.strip().lower()))
+            
+            for name, key in checks:
+                try:
+                    wait = limiter.hit(name, key)
+                except Exception:
+                    # Fail open: a broken limiter store must not take the site down
+                    log.exception("Rate limiter error")
+                    break
+                if wait:
+                    rate_limit_rejections.inc(limit=name)
+                    log.warning("Rate limit %s exceeded", name, extra={'retry_after': round(wait, 3)})
+                    response = jsonify({'error': 'Too many requests, please slow down'})
+                    response.headers['Retry-After'] = str(math.ceil(wait))
+                    return response, 429
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
 
 # =====================
 # AUTH ROUTES
 # =====================
 
 @app.route('/api/auth/login', methods=['POST'])
+@rate_limited('login')
 def login():
     try:
         data = request.get_json()
@@ -112,7 +1243,7 @@ def login():
         if not email or not password:
             return jsonify({'error': 'Email and password required'}), 400
         
-        print(f"🔐 Login attempt for: {email}")
+        log.info("Login attempt for: %s", email)
         
         conn = get_db_connection()
         user = conn.execute(
@@ -122,11 +1253,11 @@ def login():
         conn.close()
         
         if not user:
-            print(f"❌ User not found: {email}")
+            log.warning("User not found: %s", email)
             return jsonify({'error': 'Invalid credentials'}), 401
         
         # For now, simple password comparison (you can use bcrypt later)
-        if user['password'] == password or bcrypt.checkpw(password.encode('utf-8'), user['password'].encode('utf-8')):
+        if user['password'] == password or password_hasher.verify(password, user['password']):
             access_token = create_access_token(
                 identity=str(user['id']),
                 additional_claims={
@@ -136,7 +1267,7 @@ def login():
                 }
             )
             
-            print(f"✅ Login successful for: {user['username']} (Role: {user['role']})")
+            log.info("Login successful for: %s (Role: %s)", user['username'], user['role'])
             
             return jsonify({
                 'message': 'Login successful',
@@ -149,14 +1280,18 @@ def login():
                 }
             })
         else:
-            print(f"❌ Invalid password for: {email}")
+            log.warning("Invalid password for: %s", email)
             return jsonify({'error': 'Invalid credentials'}), 401
             
-    except Exception as e:
-        print(f"❌ Login error: {str(e)}")
+    except HasherBusy as e:
+        log.warning("Login rejected: %s", e)
+        return hasher_busy_response()
+    except Exception:
+        log.exception("Login error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/auth/register', methods=['POST'])
+@rate_limited('register')
 def register():
     try:
         data = request.get_json()
@@ -170,10 +1305,10 @@ def register():
         if len(password) < 6:
             return jsonify({'error': 'Password must be at least 6 characters'}), 400
         
-        print(f"📝 Registration attempt: {username}, {email}")
+        log.info("Registration attempt: %s, %s", username, email)
         
         # Hash password
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed_password = password_hasher.hash(password)
         
         conn = get_db_connection()
         
@@ -196,7 +1331,7 @@ def register():
                 }
             )
             
-            print(f"✅ Registration successful: {username}")
+            log.info("Registration successful: %s", username)
             
             return jsonify({
                 'message': 'Registration successful',
@@ -213,8 +1348,11 @@ def register():
             conn.close()
             return jsonify({'error': 'Username or email already exists'}), 400
             
-    except Exception as e:
-        print(f"❌ Registration error: {str(e)}")
+    except HasherBusy as e:
+        log.warning("Registration rejected: %s", e)
+        return hasher_busy_response()
+    except Exception:
+        log.exception("Registration error")
         return jsonify({'error': 'Internal server error'}), 500
 
 # =====================
@@ -224,28 +1362,72 @@ def register():
 @app.route('/api/testimonials', methods=['GET'])
 def get_testimonials():
     try:
-        conn = get_db_connection()
-        
+        columns = list_columns('testimonials', request.args)
         if request.args.get('all') == 'true':
+            conn = get_db_connection()
             testimonials = conn.execute(
-                'SELECT * FROM testimonials ORDER BY created_at DESC'
+                f'SELECT {columns} FROM testimonials ORDER BY created_at DESC'
             ).fetchall()
-        else:
+            conn.close()
+            
+            # Convert to list of dictionaries
+            result = [dict(testimonial) for testimonial in testimonials]
+            return jsonify(result)
+        
+        cache_key = f'approved:{columns}'
+        conn = get_db_connection()
+        version = sync_testimonials_cache(conn)
+        cached = testimonials_cache.get(cache_key)
+        if cached is None:
             testimonials = conn.execute(
-                'SELECT * FROM testimonials WHERE status = "approved" ORDER BY created_at DESC'
+                f"SELECT {columns} FROM testimonials WHERE status = 'approved' ORDER BY created_at DESC"
             ).fetchall()
-        
+            
+            body = app.json.dumps([dict(testimonial) for testimonial in testimonials]).encode('utf-8')
+            cached = testimonials_cache.set(cache_key, version, body)
         conn.close()
         
-        # Convert to list of dictionaries
-        result = [dict(testimonial) for testimonial in testimonials]
-        return jsonify(result)
+        body, etag = cached
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = (
+            f"public, max-age={app.config['TESTIMONIALS_CACHE_MAX_AGE']}, "
+            f"stale-while-revalidate={app.config['TESTIMONIALS_CACHE_SWR']}"
+        )
+        return response.make_conditional(request)
         
-    except Exception as e:
-        print(f"❌ Error fetching testimonials: {str(e)}")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        log.exception("Error fetching testimonials")
         return jsonify({'error': 'Failed to fetch testimonials'}), 500
 
+@app.route('/api/testimonials/summary', methods=['GET'])
+def get_testimonial_summary():
+    try:
+        conn = get_db_connection()
+        version = sync_testimonials_cache(conn)
+        cached = testimonials_cache.get('summary')
+        if cached is None:
+            summary = read_testimonial_summary(conn)
+            cached = testimonials_cache.set('summary', version, app.json.dumps(summary).encode('utf-8'))
+        conn.close()
+        
+        body, etag = cached
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = (
+            f"public, max-age={app.config['TESTIMONIALS_CACHE_MAX_AGE']}, "
+            f"stale-while-revalidate={app.config['TESTIMONIALS_CACHE_SWR']}"
+        )
+        return response.make_conditional(request)
+        
+    except Exception:
+        log.exception("Error fetching testimonial summary")
+        return jsonify({'error': 'Failed to fetch testimonial summary'}), 500
+
 @app.route('/api/testimonials', methods=['POST'])
+@rate_limited('testimonial')
 def submit_testimonial():
     try:
         data = request.get_json()
@@ -259,25 +1441,30 @@ def submit_testimonial():
         if not name or not email or not message:
             return jsonify({'error': 'Name, email, and message are required'}), 400
         
-        print(f"⭐ New testimonial from: {name}")
+        log.info("New testimonial from: %s", name)
         
-        conn = get_db_connection()
-        cursor = conn.execute('''
+        success = {'message': 'Testimonial submitted successfully! It will be reviewed before publication.'}
+        testimonial_id, duplicate = insert_submission_once(submission_key('testimonials', email, message), '''
             INSERT INTO testimonials (name, email, company, position, message, rating)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (name, email, company, position, message, int(rating)))
+        if duplicate:
+            log.info("Duplicate testimonial, original ID: %s", testimonial_id)
+            return replayed_response(success, 201, testimonial_id)
         
-        testimonial_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        publish_change('testimonial.created', {
+            'id': testimonial_id, 'name': name, 'company': company, 'rating': int(rating), 'status': 'pending'
+        })
         
-        return jsonify({
-            'message': 'Testimonial submitted successfully! It will be reviewed before publication.',
-            'id': testimonial_id
-        }), 201
+        return jsonify(dict(success, id=testimonial_id)), 201
         
-    except Exception as e:
-        print(f"❌ Testimonial error: {str(e)}")
+    except KeyReused as e:
+        return jsonify({'error': str(e)}), 422
+    except (QueueFull, FutureTimeout):
+        log.warning("Testimonial rejected: write queue saturated")
+        return jsonify({'error': 'Server busy, please retry'}), 503
+    except Exception:
+        log.exception("Testimonial error")
         return jsonify({'error': 'Internal server error'}), 500
 
 # =====================
@@ -285,6 +1472,7 @@ def submit_testimonial():
 # =====================
 
 @app.route('/api/contact', methods=['POST'])
+@rate_limited('contact')
 def submit_contact():
     try:
         data = request.get_json()
@@ -296,96 +1484,131 @@ def submit_contact():
         if not name or not email or not message:
             return jsonify({'error': 'Name, email, and message are required'}), 400
         
-        print(f"📧 New contact message from: {name}")
+        log.info("New contact message from: %s", name)
         
-        conn = get_db_connection()
-        cursor = conn.execute('''
+        success = {'message': 'Message sent successfully! I will get back to you soon.'}
+        message_id, duplicate = insert_submission_once(submission_key('contact_messages', email, subject, message), '''
             INSERT INTO contact_messages (name, email, subject, message)
             VALUES (?, ?, ?, ?)
         ''', (name, email, subject, message))
+        if duplicate:
+            log.info("Duplicate contact message, original ID: %s", message_id)
+            return replayed_response(success, 200, message_id)
         
-        message_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        
-        print(f"✅ Contact message saved with ID: {message_id}")
-        
-        return jsonify({
-            'message': 'Message sent successfully! I will get back to you soon.',
-            'id': message_id
+        log.info("Contact message saved with ID: %s", message_id)
+        publish_change('message.created', {
+            'id': message_id, 'name': name, 'email': email, 'subject': subject, 'status': 'unread'
         })
         
-    except Exception as e:
-        print(f"❌ Contact error: {str(e)}")
+        return jsonify(dict(success, id=message_id))
+        
+    except KeyReused as e:
+        return jsonify({'error': str(e)}), 422
+    except (QueueFull, FutureTimeout):
+        log.warning("Contact message rejected: write queue saturated")
+        return jsonify({'error': 'Server busy, please retry'}), 503
+    except Exception:
+        log.exception("Contact error")
         return jsonify({'error': 'Internal server error'}), 500
 
 # =====================
 # ADMIN ROUTES
 # =====================
 
-@app.route('/api/admin/stats', methods=['GET'])
-@jwt_required()
-def admin_stats():
+# (table, columns, filters) behind each list section of the dashboard
+DASHBOARD_LISTS = {
+    'testimonials': ('testimonials', '*', ('status', 'email')),
+    'messages': ('contact_messages', '*', ('status', 'email')),
+    'users': ('users', 'id, username, email, role, created_at', ('email',)),
+}
+
+@app.route('/api/admin/dashboard', methods=['GET'])
+@admin_required
+def admin_dashboard():
+    """Stats plus the first page of each list, read from one snapshot
+
+    ?sections=stats,testimonials,messages,users picks what to include
+    (all of them when absent or empty); <section>_limit sets each list's
+    page size.
+    """
     try:
-        # Get current user info from JWT
-        current_user = get_jwt_identity()
-        print(f"🔐 Admin stats request from user ID: {current_user}")
+        requested = request.args.get('sections', '').split(',')
+        sections = [section.strip() for section in requested if section.strip()] or ['stats', *DASHBOARD_LISTS]
+        unknown = [section for section in sections if section != 'stats' and section not in DASHBOARD_LISTS]
+        if unknown:
+            return jsonify({'error': f"Unknown sections: {', '.join(unknown)}"}), 400
         
-        # Check if user is admin
         conn = get_db_connection()
-        user = conn.execute('SELECT role FROM users WHERE id = ?', (int(current_user),)).fetchone()
+        # One read transaction, so every section sees the same snapshot
+        conn.execute('BEGIN')
+        
+        result = {}
+        if 'stats' in sections:
+            result['stats'] = read_stats(conn)
+        for section, (table, columns, filters) in DASHBOARD_LISTS.items():
+            if section not in sections:
+                continue
+            args = {'limit': request.args.get(f'{section}_limit')}
+            rows, next_cursor = fetch_page(conn, table, columns, args, filters)
+            result[section] = {
+                'items': [dict(row) for row in rows],
+                'next_cursor': next_cursor
+            }
         
-        if not user or user['role'] != 'admin':
-            conn.close()
-            print(f"❌ Access denied - User role: {user['role'] if user else 'None'}")
-            return jsonify({'error': 'Admin access required'}), 403
-        
-        # Get statistics
-        stats = {}
-        
-        stats['totalUsers'] = conn.execute('SELECT COUNT(*) as count FROM users').fetchone()['count']
-        stats['totalTestimonials'] = conn.execute('SELECT COUNT(*) as count FROM testimonials').fetchone()['count']
-        stats['pendingTestimonials'] = conn.execute('SELECT COUNT(*) as count FROM testimonials WHERE status = "pending"').fetchone()['count']
-        stats['totalMessages'] = conn.execute('SELECT COUNT(*) as count FROM contact_messages').fetchone()['count']
-        stats['unreadMessages'] = conn.execute('SELECT COUNT(*) as count FROM contact_messages WHERE status = "unread"').fetchone()['count']
+        conn.commit()
+        conn.close()
+        return jsonify(result)
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        log.exception("Admin dashboard error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/admin/stats', methods=['GET'])
+@admin_required
+def admin_stats():
+    try:
+        conn = get_db_connection()
+        stats = read_stats(conn)
         conn.close()
         return jsonify(stats)
         
-    except Exception as e:
-        print(f"❌ Admin stats error: {str(e)}")
+    except Exception:
+        log.exception("Admin stats error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/admin/testimonials', methods=['GET'])
-@jwt_required()
+@admin_required
 def admin_get_testimonials():
     try:
-        current_user = get_jwt_identity()
+        testimonials, next_cursor = fetch_list_page('testimonials', request.args)
+        return page_response(testimonials, next_cursor)
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        log.exception("Admin testimonials error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/admin/testimonials/summary/rebuild', methods=['POST'])
+@admin_required
+def admin_rebuild_testimonial_summary():
+    try:
         conn = get_db_connection()
-        user = conn.execute('SELECT role FROM users WHERE id = ?', (int(current_user),)).fetchone()
-        
-        if not user or user['role'] != 'admin':
-            return jsonify({'error': 'Admin access required'}), 403
-        
-        testimonials = conn.execute(
-            'SELECT * FROM testimonials ORDER BY created_at DESC'
-        ).fetchall()
-        
+        summary = dict(rebuild_testimonial_summary(conn))
         conn.close()
+        summary.pop('id', None)
+        return jsonify({'message': 'Testimonial summary rebuilt', 'summary': summary})
         
-        result = [dict(testimonial) for testimonial in testimonials]
-        return jsonify(result)
-        
-    except Exception as e:
-        print(f"❌ Admin testimonials error: {str(e)}")
+    except Exception:
+        log.exception("Testimonial summary rebuild error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/admin/testimonials/<int:testimonial_id>', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_testimonial(testimonial_id):
     try:
-        current_user = get_jwt_identity()
         data = request.get_json()
         status = data.get('status')
         
@@ -393,42 +1616,32 @@ def update_testimonial(testimonial_id):
             return jsonify({'error': 'Invalid status'}), 400
         
         conn = get_db_connection()
-        user = conn.execute('SELECT role FROM users WHERE id = ?', (int(current_user),)).fetchone()
-        
-        if not user or user['role'] != 'admin':
-            return jsonify({'error': 'Admin access required'}), 403
         
-        conn.execute(
+        cursor = conn.execute(
             'UPDATE testimonials SET status = ? WHERE id = ?',
             (status, testimonial_id)
         )
         conn.commit()
         
-        if conn.total_changes == 0:
+        if cursor.rowcount == 0:
             conn.close()
             return jsonify({'error': 'Testimonial not found'}), 404
         
         conn.close()
-        print(f"✅ Testimonial {testimonial_id} updated to {status}")
+        publish_change('testimonial.updated', {'id': testimonial_id, 'status': status})
+        log.info("Testimonial %s updated to %s", testimonial_id, status)
         
         return jsonify({'message': 'Testimonial updated successfully'})
         
-    except Exception as e:
-        print(f"❌ Update testimonial error: {str(e)}")
+    except Exception:
+        log.exception("Update testimonial error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/admin/testimonials/<int:testimonial_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_testimonial(testimonial_id):
     try:
-        current_user = get_jwt_identity()
-        
         conn = get_db_connection()
-        user = conn.execute('SELECT role FROM users WHERE id = ?', (int(current_user),)).fetchone()
-        
-        if not user or user['role'] != 'admin':
-            conn.close()
-            return jsonify({'error': 'Admin access required'}), 403
         
         # Delete the testimonial
         cursor = conn.execute('DELETE FROM testimonials WHERE id = ?', (testimonial_id,))
@@ -439,90 +1652,219 @@ def delete_testimonial(testimonial_id):
             return jsonify({'error': 'Testimonial not found'}), 404
         
         conn.close()
-        print(f"✅ Testimonial {testimonial_id} deleted successfully")
+        publish_change('testimonial.deleted', {'id': testimonial_id})
+        log.info("Testimonial %s deleted successfully", testimonial_id)
         
         return jsonify({'message': 'Testimonial deleted successfully'})
         
-    except Exception as e:
-        print(f"❌ Delete testimonial error: {str(e)}")
+    except Exception:
+        log.exception("Delete testimonial error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/admin/messages', methods=['GET'])
-@jwt_required()
+@admin_required
 def admin_get_messages():
     try:
-        current_user = get_jwt_identity()
-        
-        conn = get_db_connection()
-        user = conn.execute('SELECT role FROM users WHERE id = ?', (int(current_user),)).fetchone()
-        
-        if not user or user['role'] != 'admin':
-            return jsonify({'error': 'Admin access required'}), 403
-        
-        messages = conn.execute(
-            'SELECT * FROM contact_messages ORDER BY created_at DESC'
-        ).fetchall()
-        
-        conn.close()
-        
-        result = [dict(message) for message in messages]
-        print(f"📧 Returning {len(result)} contact messages")
-        return jsonify(result)
-        
-    except Exception as e:
-        print(f"❌ Admin messages error: {str(e)}")
+        messages, next_cursor = fetch_list_page('contact_messages', request.args)
+        log.debug("Returning %s contact messages", len(messages))
+        return page_response(messages, next_cursor)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        log.exception("Admin messages error")
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/admin/messages/<int:message_id>', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_message(message_id):
     try:
-        current_user = get_jwt_identity()
         data = request.get_json()
         status = data.get('status')
         
         conn = get_db_connection()
-        user = conn.execute('SELECT role FROM users WHERE id = ?', (int(current_user),)).fetchone()
-        
-        if not user or user['role'] != 'admin':
-            return jsonify({'error': 'Admin access required'}), 403
         
-        conn.execute(
+        cursor = conn.execute(
             'UPDATE contact_messages SET status = ? WHERE id = ?',
             (status, message_id)
         )
         conn.commit()
         conn.close()
         
+        if cursor.rowcount:
+            publish_change('message.updated', {'id': message_id, 'status': status})
+        
         return jsonify({'message': 'Message updated successfully'})
         
-    except Exception as e:
-        print(f"❌ Update message error: {str(e)}")
+    except Exception:
+        log.exception("Update message error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/admin/testimonials/bulk', methods=['POST'])
+@admin_required
+def bulk_testimonials():
+    try:
+        result = bulk_moderate('testimonials', ['approved', 'rejected', 'pending'])
+        return jsonify(result)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        log.exception("Bulk testimonials error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/admin/messages/bulk', methods=['POST'])
+@admin_required
+def bulk_messages():
+    try:
+        return jsonify(bulk_moderate('contact_messages'))
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        log.exception("Bulk messages error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/admin/export/messages', methods=['GET'])
+@admin_required
+def export_messages():
+    try:
+        return export_response('contact_messages')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/admin/export/testimonials', methods=['GET'])
+@admin_required
+def export_testimonials():
+    try:
+        return export_response('testimonials')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/admin/search', methods=['GET'])
+@admin_required
+def admin_search():
+    try:
+        scope = request.args.get('scope', 'messages')
+        if scope not in SEARCH_SCOPES:
+            return jsonify({'error': 'scope must be messages or testimonials'}), 400
+        
+        query = build_fts_query(request.args.get('q', ''))
+        if not query:
+            return jsonify({'error': 'Search query required'}), 400
+        
+        limit = parse_limit(request.args.get('limit'), default=20)
+        offset = parse_offset(request.args.get('offset'))
+        
+        table = SEARCH_SCOPES[scope]
+        fts = f'{table}_fts'
+        clauses, params = build_list_filters(request.args)
+        where = ''.join(f' AND t.{clause}' for clause in clauses)
+        
+        conn = get_db_connection()
+        rows = conn.execute(f'''
+            SELECT t.*,
+                   snippet({fts}, -1, ?, ?, '…', 12) AS snippet,
+                   bm25({fts}) AS rank
+            FROM {fts}
+            JOIN {table} t ON t.id = {fts}.rowid
+            WHERE {fts} MATCH ?{where}
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+        ''', [SNIPPET_OPEN, SNIPPET_CLOSE, query] + params + [limit + 1, offset]).fetchall()
+        conn.close()
+        
+        has_more = len(rows) > limit
+        return jsonify({
+            'query': request.args.get('q'),
+            'scope': scope,
+            'results': [dict(row, snippet=mark_snippet(row['snippet'])) for row in rows[:limit]],
+            'next_offset': offset + limit if has_more else None
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except sqlite3.OperationalError:
+        log.exception("Search error")
+        return jsonify({'error': 'Search is unavailable'}), 503
+    except Exception:
+        log.exception("Search error")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/admin/events', methods=['GET'])
+@admin_required(locations=['headers', 'query_string'])
+def admin_events():
+    """Server-Sent Events stream of submissions and moderation changes
+
+    EventSource can't send headers, so the token may also be passed as
+    ?jwt=. Reconnects resume from Last-Event-ID; a `resync` event means
+    events were missed and the client should reload its lists.
+    ?topics=message,testimonial limits what is sent.
+    """
+    feed = get_change_feed()
+    topics = set(filter(None, request.args.get('topics', '').split(',')))
+    heartbeat = app.config['CHANGE_FEED_HEARTBEAT']
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_id = int(last_event_id) if last_event_id else feed.latest_id()
+    except ValueError:
+        last_id = feed.latest_id()
+    
+    stream = EventStream(feed, last_id, topics, heartbeat)
+    # Lets an async server (asgi.py) drive the stream without a thread
+    request.environ['portfolio.event_stream'] = stream
+    
+    response = Response(iter(stream), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/api/admin/users', methods=['GET'])
-@jwt_required()
+@admin_required
 def admin_get_users():
     try:
-        current_user = get_jwt_identity()
-        
         conn = get_db_connection()
-        user = conn.execute('SELECT role FROM users WHERE id = ?', (int(current_user),)).fetchone()
         
-        if not user or user['role'] != 'admin':
-            return jsonify({'error': 'Admin access required'}), 403
+        users, next_cursor = fetch_page(
+            conn, 'users', 'id, username, email, role, created_at', request.args, filters=('email',)
+        )
+        
+        conn.close()
+        
+        return page_response(users, next_cursor)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        log.exception("Admin users error")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/admin/users/<int:user_id>', methods=['PUT'])
+@admin_required
+def update_user_role(user_id):
+    try:
+        data = request.get_json()
+        role = data.get('role')
         
-        users = conn.execute(
-            'SELECT id, username, email, role, created_at FROM users ORDER BY created_at DESC'
-        ).fetchall()
+        if role not in ['admin', 'user']:
+            return jsonify({'error': 'Invalid role'}), 400
         
+        conn = get_db_connection()
+        cursor = conn.execute('UPDATE users SET role = ? WHERE id = ?', (role, user_id))
+        conn.commit()
         conn.close()
         
-        result = [dict(user) for user in users]
-        return jsonify(result)
+        if cursor.rowcount == 0:
+            return jsonify({'error': 'User not found'}), 404
         
-    except Exception as e:
-        print(f"❌ Admin users error: {str(e)}")
+        invalidate_user_role(user_id)
+        log.info("User %s role changed to %s", user_id, role)
+        
+        return jsonify({'message': 'User updated successfully'})
+        
+    except Exception:
+        log.exception("Update user error")
         return jsonify({'error': 'Internal server error'}), 500
 
 # =====================
@@ -531,11 +1873,69 @@ def admin_get_users():
 
 @app.route('/health', methods=['GET'])
 def health_check():
+    try:
+        check_database(app.config['HEALTH_DB_TIMEOUT'])
+        database = 'Connected'
+    except sqlite3.Error as e:
+        log.warning("Health check database error: %s", e)
+        database = 'Unavailable'
+    
     return jsonify({
-        'status': 'OK',
+        'status': 'OK' if database == 'Connected' else 'UNAVAILABLE',
         'message': 'Flask Portfolio Server Running',
         'timestamp': datetime.now().isoformat(),
-        'database': 'Connected'
+        'database': database,
+        'pool': get_pool().stats(),
+        'password_hasher': password_hasher.stats(),
+        'write_behind': get_write_queue().stats() if get_write_queue() else None
+    }), 200 if database == 'Connected' else 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Unauthorized'}), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/admin/profiles', methods=['GET', 'DELETE'])
+@admin_required
+def admin_profiles():
+    """Slowest profiled requests (summaries); DELETE clears them"""
+    if request.method == 'DELETE':
+        profiler.clear()
+        return jsonify({'message': 'Profiles cleared'})
+    return jsonify({
+        'enabled': app.config['PROFILE_ENABLED'],
+        'sample_rate': app.config['PROFILE_SAMPLE_RATE'],
+        'profiled': profiler.profiled,
+        'profiles': profiler.summaries(),
+    })
+
+@app.route('/api/admin/profiles/<int:profile_id>', methods=['GET'])
+@admin_required
+def admin_profile(profile_id):
+    """pstats report as text, or ?format=prof for snakeviz / pstats.Stats"""
+    entry = profiler.get(profile_id)
+    if entry is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    if request.args.get('format') == 'prof':
+        response = Response(entry['stats'], mimetype='application/octet-stream')
+        response.headers['Content-Disposition'] = f'attachment; filename=profile-{profile_id}.prof'
+        return response
+    header = f"{entry['method']} {entry['path']} -> {entry['status']} in {entry['duration_ms']} ms\n\n"
+    return Response(header + entry['report'], mimetype='text/plain')
+
+@app.route('/api/admin/slow-queries', methods=['GET', 'DELETE'])
+@admin_required
+def admin_slow_queries():
+    """Most recent statements over SLOW_QUERY_MS with their query plans"""
+    if request.method == 'DELETE':
+        slow_queries.clear()
+        return jsonify({'message': 'Slow query log cleared'})
+    return jsonify({
+        'threshold_ms': app.config['SLOW_QUERY_MS'],
+        'recorded': slow_queries.recorded,
+        'queries': slow_queries.entries(),
     })
 
 @app.route('/api/test-auth', methods=['GET'])
@@ -543,7 +1943,7 @@ def health_check():
 def test_auth():
     try:
         current_user = get_jwt_identity()
-        print(f"🔍 Test Auth - User ID: {current_user}")
+        log.info("Test Auth - User ID: %s", current_user)
         
         conn = get_db_connection()
         user = conn.execute('SELECT * FROM users WHERE id = ?', (int(current_user),)).fetchone()
@@ -560,9 +1960,57 @@ def test_auth():
             return jsonify({'error': 'User not found'}), 404
             
     except Exception as e:
-        print(f"❌ Test auth error: {str(e)}")
+        log.exception("Test auth error")
         return jsonify({'error': str(e)}), 500
 
+# =====================
+# FRONTEND
+# =====================
+
+_static_ready = False
+# Compression can take a while; don't hold up pool/feed initialisation
+_static_lock = threading.Lock()
+
+def ensure_precompressed():
+    global _static_ready
+    if not _static_ready:
+        with _static_lock:
+            if not _static_ready:
+                if app.config['STATIC_PRECOMPRESS']:
+                    try:
+                        written = precompress(app.config['STATIC_ROOT'])
+                        log.info("Precompressed %s static files", written)
+                    except OSError as e:
+                        log.warning("Static precompression skipped: %s", e)
+                _static_ready = True
+
+# Every method, so unknown paths get the JSON 404 rather than an HTML 405
+FRONTEND_METHODS = ['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE']
+
+@app.route('/', defaults={'path': 'index.html'}, methods=FRONTEND_METHODS)
+@app.route('/<path:path>', methods=FRONTEND_METHODS)
+def frontend(path):
+    """Built frontend from STATIC_ROOT, with index.html for client-side routes"""
+    root = app.config['STATIC_ROOT']
+    if (not app.config['STATIC_ENABLED'] or not os.path.isdir(root) or path.startswith('api/')
+            or request.method not in ('GET', 'HEAD')):
+        return not_found(None)
+    
+    ensure_precompressed()
+    response = serve_file(root, path, request)
+    if response is None:
+        # Unknown asset files are real 404s; anything else is an SPA route
+        if os.path.splitext(path)[1]:
+            return not_found(None)
+        response = serve_file(root, 'index.html', request)
+    return response if response is not None else not_found(None)
+
+@app.cli.command('precompress-static')
+def precompress_static_command():
+    """Write .gz/.br variants of the built frontend (run after vite build)"""
+    written = precompress(app.config['STATIC_ROOT'])
+    print(f"✅ Precompressed {written} files in {app.config['STATIC_ROOT']}")
+
 # =====================
 # ERROR HANDLERS
 # =====================
@@ -575,20 +2023,25 @@ def not_found(error):
 def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
+@app.errorhandler(PoolTimeout)
+def pool_timeout(error):
+    log.warning("Database pool exhausted: %s", error)
+    return jsonify({'error': 'Server busy, please retry'}), 503
+
 # JWT Error handlers
 @jwt.expired_token_loader
 def expired_token_callback(jwt_header, jwt_payload):
-    print("❌ JWT Token expired")
+    log.warning("JWT Token expired")
     return jsonify({'error': 'Token has expired'}), 401
 
 @jwt.invalid_token_loader
 def invalid_token_callback(error):
-    print(f"❌ Invalid JWT Token: {error}")
+    log.warning("Invalid JWT Token: %s", error)
     return jsonify({'error': 'Invalid token'}), 422
 
 @jwt.unauthorized_loader
 def missing_token_callback(error):
-    print(f"❌ Missing JWT Token: {error}")
+    log.warning("Missing JWT Token: %s", error)
     return jsonify({'error': 'Authorization token is required'}), 401
 
 # =====================
@@ -603,9 +2056,7 @@ if __name__ == '__main__':
     print("🌐 Health check: http://localhost:5000/health")
     print("📊 Admin API: http://localhost:5000/api/admin/stats")
     print("")
-    print("📋 Login Credentials:")
-    print("   Admin: username=admin, password=admin123")
-    print("   User:  username=testuser, password=password123")
+    print("👤 Create the default users once with: python init_db.py")
     print("")
     print("✅ Ready for frontend at http://localhost:5173/")
     
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""ASGI entry point: the Flask app behind an event loop
+
+    pip install -r requirements-asgi.txt
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+The event loop owns every socket, so idle keep-alive connections, slow
+uploads and open /api/admin/events streams cost no thread. A request is
+read in full first, then its view runs on a bounded pool of view threads.
+bcrypt still goes through the app's PasswordHasher pool and SQLite through
+its connection pool. Once every view thread is busy and ASGI_MAX_QUEUE
+requests are already waiting, new requests get 503 instead of piling up.
+"""
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import app as portfolio
+
+log = logging.getLogger('portfolio')
+
+# Response bytes pulled from a WSGI body per trip to a view thread
+CHUNK_BYTES = 64 * 1024
+
+
+class BodyTooLarge(Exception):
+    """Raised when a request body exceeds max_body"""
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI http scope and its complete body"""
+    path, root_path = scope['path'], scope.get('root_path', '')
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        # WSGI carries paths as latin-1 decoded bytes
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        key = name.decode('latin-1').upper().replace('-', '_')
+        if key == 'CONTENT_LENGTH':
+            continue  # the body has already been read; see above
+        if key != 'CONTENT_TYPE':
+            key = f'HTTP_{key}'
+        value = value.decode('latin-1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def pull(iterator, limit=CHUNK_BYTES):
+    """Next ~limit bytes of a WSGI body as (data, more)"""
+    parts, size = [], 0
+    for chunk in iterator:
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            return b''.join(parts), True
+    return b''.join(parts), False
+
+
+class ASGIAdapter:
+    """Runs a WSGI app's views on bounded executors from an event loop
+
+    Responses are forwarded in CHUNK_BYTES pieces. A view that puts an
+    events.EventStream in environ['portfolio.event_stream'] has its body
+    produced here instead: the stream is polled on a small stream pool
+    whenever its ChangeFeed publishes or its heartbeat is due, so an open
+    stream holds no thread while it waits.
+    """
+
+    def __init__(self, wsgi_app, workers=16, max_queue=512, stream_workers=2,
+                 max_body=1024 * 1024, startup=None):
+        self.wsgi_app = wsgi_app
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_body = max_body
+        self.startup = startup
+        self._views = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asgi-view')
+        self._streams = ThreadPoolExecutor(max_workers=stream_workers, thread_name_prefix='asgi-stream')
+
+        # Only touched from the event loop thread
+        self.in_flight = 0
+        self.open_streams = 0
+        self.rejected = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    if self.startup is not None:
+                        await asyncio.get_running_loop().run_in_executor(self._views, self.startup)
+                except Exception as e:
+                    log.exception("ASGI startup failed")
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def close(self):
+        self._views.shutdown(wait=False)
+        self._streams.shutdown(wait=False)
+
+    async def _read_body(self, scope, receive):
+        """The whole request body, or None if the client went away"""
+        for name, value in scope['headers']:
+            if name == b'content-length' and value.isdigit() and int(value) > self.max_body:
+                raise BodyTooLarge()
+        parts, size = [], 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body:
+                raise BodyTooLarge()
+            parts.append(chunk)
+            if not message.get('more_body', False):
+                return b''.join(parts)
+
+    async def _http(self, scope, receive, send):
+        try:
+            body = await self._read_body(scope, receive)
+        except BodyTooLarge:
+            await self._error(send, 413, 'Request body too large')
+            return
+        if body is None:
+            return
+
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            log.warning("ASGI request rejected: %s requests already waiting", self.in_flight)
+            await self._error(send, 503, 'Server busy, please retry', [(b'retry-after', b'1')])
+            return
+
+        environ = build_environ(scope, body)
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            status, headers, app_iter, iterator, data, more = await loop.run_in_executor(
+                self._views, self._start, environ
+            )
+        finally:
+            self.in_flight -= 1
+
+        try:
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            stream = environ.get('portfolio.event_stream')
+            if stream is not None and status == 200:
+                await self._stream_events(stream, receive, send)
+                return
+            while more:
+                await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+                data, more = await loop.run_in_executor(self._views, pull, iterator)
+            await send({'type': 'http.response.body', 'body': data})
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    def _start(self, environ):
+        """Call the WSGI app and read the start of its body (view thread)"""
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and started:
+                raise exc_info[1].with_traceback(exc_info[2])
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers
+            ]
+            return started.setdefault('written', []).append
+
+        app_iter = self.wsgi_app(environ, start_response)
+        iterator = iter(app_iter)
+        if 'portfolio.event_stream' in environ:
+            data, more = b'', False  # the stream is driven from the event loop
+        else:
+            data, more = pull(iterator)
+        # Legacy write() output precedes the body
+        data = b''.join(started.get('written', [])) + data
+        return started['status'], started['headers'], app_iter, iterator, data, more
+
+    async def _stream_events(self, stream, receive, send):
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        disconnected = False
+
+        def listener():
+            # Called from whichever thread published the event
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:  # loop already closed
+                pass
+
+        async def watch_disconnect():
+            nonlocal disconnected
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected = True
+            wake.set()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        stream.feed.add_listener(listener)
+        self.open_streams += 1
+        try:
+            while not disconnected:
+                wake.clear()
+                chunks = await loop.run_in_executor(self._streams, stream.poll)
+                if chunks:
+                    await send({'type': 'http.response.body', 'body': ''.join(chunks).encode('utf-8'),
+                                'more_body': True})
+                try:
+                    await asyncio.wait_for(wake.wait(), stream.timeout())
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.open_streams -= 1
+            stream.feed.remove_listener(listener)
+            watcher.cancel()
+
+    async def _error(self, send, status, message, headers=()):
+        body = json.dumps({'error': message}).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(body)).encode('latin-1')), *headers],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+application = ASGIAdapter(
+    portfolio.app,
+    workers=portfolio.app.config['ASGI_WORKERS'],
+    max_queue=portfolio.app.config['ASGI_MAX_QUEUE'],
+    stream_workers=portfolio.app.config['ASGI_STREAM_WORKERS'],
+    max_body=portfolio.app.config['ASGI_MAX_BODY'],
+    startup=portfolio.init_database,
+)
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("asgi.py needs an ASGI server: pip install -r requirements-asgi.txt")
+    uvicorn.run(application, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
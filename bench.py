@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+"""Load-test and micro-benchmark harness for the Flask API
+
+Seeds a scratch database from init_database(), drives every route through
+the Flask test client, a real threaded WSGI server and/or the ASGI adapter
+(asgi.py) in-process, and writes throughput and p50/p95/p99 latency per
+endpoint as JSON.
+
+    python bench.py run --messages 1000000 --testimonials 100000 --output before.json
+    python bench.py run --mode server --concurrency 16 --output after.json
+    python bench.py run --mode all --concurrency 64
+    python bench.py compare before.json after.json --threshold 0.10
+
+Everything runs locally; no network access is needed. This measures
+speed only; tests/ asserts that the WSGI and ASGI modes behave the same.
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+STATUSES = {
+    'testimonials': ['pending', 'approved', 'rejected'],
+    'contact_messages': ['unread', 'read', 'replied'],
+}
+
+
+def load_app(db_path):
+    """Import app.py against db_path (DB_PATH is read at import time)"""
+    os.environ['DB_PATH'] = db_path
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')  # one client IP would trip every limit
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app as portfolio
+    return portfolio
+
+
+def seed(portfolio, users, testimonials, messages, chunk=10000):
+    """Create the schema and bulk-insert synthetic rows"""
+    portfolio.init_database()
+    portfolio.seed_default_users()
+    conn = portfolio.get_db_connection()
+    now = datetime.utcnow()
+    rng = random.Random(42)
+    # One real hash reused for every user keeps seeding fast
+    password = portfolio.password_hasher.hash('benchpass')
+
+    def created_at():
+        return (now - timedelta(seconds=rng.randint(0, 365 * 86400))).strftime('%Y-%m-%d %H:%M:%S')
+
+    def insert(sql, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk:
+                conn.executemany(sql, batch)
+                batch = []
+        if batch:
+            conn.executemany(sql, batch)
+        conn.commit()
+
+    insert(
+        'INSERT INTO users (username, email, password, role, created_at) VALUES (?, ?, ?, ?, ?)',
+        ((f'user{i}', f'user{i}@bench.local', password, 'user', created_at()) for i in range(users))
+    )
+    insert(
+        'INSERT INTO testimonials (name, email, company, position, message, rating, status, created_at) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        ((f'Client {i}', f'client{i % 5000}@bench.local', f'Company {i % 300}', 'CTO',
+          f'Great collaboration on project {i}, delivered on time and well tested.',
+          rng.randint(1, 5), rng.choice(STATUSES['testimonials']), created_at())
+         for i in range(testimonials))
+    )
+    insert(
+        'INSERT INTO contact_messages (name, email, subject, message, status, created_at) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        ((f'Sender {i}', f'sender{i % 20000}@bench.local', f'Inquiry {i % 50}',
+          f'Hello, I would like to discuss a React project number {i} with you.',
+          rng.choice(STATUSES['contact_messages']), created_at())
+         for i in range(messages))
+    )
+    portfolio.reconcile_counters(conn)
+    conn.close()
+
+
+# Scenarios run with 1/10 of --requests: bcrypt-bound or whole-table work
+SLOW_SCENARIOS = {'login', 'register', 'export_messages', 'export_testimonials', 'rebuild_summary'}
+
+
+def scenarios(testimonials, messages, users):
+    """(name, method, path-factory, body-factory, needs_admin) for every route
+
+    Not covered: /api/admin/events (a stream that never completes, so it
+    has no latency to measure) and DELETE /api/admin/profiles and
+    /api/admin/slow-queries (they only clear diagnostics). static_index
+    is a 404 unless dist/ has been built.
+    """
+    def rand_id(n):
+        return lambda: random.randint(1, max(n, 1))
+
+    def rand_ids(n, count=20):
+        return lambda: random.sample(range(1, max(n, count) + 1), count)
+
+    testimonial_id = rand_id(testimonials)
+    message_id = rand_id(messages)
+    counter = iter(range(10 ** 9))
+    last_month = (datetime.utcnow() - timedelta(days=30)).strftime('%Y-%m-%d')
+
+    return [
+        ('health', 'GET', lambda: '/health', None, False),
+        ('testimonials_public', 'GET', lambda: '/api/testimonials', None, False),
+        ('testimonials_fields', 'GET', lambda: '/api/testimonials?fields=name,company,rating', None, False),
+        ('testimonial_summary', 'GET', lambda: '/api/testimonials/summary', None, False),
+        ('static_index', 'GET', lambda: '/', None, False),
+        ('login', 'POST', lambda: '/api/auth/login',
+         lambda: {'email': 'admin', 'password': 'admin123'}, False),
+        ('register', 'POST', lambda: '/api/auth/register',
+         lambda: {'username': f'bench{next(counter)}-{random.random()}',
+                  'email': f'bench{random.random()}@bench.local', 'password': 'benchpass'}, False),
+        ('submit_testimonial', 'POST', lambda: '/api/testimonials',
+         lambda: {'name': 'Bench', 'email': 'bench@bench.local',
+                  'message': f'Benchmark run {next(counter)}', 'rating': 5}, False),
+        ('submit_contact', 'POST', lambda: '/api/contact',
+         lambda: {'name': 'Bench', 'email': 'bench@bench.local', 'message': f'Benchmark run {next(counter)}'}, False),
+        ('admin_stats', 'GET', lambda: '/api/admin/stats', None, True),
+        ('admin_dashboard', 'GET', lambda: '/api/admin/dashboard', None, True),
+        ('admin_testimonials', 'GET', lambda: '/api/admin/testimonials?status=pending', None, True),
+        ('admin_messages', 'GET', lambda: '/api/admin/messages?limit=50', None, True),
+        ('admin_messages_summary', 'GET', lambda: '/api/admin/messages?view=summary&limit=50', None, True),
+        ('admin_testimonials_fields', 'GET', lambda: '/api/admin/testimonials?fields=id,name,status', None, True),
+        ('admin_archived', 'GET', lambda: '/api/admin/messages?archived=true', None, True),
+        ('admin_users', 'GET', lambda: '/api/admin/users', None, True),
+        ('admin_search', 'GET', lambda: '/api/admin/search?q=react+project', None, True),
+        ('export_messages', 'GET', lambda: f'/api/admin/export/messages?since={last_month}', None, True),
+        ('export_testimonials', 'GET', lambda: '/api/admin/export/testimonials?format=csv&compress=gzip',
+         None, True),
+        ('update_testimonial', 'PUT', lambda: f'/api/admin/testimonials/{testimonial_id()}',
+         lambda: {'status': random.choice(STATUSES['testimonials'])}, True),
+        ('update_message', 'PUT', lambda: f'/api/admin/messages/{message_id()}',
+         lambda: {'status': random.choice(STATUSES['contact_messages'])}, True),
+        ('update_user', 'PUT', lambda: f'/api/admin/users/{random.randint(3, users + 2)}',
+         lambda: {'role': 'user'}, True),
+        ('bulk_testimonials', 'POST', lambda: '/api/admin/testimonials/bulk',
+         lambda: {'action': 'update', 'status': random.choice(STATUSES['testimonials']),
+                  'ids': rand_ids(testimonials)()}, True),
+        ('bulk_messages', 'POST', lambda: '/api/admin/messages/bulk',
+         lambda: {'action': 'update', 'status': random.choice(STATUSES['contact_messages']),
+                  'ids': rand_ids(messages)()}, True),
+        ('rebuild_summary', 'POST', lambda: '/api/admin/testimonials/summary/rebuild', None, True),
+        ('test_auth', 'GET', lambda: '/api/test-auth', None, True),
+        ('profiles', 'GET', lambda: '/api/admin/profiles', None, True),
+        ('slow_queries', 'GET', lambda: '/api/admin/slow-queries', None, True),
+        ('metrics', 'GET', lambda: '/metrics', None, False),
+        # Last, so the other scenarios see a full table (404s once ids run out)
+        ('delete_testimonial', 'DELETE', lambda: f'/api/admin/testimonials/{testimonial_id()}', None, True),
+    ]
+
+
+class ClientTransport:
+    """Requests through app.test_client(), one client per thread"""
+
+    def __init__(self, portfolio):
+        self.app = portfolio.app
+        self.local = threading.local()
+
+    def request(self, method, path, body, headers):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body, headers=headers)
+        data = response.get_data()
+        return response.status_code, data
+
+
+class ServerTransport:
+    """Requests over HTTP to a threaded werkzeug server on localhost"""
+
+    def __init__(self, portfolio):
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)  # no per-request access lines
+        self.server = make_server('127.0.0.1', 0, portfolio.app, threaded=True)
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.local = threading.local()
+
+    def request(self, method, path, body, headers):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        payload = json.dumps(body) if body is not None else None
+        headers = dict(headers, **({'Content-Type': 'application/json'} if payload else {}))
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self.local.conn = None
+            raise
+
+    def close(self):
+        self.server.shutdown()
+
+
+class ASGITransport:
+    """Requests through asgi.application on an event loop thread"""
+
+    def __init__(self, portfolio):
+        import asgi
+        self.application = asgi.application
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def request(self, method, path, body, headers):
+        future = asyncio.run_coroutine_threadsafe(self._request(method, path, body, headers), self.loop)
+        return future.result(timeout=60)
+
+    async def _request(self, method, path, body, headers):
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+        headers = dict(headers, **({'Content-Type': 'application/json'} if payload else {}))
+        path, _, query = path.partition('?')
+        scope = {
+            'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http',
+            'path': path, 'root_path': '', 'query_string': query.encode('latin-1'),
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()],
+            'server': ('127.0.0.1', 80), 'client': ('127.0.0.1', 0),
+        }
+        received = []
+        response = {'status': None, 'body': []}
+
+        async def receive():
+            if received:
+                await asyncio.Event().wait()  # no disconnect while we wait
+            received.append(True)
+            return {'type': 'http.request', 'body': payload, 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            else:
+                response['body'].append(message.get('body', b''))
+
+        await self.application(scope, receive, send)
+        return response['status'], b''.join(response['body'])
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+TRANSPORTS = {'client': ClientTransport, 'server': ServerTransport, 'asgi': ASGITransport}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def run_scenario(transport, method, make_path, make_body, headers, requests, concurrency):
+    latencies = []
+    statuses = {}
+    errors = 0
+    lock = threading.Lock()
+
+    def one(_):
+        nonlocal errors
+        path = make_path()
+        body = make_body() if make_body else None
+        started = time.perf_counter()
+        try:
+            status, _ = transport.request(method, path, body, headers)
+        except Exception:
+            with lock:
+                errors += 1
+            return
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+def command_run(args):
+    scratch = None
+    db_path = args.db
+    if db_path is None:
+        scratch = tempfile.mkdtemp(prefix='portfolio-bench-')
+        db_path = os.path.join(scratch, 'bench.db')
+    fresh = not os.path.exists(db_path)
+
+    if not fresh and not args.reuse:
+        raise SystemExit(f'{db_path} exists; pass --reuse to benchmark it as-is')
+
+    portfolio = load_app(db_path)
+    if fresh:
+        started = time.perf_counter()
+        seed(portfolio, args.users, args.testimonials, args.messages)
+        print(f'Seeded {db_path} in {time.perf_counter() - started:.1f}s', file=sys.stderr)
+    else:
+        portfolio.init_database()
+
+    only = set(args.only.split(',')) if args.only else None
+    report = {
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'config': {
+            'users': args.users, 'testimonials': args.testimonials, 'messages': args.messages,
+            'requests': args.requests, 'concurrency': args.concurrency, 'db': db_path,
+        },
+        'results': {},
+    }
+
+    modes = {'both': ['client', 'server'], 'all': list(TRANSPORTS)}.get(args.mode, [args.mode])
+    for mode in modes:
+        transport = TRANSPORTS[mode](portfolio)
+        status, body = transport.request('POST', '/api/auth/login', {'email': 'admin', 'password': 'admin123'}, {})
+        if status != 200:
+            raise SystemExit(f'Admin login failed ({status}): {body[:200]!r}')
+        admin_headers = {'Authorization': f"Bearer {json.loads(body)['token']}"}
+
+        for name, method, make_path, make_body, needs_admin in scenarios(args.testimonials, args.messages, args.users):
+            if only and name not in only:
+                continue
+            headers = admin_headers if needs_admin else {}
+            requests = max(1, args.requests // 10) if name in SLOW_SCENARIOS else args.requests
+            result = run_scenario(transport, method, make_path, make_body, headers, requests, args.concurrency)
+            report['results'][f'{mode}:{name}'] = result
+            print(f"{mode:6} {name:22} {result['throughput_rps']:>9} rps  "
+                  f"p50 {result['p50_ms']:>8}ms  p95 {result['p95_ms']:>8}ms  p99 {result['p99_ms']:>8}ms",
+                  file=sys.stderr)
+
+        if hasattr(transport, 'close'):
+            transport.close()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+def command_compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    with open(args.candidate) as f:
+        candidate = json.load(f)['results']
+
+    regressions = []
+    rows = []
+    for key in sorted(set(baseline) & set(candidate)):
+        old, new = baseline[key], candidate[key]
+        p95_change = (new['p95_ms'] - old['p95_ms']) / old['p95_ms'] if old['p95_ms'] else 0.0
+        rps_change = ((new['throughput_rps'] - old['throughput_rps']) / old['throughput_rps']
+                      if old['throughput_rps'] else 0.0)
+        regressed = p95_change > args.threshold or rps_change < -args.threshold
+        rows.append({
+            'endpoint': key,
+            'p95_ms': [old['p95_ms'], new['p95_ms']],
+            'p95_change': round(p95_change, 4),
+            'throughput_rps': [old['throughput_rps'], new['throughput_rps']],
+            'throughput_change': round(rps_change, 4),
+            'regression': regressed,
+        })
+        if regressed:
+            regressions.append(key)
+
+    print(json.dumps({
+        'threshold': args.threshold,
+        'regressions': regressions,
+        'endpoints': rows,
+        'missing': sorted(set(baseline) ^ set(candidate)),
+    }, indent=2))
+    if regressions:
+        sys.exit(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='seed a scratch database and benchmark every route')
+    run.add_argument('--db', help='database path (default: fresh temporary file)')
+    run.add_argument('--reuse', action='store_true', help='benchmark an existing --db without seeding')
+    run.add_argument('--users', type=int, default=1000)
+    run.add_argument('--testimonials', type=int, default=10000)
+    run.add_argument('--messages', type=int, default=100000)
+    run.add_argument('--requests', type=int, default=200, help='requests per endpoint (SLOW_SCENARIOS use 1/10)')
+    run.add_argument('--concurrency', type=int, default=8)
+    run.add_argument('--mode', choices=['client', 'server', 'asgi', 'both', 'all'], default='client')
+    run.add_argument('--only', help='comma-separated scenario names')
+    run.add_argument('--output', help='write the JSON report here instead of stdout')
+    run.set_defaults(func=command_run)
+
+    compare = commands.add_parser('compare', help='flag regressions between two reports')
+    compare.add_argument('baseline')
+    compare.add_argument('candidate')
+    compare.add_argument('--threshold', type=float, default=0.10,
+                         help='relative p95 increase / throughput drop counted as a regression')
+    compare.set_defaults(func=command_compare)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""In-process response caches for the portfolio API"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class VersionedCache:
+    """Serialized response bodies keyed by a data-version counter
+
+    The version lives in the database (cache_versions, bumped by triggers),
+    so writes from any worker are seen. Readers call sync() with the
+    current version before get(); entries built for an older version are
+    dropped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    def sync(self, version):
+        """Drop every entry if the data version moved; returns version"""
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self._entries.clear()
+        return version
+
+    def get(self, key):
+        """Return (body, etag) for key, or None when it has to be rebuilt"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def set(self, key, version, body):
+        """Store body if the version it was built for is still current"""
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        with self._lock:
+            if version == self.version:
+                self._entries[key] = (body, etag)
+        return body, etag
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire after `ttl` seconds"""
+
+    def __init__(self, maxsize=1024, ttl=30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""Report the schema version of DB_PATH and any pending migrations"""
+import os
+import sqlite3
+import sys
+
+from migrations import LATEST_VERSION, pending_migrations, schema_version
+
+
+def main():
+    path = os.environ.get('DB_PATH', 'portfolio.db')
+    if not os.path.exists(path):
+        print(f"❌ {path} does not exist; run python init_db.py")
+        return 1
+
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        version = schema_version(conn)
+        pending = pending_migrations(conn)
+    finally:
+        conn.close()
+
+    print(f"Schema version {version} of {LATEST_VERSION} ({path})")
+    for migration in pending:
+        print(f"  pending: {migration.version} {migration.name}")
+    return 1 if pending else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
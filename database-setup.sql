@@ -1,46 +1,289 @@
--- Users table
-CREATE TABLE users (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    username TEXT UNIQUE NOT NULL,
-    email TEXT UNIQUE NOT NULL,
-    password TEXT NOT NULL,
-    role TEXT DEFAULT 'user',
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-);
+-- Portfolio database schema
+-- Generated from migrations.py by `python init_db.py --sql`; do not edit by hand.
+-- Users are not created here: run `python init_db.py` (or `flask seed-users`),
+-- which stores bcrypt hashes.
 
--- Testimonials table  
-CREATE TABLE testimonials (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
+PRAGMA auto_vacuum = INCREMENTAL;
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
     name TEXT NOT NULL,
-    email TEXT NOT NULL,
-    company TEXT,
-    position TEXT,
-    message TEXT NOT NULL,
-    rating INTEGER DEFAULT 5,
-    status TEXT DEFAULT 'pending',
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    status TEXT NOT NULL DEFAULT 'applied',
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- Contact messages table
-CREATE TABLE contact_messages (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL,
-    email TEXT NOT NULL,
-    subject TEXT,
-    message TEXT NOT NULL,
-    status TEXT DEFAULT 'unread',
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-);
+-- 1: base tables
+CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT DEFAULT 'user',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+CREATE TABLE IF NOT EXISTS testimonials (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            company TEXT,
+            position TEXT,
+            message TEXT NOT NULL,
+            rating INTEGER DEFAULT 5,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+CREATE TABLE IF NOT EXISTS contact_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            subject TEXT,
+            message TEXT NOT NULL,
+            status TEXT DEFAULT 'unread',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+INSERT OR REPLACE INTO schema_migrations (version, name) VALUES (1, 'base tables');
+
+-- 2: list indexes
+CREATE INDEX IF NOT EXISTS idx_users_created ON users (created_at);
+CREATE INDEX IF NOT EXISTS idx_testimonials_created ON testimonials (created_at);
+CREATE INDEX IF NOT EXISTS idx_testimonials_status_created ON testimonials (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_testimonials_email_created ON testimonials (email COLLATE NOCASE, created_at);
+CREATE INDEX IF NOT EXISTS idx_contact_messages_created ON contact_messages (created_at);
+CREATE INDEX IF NOT EXISTS idx_contact_messages_status_created ON contact_messages (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_contact_messages_email_created ON contact_messages (email COLLATE NOCASE, created_at);
+INSERT OR REPLACE INTO schema_migrations (version, name) VALUES (2, 'list indexes');
+
+-- 3: admin counters
+CREATE TABLE IF NOT EXISTS admin_counters (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_users INTEGER NOT NULL DEFAULT 0,
+            total_testimonials INTEGER NOT NULL DEFAULT 0,
+            pending_testimonials INTEGER NOT NULL DEFAULT 0,
+            total_messages INTEGER NOT NULL DEFAULT 0,
+            unread_messages INTEGER NOT NULL DEFAULT 0
+        );
+CREATE TRIGGER IF NOT EXISTS trg_counters_users_insert AFTER INSERT ON users BEGIN
+            UPDATE admin_counters SET total_users = total_users + 1 WHERE id = 1;
+        END;
+CREATE TRIGGER IF NOT EXISTS trg_counters_users_delete AFTER DELETE ON users BEGIN
+            UPDATE admin_counters SET total_users = total_users - 1 WHERE id = 1;
+        END;
+CREATE TRIGGER IF NOT EXISTS trg_counters_testimonials_insert AFTER INSERT ON testimonials BEGIN
+            UPDATE admin_counters SET
+                total_testimonials = total_testimonials + 1,
+                pending_testimonials = pending_testimonials + (NEW.status = 'pending')
+            WHERE id = 1;
+        END;
+CREATE TRIGGER IF NOT EXISTS trg_counters_testimonials_status AFTER UPDATE OF status ON testimonials BEGIN
+            UPDATE admin_counters SET
+                pending_testimonials = pending_testimonials + (NEW.status = 'pending') - (OLD.status = 'pending')
+            WHERE id = 1;
+        END;
+CREATE TRIGGER IF NOT EXISTS trg_counters_testimonials_delete AFTER DELETE ON testimonials BEGIN
+            UPDATE admin_counters SET
+                total_testimonials = total_testimonials - 1,
+                pending_testimonials = pending_testimonials - (OLD.status = 'pending')
+            WHERE id = 1;
+        END;
+CREATE TRIGGER IF NOT EXISTS trg_counters_messages_insert AFTER INSERT ON contact_messages BEGIN
+            UPDATE admin_counters SET
+                total_messages = total_messages + 1,
+                unread_messages = unread_messages + (NEW.status = 'unread')
+            WHERE id = 1;
+        END;
+CREATE TRIGGER IF NOT EXISTS trg_counters_messages_status AFTER UPDATE OF status ON contact_messages BEGIN
+            UPDATE admin_counters SET
+                unread_messages = unread_messages + (NEW.status = 'unread') - (OLD.status = 'unread')
+            WHERE id = 1;
+        END;
+CREATE TRIGGER IF NOT EXISTS trg_counters_messages_delete AFTER DELETE ON contact_messages BEGIN
+            UPDATE admin_counters SET
+                total_messages = total_messages - 1,
+                unread_messages = unread_messages - (OLD.status = 'unread')
+            WHERE id = 1;
+        END;
+INSERT OR REPLACE INTO admin_counters
+        (id, total_users, total_testimonials, pending_testimonials, total_messages, unread_messages)
+    SELECT 1,
+        (SELECT COUNT(*) FROM users),
+        (SELECT COUNT(*) FROM testimonials),
+        (SELECT COUNT(*) FROM testimonials WHERE status = 'pending'),
+        (SELECT COUNT(*) FROM contact_messages),
+        (SELECT COUNT(*) FROM contact_messages WHERE status = 'unread');
+INSERT OR REPLACE INTO schema_migrations (version, name) VALUES (3, 'admin counters');
+
+-- 4: change log
+CREATE TABLE IF NOT EXISTS change_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+INSERT OR REPLACE INTO schema_migrations (version, name) VALUES (4, 'change log');
+
+-- 5: full-text search (optional)
+CREATE VIRTUAL TABLE IF NOT EXISTS contact_messages_fts USING fts5(
+            name, email, subject, message,
+            content='contact_messages', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        );
+CREATE TRIGGER IF NOT EXISTS trg_contact_messages_fts_insert AFTER INSERT ON contact_messages BEGIN
+            INSERT INTO contact_messages_fts (rowid, name, email, subject, message) VALUES (NEW.id, NEW.name, NEW.email, NEW.subject, NEW.message);
+        END;
+CREATE TRIGGER IF NOT EXISTS trg_contact_messages_fts_delete AFTER DELETE ON contact_messages BEGIN
+            INSERT INTO contact_messages_fts (contact_messages_fts, rowid, name, email, subject, message) VALUES ('delete', OLD.id, OLD.name, OLD.email, OLD.subject, OLD.message);
+        END;
+CREATE TRIGGER IF NOT EXISTS trg_contact_messages_fts_update AFTER UPDATE OF name, email, subject, message ON contact_messages BEGIN
+            INSERT INTO contact_messages_fts (contact_messages_fts, rowid, name, email, subject, message) VALUES ('delete', OLD.id, OLD.name, OLD.email, OLD.subject, OLD.message);
+            INSERT INTO contact_messages_fts (rowid, name, email, subject, message) VALUES (NEW.id, NEW.name, NEW.email, NEW.subject, NEW.message);
+        END;
+INSERT INTO contact_messages_fts (contact_messages_fts) VALUES ('rebuild');
+CREATE VIRTUAL TABLE IF NOT EXISTS testimonials_fts USING fts5(
+            name, company, position, message,
+            content='testimonials', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        );
+CREATE TRIGGER IF NOT EXISTS trg_testimonials_fts_insert AFTER INSERT ON testimonials BEGIN
+            INSERT INTO testimonials_fts (rowid, name, company, position, message) VALUES (NEW.id, NEW.name, NEW.company, NEW.position, NEW.message);
+        END;
+CREATE TRIGGER IF NOT EXISTS trg_testimonials_fts_delete AFTER DELETE ON testimonials BEGIN
+            INSERT INTO testimonials_fts (testimonials_fts, rowid, name, company, position, message) VALUES ('delete', OLD.id, OLD.name, OLD.company, OLD.position, OLD.message);
+        END;
+CREATE TRIGGER IF NOT EXISTS trg_testimonials_fts_update AFTER UPDATE OF name, company, position, message ON testimonials BEGIN
+            INSERT INTO testimonials_fts (testimonials_fts, rowid, name, company, position, message) VALUES ('delete', OLD.id, OLD.name, OLD.company, OLD.position, OLD.message);
+            INSERT INTO testimonials_fts (rowid, name, company, position, message) VALUES (NEW.id, NEW.name, NEW.company, NEW.position, NEW.message);
+        END;
+INSERT INTO testimonials_fts (testimonials_fts) VALUES ('rebuild');
+INSERT OR REPLACE INTO schema_migrations (version, name) VALUES (5, 'full-text search');
+
+-- 6: submission keys
+CREATE TABLE IF NOT EXISTS submission_keys (
+            key TEXT PRIMARY KEY,
+            row_id INTEGER,
+            created_at REAL NOT NULL
+        ) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_submission_keys_created ON submission_keys (created_at);
+INSERT OR REPLACE INTO schema_migrations (version, name) VALUES (6, 'submission keys');
+
+-- 7: rate limits
+CREATE TABLE IF NOT EXISTS rate_limits (
+            key TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated REAL NOT NULL,
+            full_at REAL NOT NULL
+        ) WITHOUT ROWID;
+INSERT OR REPLACE INTO schema_migrations (version, name) VALUES (7, 'rate limits');
+
+-- 8: covering list indexes
+CREATE INDEX IF NOT EXISTS idx_testimonials_created_cover
+            ON testimonials (created_at, id, name, company, position, rating, status);
+CREATE INDEX IF NOT EXISTS idx_testimonials_status_created_cover
+            ON testimonials (status, created_at, id, name, company, position, rating);
+CREATE INDEX IF NOT EXISTS idx_contact_messages_created_cover
+            ON contact_messages (created_at, id, name, email, subject, status);
+CREATE INDEX IF NOT EXISTS idx_contact_messages_status_created_cover
+            ON contact_messages (status, created_at, id, name, email, subject);
+DROP INDEX IF EXISTS idx_testimonials_created;
+DROP INDEX IF EXISTS idx_testimonials_status_created;
+DROP INDEX IF EXISTS idx_contact_messages_created;
+DROP INDEX IF EXISTS idx_contact_messages_status_created;
+INSERT OR REPLACE INTO schema_migrations (version, name) VALUES (8, 'covering list indexes');
+
+-- 9: testimonial summary
+CREATE TABLE IF NOT EXISTS testimonial_summary (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            approved_count INTEGER NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            rating_1 INTEGER NOT NULL DEFAULT 0,
+            rating_2 INTEGER NOT NULL DEFAULT 0,
+            rating_3 INTEGER NOT NULL DEFAULT 0,
+            rating_4 INTEGER NOT NULL DEFAULT 0,
+            rating_5 INTEGER NOT NULL DEFAULT 0,
+            last_approved_at TIMESTAMP
+        );
+CREATE TRIGGER IF NOT EXISTS trg_summary_testimonials_insert
+            AFTER INSERT ON testimonials WHEN NEW.status = 'approved' BEGIN
+            UPDATE testimonial_summary SET
+                approved_count = approved_count + 1,
+                rating_sum = rating_sum + COALESCE(NEW.rating, 0),
+                rating_1 = rating_1 + (NEW.rating = 1),
+                rating_2 = rating_2 + (NEW.rating = 2),
+                rating_3 = rating_3 + (NEW.rating = 3),
+                rating_4 = rating_4 + (NEW.rating = 4),
+                rating_5 = rating_5 + (NEW.rating = 5),
+                last_approved_at = CURRENT_TIMESTAMP
+            WHERE id = 1;
+        END;
+CREATE TRIGGER IF NOT EXISTS trg_summary_testimonials_update
+            AFTER UPDATE OF status, rating ON testimonials
+            WHEN OLD.status = 'approved' OR NEW.status = 'approved' BEGIN
+            UPDATE testimonial_summary SET
+                approved_count = approved_count - 1,
+                rating_sum = rating_sum - COALESCE(OLD.rating, 0),
+                rating_1 = rating_1 - (OLD.rating = 1),
+                rating_2 = rating_2 - (OLD.rating = 2),
+                rating_3 = rating_3 - (OLD.rating = 3),
+                rating_4 = rating_4 - (OLD.rating = 4),
+                rating_5 = rating_5 - (OLD.rating = 5)
+            WHERE id = 1 AND OLD.status = 'approved';
+            UPDATE testimonial_summary SET
+                approved_count = approved_count + 1,
+                rating_sum = rating_sum + COALESCE(NEW.rating, 0),
+                rating_1 = rating_1 + (NEW.rating = 1),
+                rating_2 = rating_2 + (NEW.rating = 2),
+                rating_3 = rating_3 + (NEW.rating = 3),
+                rating_4 = rating_4 + (NEW.rating = 4),
+                rating_5 = rating_5 + (NEW.rating = 5),
+                last_approved_at = CASE WHEN OLD.status = 'approved' THEN last_approved_at ELSE CURRENT_TIMESTAMP END
+            WHERE id = 1 AND NEW.status = 'approved';
+        END;
+CREATE TRIGGER IF NOT EXISTS trg_summary_testimonials_delete
+            AFTER DELETE ON testimonials WHEN OLD.status = 'approved' BEGIN
+            UPDATE testimonial_summary SET
+                approved_count = approved_count - 1,
+                rating_sum = rating_sum - COALESCE(OLD.rating, 0),
+                rating_1 = rating_1 - (OLD.rating = 1),
+                rating_2 = rating_2 - (OLD.rating = 2),
+                rating_3 = rating_3 - (OLD.rating = 3),
+                rating_4 = rating_4 - (OLD.rating = 4),
+                rating_5 = rating_5 - (OLD.rating = 5)
+            WHERE id = 1;
+        END;
+INSERT OR REPLACE INTO testimonial_summary
+        (id, approved_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5, last_approved_at)
+    SELECT 1,
+        COUNT(*),
+        COALESCE(SUM(rating), 0),
+        COALESCE(SUM(rating = 1), 0),
+        COALESCE(SUM(rating = 2), 0),
+        COALESCE(SUM(rating = 3), 0),
+        COALESCE(SUM(rating = 4), 0),
+        COALESCE(SUM(rating = 5), 0),
+        COALESCE((SELECT last_approved_at FROM testimonial_summary WHERE id = 1), MAX(created_at))
+    FROM testimonials WHERE status = 'approved';
+INSERT OR REPLACE INTO schema_migrations (version, name) VALUES (9, 'testimonial summary');
 
--- Insert admin user (password: admin123)
-INSERT INTO users (username, email, password, role) VALUES 
-('admin', 'admin@rasulmamishov.com', 'admin123', 'admin');
+-- 10: cache versions
+CREATE TABLE IF NOT EXISTS cache_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+INSERT OR IGNORE INTO cache_versions (name) VALUES ('testimonials');
+CREATE TRIGGER IF NOT EXISTS trg_version_testimonials_insert
+            AFTER INSERT ON testimonials BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name = 'testimonials';
+        END;
+CREATE TRIGGER IF NOT EXISTS trg_version_testimonials_update
+            AFTER UPDATE ON testimonials BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name = 'testimonials';
+        END;
+CREATE TRIGGER IF NOT EXISTS trg_version_testimonials_delete
+            AFTER DELETE ON testimonials BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name = 'testimonials';
+        END;
+INSERT OR REPLACE INTO schema_migrations (version, name) VALUES (10, 'cache versions');
 
--- Insert test user (password: password123)  
-INSERT INTO users (username, email, password, role) VALUES 
-('testuser', 'test@example.com', 'password123', 'user');
+-- 11: submission key payloads
+ALTER TABLE submission_keys ADD COLUMN payload TEXT;
+INSERT OR REPLACE INTO schema_migrations (version, name) VALUES (11, 'submission key payloads');
 
--- Insert sample testimonials
-INSERT INTO testimonials (name, email, company, position, message, rating, status) VALUES 
-('John Smith', 'john@example.com', 'Tech Solutions Inc', 'CTO', 'Rasul delivered an exceptional web application that exceeded our expectations. His attention to detail and technical expertise are outstanding.', 5, 'approved'),
-('Sarah Johnson', 'sarah@example.com', 'Digital Marketing Co', 'Project Manager', 'Working with Rasul was a fantastic experience. The project was completed on time and the code quality is excellent.', 5, 'approved');
\ No newline at end of file
+PRAGMA user_version = 11;
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""Pooled SQLite connections for the portfolio API"""
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection became free in time"""
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to its pool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        self.checked_out = False
+        self.context_bound = False
+        self.query_observer = None
+        self.slow_query_observer = None
+        self.slow_query_threshold = 0.0
+
+    def execute(self, *args):
+        if self.query_observer is None and self.slow_query_observer is None:
+            return super().execute(*args)
+        started = time.perf_counter()
+        try:
+            return super().execute(*args)
+        finally:
+            self._observe(args[0], args[1] if len(args) > 1 else (), time.perf_counter() - started)
+
+    def executemany(self, *args):
+        if self.query_observer is None and self.slow_query_observer is None:
+            return super().executemany(*args)
+        started = time.perf_counter()
+        try:
+            return super().executemany(*args)
+        finally:
+            self._observe(args[0], None, time.perf_counter() - started)
+
+    def _observe(self, sql, params, seconds):
+        if self.query_observer is not None:
+            self.query_observer(sql, seconds)
+        if self.slow_query_observer is not None and seconds >= self.slow_query_threshold:
+            # params is None for executemany()
+            self.slow_query_observer(self, sql, params, seconds)
+
+    def close(self):
+        # Connections owned by a Flask app context are released on teardown
+        if self.context_bound:
+            return
+        if self.pool is None:
+            sqlite3.Connection.close(self)
+        else:
+            self.pool.release(self)
+
+
+class ConnectionPool:
+    """Bounded pool of pragma-tuned SQLite connections"""
+
+    def __init__(self, path, size=8, timeout=10.0, synchronous='NORMAL',
+                 cache_size=-16000, mmap_size=134217728, busy_timeout=5000,
+                 query_observer=None, slow_query_observer=None, slow_query_threshold=None):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.synchronous = synchronous
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self.busy_timeout = busy_timeout
+        # Called as query_observer(sql, seconds) after every execute()
+        self.query_observer = query_observer
+        # Called as slow_query_observer(conn, sql, params, seconds) when a
+        # statement takes at least slow_query_threshold seconds (None = off)
+        self.slow_query_observer = slow_query_observer
+        self.slow_query_threshold = slow_query_threshold
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._all = set()
+        self._opened = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    def connect(self):
+        """Open a new pragma-tuned connection that is not part of the pool"""
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout / 1000.0,
+            check_same_thread=False,
+            factory=PooledConnection,
+        )
+        conn.row_factory = sqlite3.Row
+        # Only takes effect on a brand-new file, and only before the switch
+        # to WAL writes its header; lets archiving give pages back
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute(f'PRAGMA synchronous = {self.synchronous}')
+        conn.execute(f'PRAGMA cache_size = {int(self.cache_size)}')
+        conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout)}')
+        conn.query_observer = self.query_observer
+        if self.slow_query_threshold is not None:
+            conn.slow_query_observer = self.slow_query_observer
+            conn.slow_query_threshold = self.slow_query_threshold
+        return conn
+
+    def _connect(self):
+        conn = self.connect()
+        conn.pool = self
+        return conn
+
+    def acquire(self):
+        """Check out a connection, waiting up to `timeout` seconds"""
+        waited_since = None
+        conn = None
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    self.hits += 1
+                    break
+                if self._opened < self.size:
+                    self._opened += 1
+                    self.misses += 1
+                    break
+                now = time.monotonic()
+                if waited_since is None:
+                    waited_since = now
+                    self.waits += 1
+                remaining = self.timeout - (now - waited_since)
+                if remaining <= 0:
+                    self.timeouts += 1
+                    self._record_wait(now - waited_since)
+                    raise PoolTimeout(f'No database connection available after {self.timeout}s')
+                self._cond.wait(remaining)
+            if waited_since is not None:
+                self._record_wait(time.monotonic() - waited_since)
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._opened -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._all.add(conn)
+
+        conn.checked_out = True
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding any open transaction"""
+        if not conn.checked_out:
+            return
+        conn.checked_out = False
+        conn.context_bound = False
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def _discard(self, conn):
+        with self._cond:
+            self._all.discard(conn)
+            self._opened -= 1
+            self._cond.notify()
+        try:
+            sqlite3.Connection.close(conn)
+        except sqlite3.Error:
+            pass
+
+    def _record_wait(self, seconds):
+        self.wait_time += seconds
+        if seconds > self.max_wait:
+            self.max_wait = seconds
+
+    def close_all(self):
+        """Close idle connections; checked-out ones close when released"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self.size,
+                'open': self._opened,
+                'idle': len(self._idle),
+                'in_use': self._opened - len(self._idle),
+                'hits': self.hits,
+                'misses': self.misses,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'wait_time_ms': round(self.wait_time * 1000, 3),
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+            }
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""Duplicate and idempotent-retry suppression for public submissions"""
+import hashlib
+import math
+import re
+import threading
+import time
+import unicodedata
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(value):
+    """Case-, width- and whitespace-insensitive form of a text field"""
+    value = unicodedata.normalize('NFKC', str(value or ''))
+    return _WHITESPACE.sub(' ', value).strip().casefold()
+
+
+def fingerprint(table, *fields, prefix='fp'):
+    """Stable key for a submission's normalized content"""
+    digest = hashlib.sha256('\x1f'.join([table] + [normalize(f) for f in fields]).encode('utf-8'))
+    return f'{prefix}:{table}:{digest.hexdigest()}'
+
+
+class KeyReused(Exception):
+    """Raised when an Idempotency-Key comes back with a different payload"""
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter; no false negatives, ~`error_rate` false positives"""
+
+    def __init__(self, capacity=100000, error_rate=0.01):
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.size = bits
+        self.hashes = max(1, round(bits / capacity * math.log(2)))
+        self._bits = bytearray((bits + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SubmissionKeys:
+    """Claims submission keys in the submission_keys table
+
+    Each key (content fingerprint or Idempotency-Key) maps to the row it
+    created and, for Idempotency-Keys, a fingerprint of the payload it was
+    first sent with. A claim older than its window is expired and can be taken
+    again. Two Bloom filter generations, rotated every `window` seconds,
+    remember the keys this process has seen. A brand-new key goes
+    straight to the claiming INSERT, and a likely repeat is answered by a
+    plain read, without taking the write lock.
+    """
+
+    def __init__(self, connect, window=86400.0, capacity=100000, error_rate=0.01, sweep_every=1000):
+        self.connect = connect
+        self.window = window
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sweep_every = sweep_every
+        self._lock = threading.Lock()
+        self._current = None
+        self._previous = None
+        self._rotate_at = 0.0
+        self._claims = 0
+        self.duplicates = 0
+        self.filter_hits = 0
+
+    def _warm(self, conn, now):
+        # Keys claimed before a restart (or by other workers) must test positive
+        self._current = BloomFilter(self.capacity, self.error_rate)
+        self._previous = BloomFilter(self.capacity, self.error_rate)
+        self._rotate_at = now + self.window
+        for row in conn.execute('SELECT key FROM submission_keys WHERE created_at >= ?', (now - self.window,)):
+            self._current.add(row[0])
+
+    def _seen(self, key, now):
+        with self._lock:
+            if now >= self._rotate_at:
+                self._previous, self._current = self._current, BloomFilter(self.capacity, self.error_rate)
+                self._rotate_at = now + self.window
+            seen = key in self._current or key in self._previous
+            self._current.add(key)
+            return seen
+
+    def lookup(self, key, payload=None):
+        """Row id a live claim points at, 0 while it is still being written,
+        or None when the key is free
+
+        Raises KeyReused if the claim was made with a different payload.
+        """
+        conn = self.connect()
+        row = conn.execute(
+            'SELECT row_id, payload FROM submission_keys WHERE key = ? AND created_at >= ?',
+            (key, time.time() - self.window)
+        ).fetchone()
+        conn.close()
+        if row is None:
+            return None
+        if payload is not None and row[1] is not None and row[1] != payload:
+            raise KeyReused('Idempotency-Key was already used for a different submission')
+        return row[0] or 0
+
+    def claim(self, key, payload=None):
+        """Claim key for a new submission
+
+        Returns None when the caller should insert, otherwise the original
+        row id (0 if the original is still being written). `payload`
+        fingerprints the request body; a live claim with a different one
+        raises KeyReused.
+        """
+        now = time.time()
+        conn = self.connect()
+        if self._current is None:
+            with self._lock:
+                if self._current is None:
+                    self._warm(conn, now)
+        
+        if self._seen(key, now):
+            self.filter_hits += 1
+            existing = self.lookup(key, payload)
+            if existing is not None:
+                self.duplicates += 1
+                return existing
+        
+        cursor = conn.execute('''
+            INSERT INTO submission_keys (key, row_id, created_at, payload) VALUES (?, NULL, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET row_id = NULL, created_at = excluded.created_at, payload = excluded.payload
+            WHERE submission_keys.created_at < ?
+        ''', (key, now, payload, now - self.window))
+        claimed = cursor.rowcount
+        self._claims += 1
+        if self._claims % self.sweep_every == 0:
+            conn.execute('DELETE FROM submission_keys WHERE created_at < ?', (now - self.window,))
+        conn.commit()
+        conn.close()
+        if claimed:
+            return None
+        # Lost a race with another request or worker
+        self.duplicates += 1
+        return self.lookup(key, payload) or 0
+
+    def complete(self, key, row_id):
+        """Point a claimed key at the row it created"""
+        conn = self.connect()
+        conn.execute('UPDATE submission_keys SET row_id = ? WHERE key = ?', (row_id, key))
+        conn.commit()
+        conn.close()
+
+    def release(self, key):
+        """Give up a claim whose insert failed so the client can retry"""
+        conn = self.connect()
+        conn.execute('DELETE FROM submission_keys WHERE key = ? AND row_id IS NULL', (key,))
+        conn.commit()
+        conn.close()
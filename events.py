@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""Change feed behind the admin Server-Sent Events stream"""
+import json
+import threading
+import time
+from collections import deque
+
+
+class ChangeFeed:
+    """Ordered change events with replay from a given event id
+
+    Without a store, events live in a bounded in-memory ring and are only
+    visible to this process. With a SQLiteChangeLog store every worker
+    appends to the same table, so subscribers see each other's events and
+    can resume after reconnecting to a different process.
+    """
+
+    def __init__(self, history=1000, store=None, poll_interval=1.0):
+        self.store = store
+        self.poll_interval = poll_interval
+        self._cond = threading.Condition()
+        self._ring = deque(maxlen=history)
+        # Millisecond-based start keeps ids increasing across restarts, so a
+        # client's Last-Event-ID from a previous run never looks "ahead"
+        self._next_id = int(time.time() * 1000)
+        self._listeners = set()
+        self.published = 0
+
+    def latest_id(self):
+        """Id of the newest event; new subscribers start from here"""
+        if self.store is not None:
+            return self.store.latest_id()
+        with self._cond:
+            return self._next_id - 1
+
+    def publish(self, event, data):
+        """Record an event and wake subscribers; returns its id"""
+        if self.store is not None:
+            event_id = self.store.append(event, data)
+        else:
+            event_id = None
+        with self._cond:
+            if event_id is None:
+                event_id = self._next_id
+            self._next_id = max(self._next_id, event_id + 1)
+            self._ring.append((event_id, event, data))
+            self.published += 1
+            self._cond.notify_all()
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener()
+        return event_id
+
+    def add_listener(self, callback):
+        """Call callback() from the publishing thread after every event
+
+        For subscribers that can't block in wait(), e.g. an event loop.
+        """
+        with self._cond:
+            self._listeners.add(callback)
+
+    def remove_listener(self, callback):
+        with self._cond:
+            self._listeners.discard(callback)
+
+    def since(self, last_id, limit=500):
+        """Events after last_id as (id, event, data), or None if some of
+        them are no longer retained and the client has to resync."""
+        if self.store is not None:
+            return self.store.since(last_id, limit)
+        with self._cond:
+            # Older than anything retained, e.g. a Last-Event-ID from before
+            # a restart (empty ring), or newer than anything published here,
+            # e.g. one issued by another worker; resync instead of never
+            # catching up or skipping events until our ids pass it
+            oldest = self._ring[0][0] if self._ring else self._next_id
+            if last_id < oldest - 1 or last_id > self._next_id - 1:
+                return None
+            return [entry for entry in self._ring if entry[0] > last_id][:limit]
+
+    def wait(self, last_id, timeout):
+        """Block until an event newer than last_id may exist or timeout"""
+        if self.store is not None:
+            # Other processes can't notify us; poll at least this often
+            timeout = min(timeout, self.poll_interval)
+        with self._cond:
+            if self._next_id - 1 > last_id and self.store is None:
+                return
+            self._cond.wait(timeout)
+
+
+class EventStream:
+    """One subscriber's position in a ChangeFeed, rendered as SSE chunks
+
+    poll() never blocks, so the same stream can be driven by a WSGI
+    generator (iterating, which blocks in feed.wait()) or by an event loop
+    that does its own waiting (see asgi.py).
+    """
+
+    def __init__(self, feed, last_id, topics=(), heartbeat=15.0):
+        self.feed = feed
+        self.last_id = last_id
+        self.topics = set(topics)
+        self.heartbeat = heartbeat
+        self._next_heartbeat = None
+
+    def poll(self):
+        """Chunks due now: new events, a resync and/or a keepalive"""
+        chunks = []
+        if self._next_heartbeat is None:
+            chunks.append('retry: 3000\n\n')
+            self._next_heartbeat = time.monotonic() + self.heartbeat
+        while True:
+            events = self.feed.since(self.last_id)
+            if events is None:
+                self.last_id = self.feed.latest_id()
+                chunks.append(format_sse(self.last_id, 'resync', {}))
+                continue
+            for event_id, event, data in events:
+                self.last_id = event_id
+                if not self.topics or event.split('.')[0] in self.topics:
+                    chunks.append(format_sse(event_id, event, data))
+            if not events:
+                break
+        if time.monotonic() >= self._next_heartbeat:
+            chunks.append(': keepalive\n\n')
+            self._next_heartbeat = time.monotonic() + self.heartbeat
+        return chunks
+
+    def timeout(self):
+        """Seconds until poll() has to run again even without a wakeup"""
+        timeout = max(self._next_heartbeat - time.monotonic(), 0) if self._next_heartbeat else 0
+        if self.feed.store is not None:
+            # Other processes can't notify us; poll at least this often
+            timeout = min(timeout, self.feed.poll_interval)
+        return timeout
+
+    def __iter__(self):
+        while True:
+            yield from self.poll()
+            self.feed.wait(self.last_id, self.timeout())
+
+
+class SQLiteChangeLog:
+    """change_log table shared by every worker using the same database"""
+
+    def __init__(self, acquire, max_rows=10000):
+        self.acquire = acquire
+        self.max_rows = max_rows
+        self._appends = 0
+
+    def append(self, event, data):
+        conn = self.acquire()
+        try:
+            event_id = conn.execute(
+                'INSERT INTO change_log (event, payload) VALUES (?, ?)',
+                (event, json.dumps(data))
+            ).lastrowid
+            self._appends += 1
+            if self._appends % 100 == 0:
+                conn.execute('DELETE FROM change_log WHERE id <= ?', (event_id - self.max_rows,))
+            conn.commit()
+            return event_id
+        finally:
+            conn.close()
+
+    def since(self, last_id, limit=500):
+        conn = self.acquire()
+        try:
+            bounds = conn.execute('SELECT MIN(id) AS oldest, MAX(id) AS newest FROM change_log').fetchone()
+            if bounds['oldest'] is not None and 0 < last_id < bounds['oldest'] - 1:
+                return None
+            if last_id > (bounds['newest'] or 0):
+                return None  # e.g. the log was reset
+            rows = conn.execute(
+                'SELECT id, event, payload FROM change_log WHERE id > ? ORDER BY id LIMIT ?',
+                (last_id, limit)
+            ).fetchall()
+            return [(row['id'], row['event'], json.loads(row['payload'])) for row in rows]
+        finally:
+            conn.close()
+
+    def latest_id(self):
+        conn = self.acquire()
+        try:
+            return conn.execute('SELECT COALESCE(MAX(id), 0) AS id FROM change_log').fetchone()['id']
+        finally:
+            conn.close()
+
+
+def format_sse(event_id, event, data):
+    return f'id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n'
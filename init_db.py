@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""Create or upgrade the portfolio database and seed the default users
+
+    python init_db.py          # migrate DB_PATH and create admin/testuser
+    python init_db.py --sql    # print the schema (database-setup.sql)
+"""
+import argparse
+
+from migrations import schema_sql
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sql', action='store_true', help='print the schema as SQL instead of touching the database')
+    args = parser.parse_args()
+
+    if args.sql:
+        print(schema_sql(), end='')
+        return
+
+    import app
+    app.init_database()
+    created = app.seed_default_users()
+    print(f"✅ Database ready at {app.DB_PATH}")
+    print(f"✅ Created users: {', '.join(created)}" if created else "✅ Default users already exist")
+
+
+if __name__ == '__main__':
+    main()
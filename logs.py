@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""Non-blocking JSON-lines logging for the portfolio API"""
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with timestamp, level, message and extras"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when full
+
+    Only cheap work happens on the calling thread: context capture,
+    sampling and message interpolation. Formatting and I/O happen on the
+    listener thread.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of records per level, e.g. {'DEBUG': 0.01, 'INFO': 0.2}"""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = {logging.getLevelName(level.upper()): rate for level, rate in rates.items()}
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class ContextFilter(logging.Filter):
+    """Attaches fields from `provider()` (request id, route, user) to records"""
+
+    def __init__(self, provider):
+        super().__init__()
+        self.provider = provider
+
+    def filter(self, record):
+        for key, value in self.provider().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+def parse_sample_rates(spec):
+    """'DEBUG=0.01,INFO=0.5' -> {'DEBUG': 0.01, 'INFO': 0.5}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        level, _, rate = item.partition('=')
+        rates[level.strip()] = float(rate)
+    return rates
+
+
+def setup_logging(logger, level='INFO', sink='stderr', sample_rates=None, context=None,
+                  max_bytes=10 * 1024 * 1024, backups=5, queue_size=10000):
+    """Route `logger` through a bounded queue to a background listener
+
+    sink is 'stderr' or a file path (rotated at max_bytes). Returns the
+    (handler, listener) pair; call listener.stop() to flush on shutdown.
+    """
+    if sink == 'stderr':
+        target = logging.StreamHandler(sys.stderr)
+    else:
+        target = logging.handlers.RotatingFileHandler(
+            sink, maxBytes=max_bytes, backupCount=backups, encoding='utf-8'
+        )
+    target.setFormatter(JsonFormatter())
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+    if context is not None:
+        handler.addFilter(ContextFilter(context))
+
+    listener = logging.handlers.QueueListener(handler.queue, target, respect_handler_level=False)
+    listener.start()
+
+    logger.setLevel(level)
+    logger.handlers[:] = [handler]
+    logger.propagate = False
+    return handler, listener
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""Ordered schema migrations for the portfolio database
+
+PRAGMA user_version records the last migration applied, and each one
+runs exactly once. The early table and index statements use IF NOT
+EXISTS so a database created before migrations existed (user_version 0)
+is brought up to date; ALTER TABLE ... ADD COLUMN cannot, and relies on
+user_version alone. Add new schema changes as a new Migration at the end
+of MIGRATIONS; never edit one that has shipped. database-setup.sql is generated from this list
+(`python init_db.py --sql`).
+"""
+import logging
+import sqlite3
+from collections import namedtuple
+
+log = logging.getLogger('portfolio')
+
+# optional migrations may fail (e.g. SQLite built without FTS5); they are
+# recorded as skipped instead of blocking startup
+Migration = namedtuple('Migration', 'version name statements optional', defaults=(False,))
+
+# Searchable columns per table; each gets a <table>_fts FTS5 index
+FTS_TABLES = {
+    'contact_messages': ['name', 'email', 'subject', 'message'],
+    'testimonials': ['name', 'company', 'position', 'message'],
+}
+
+# Recomputes the trigger-maintained admin_counters row from the base tables
+RECONCILE_COUNTERS_SQL = '''
+    INSERT OR REPLACE INTO admin_counters
+        (id, total_users, total_testimonials, pending_testimonials, total_messages, unread_messages)
+    SELECT 1,
+        (SELECT COUNT(*) FROM users),
+        (SELECT COUNT(*) FROM testimonials),
+        (SELECT COUNT(*) FROM testimonials WHERE status = 'pending'),
+        (SELECT COUNT(*) FROM contact_messages),
+        (SELECT COUNT(*) FROM contact_messages WHERE status = 'unread')
+'''
+
+
+# Recomputes the public testimonial_summary row from approved testimonials.
+# Triggers record the real approval time; a rebuild keeps it, falling back
+# to the newest approved testimonial's created_at.
+REBUILD_TESTIMONIAL_SUMMARY_SQL = '''
+    INSERT OR REPLACE INTO testimonial_summary
+        (id, approved_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5, last_approved_at)
+    SELECT 1,
+        COUNT(*),
+        COALESCE(SUM(rating), 0),
+        COALESCE(SUM(rating = 1), 0),
+        COALESCE(SUM(rating = 2), 0),
+        COALESCE(SUM(rating = 3), 0),
+        COALESCE(SUM(rating = 4), 0),
+        COALESCE(SUM(rating = 5), 0),
+        COALESCE((SELECT last_approved_at FROM testimonial_summary WHERE id = 1), MAX(created_at))
+    FROM testimonials WHERE status = 'approved'
+'''
+
+
+def _summary_delta(row, sign):
+    """SET clause adding (sign='+') or removing (sign='-') row's rating"""
+    buckets = ',\n                '.join(
+        f'rating_{rating} = rating_{rating} {sign} ({row}.rating = {rating})' for rating in range(1, 6)
+    )
+    return f'''approved_count = approved_count {sign} 1,
+                rating_sum = rating_sum {sign} COALESCE({row}.rating, 0),
+                {buckets}'''
+
+
+def fts_statements(table, columns):
+    """<table>_fts (external content), its sync triggers and a backfill"""
+    fts = f'{table}_fts'
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'NEW.{column}' for column in columns)
+    old_values = ', '.join(f'OLD.{column}' for column in columns)
+    return [
+        f'''CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {column_list},
+            content='{table}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {column_list}) VALUES (NEW.id, {new_values});
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', OLD.id, {old_values});
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_{fts}_update AFTER UPDATE OF {column_list} ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', OLD.id, {old_values});
+            INSERT INTO {fts} (rowid, {column_list}) VALUES (NEW.id, {new_values});
+        END''',
+        f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')",
+    ]
+
+
+MIGRATIONS = [
+    Migration(1, 'base tables', [
+        '''CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT DEFAULT 'user',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+        '''CREATE TABLE IF NOT EXISTS testimonials (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            company TEXT,
+            position TEXT,
+            message TEXT NOT NULL,
+            rating INTEGER DEFAULT 5,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+        '''CREATE TABLE IF NOT EXISTS contact_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            subject TEXT,
+            message TEXT NOT NULL,
+            status TEXT DEFAULT 'unread',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+    ]),
+
+    # Admin list filters and keyset pagination
+    Migration(2, 'list indexes', [
+        'CREATE INDEX IF NOT EXISTS idx_users_created ON users (created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_testimonials_created ON testimonials (created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_testimonials_status_created ON testimonials (status, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_testimonials_email_created ON testimonials (email COLLATE NOCASE, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_contact_messages_created ON contact_messages (created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_contact_messages_status_created ON contact_messages (status, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_contact_messages_email_created ON contact_messages (email COLLATE NOCASE, created_at)',
+    ]),
+
+    # Dashboard counters kept current by triggers, so admin_stats is a
+    # single primary-key read instead of five COUNT(*) scans
+    Migration(3, 'admin counters', [
+        '''CREATE TABLE IF NOT EXISTS admin_counters (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_users INTEGER NOT NULL DEFAULT 0,
+            total_testimonials INTEGER NOT NULL DEFAULT 0,
+            pending_testimonials INTEGER NOT NULL DEFAULT 0,
+            total_messages INTEGER NOT NULL DEFAULT 0,
+            unread_messages INTEGER NOT NULL DEFAULT 0
+        )''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_counters_users_insert AFTER INSERT ON users BEGIN
+            UPDATE admin_counters SET total_users = total_users + 1 WHERE id = 1;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_counters_users_delete AFTER DELETE ON users BEGIN
+            UPDATE admin_counters SET total_users = total_users - 1 WHERE id = 1;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_counters_testimonials_insert AFTER INSERT ON testimonials BEGIN
+            UPDATE admin_counters SET
+                total_testimonials = total_testimonials + 1,
+                pending_testimonials = pending_testimonials + (NEW.status = 'pending')
+            WHERE id = 1;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_counters_testimonials_status AFTER UPDATE OF status ON testimonials BEGIN
+            UPDATE admin_counters SET
+                pending_testimonials = pending_testimonials + (NEW.status = 'pending') - (OLD.status = 'pending')
+            WHERE id = 1;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_counters_testimonials_delete AFTER DELETE ON testimonials BEGIN
+            UPDATE admin_counters SET
+                total_testimonials = total_testimonials - 1,
+                pending_testimonials = pending_testimonials - (OLD.status = 'pending')
+            WHERE id = 1;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_counters_messages_insert AFTER INSERT ON contact_messages BEGIN
+            UPDATE admin_counters SET
+                total_messages = total_messages + 1,
+                unread_messages = unread_messages + (NEW.status = 'unread')
+            WHERE id = 1;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_counters_messages_status AFTER UPDATE OF status ON contact_messages BEGIN
+            UPDATE admin_counters SET
+                unread_messages = unread_messages + (NEW.status = 'unread') - (OLD.status = 'unread')
+            WHERE id = 1;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_counters_messages_delete AFTER DELETE ON contact_messages BEGIN
+            UPDATE admin_counters SET
+                total_messages = total_messages - 1,
+                unread_messages = unread_messages - (OLD.status = 'unread')
+            WHERE id = 1;
+        END''',
+        RECONCILE_COUNTERS_SQL,
+    ]),
+
+    # Change events for the admin live feed when CHANGE_FEED_STORE=sqlite
+    Migration(4, 'change log', [
+        '''CREATE TABLE IF NOT EXISTS change_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+    ]),
+
+    Migration(5, 'full-text search', [
+        statement
+        for table, columns in FTS_TABLES.items()
+        for statement in fts_statements(table, columns)
+    ], optional=True),
+
+    # Content fingerprints / Idempotency-Keys of recent public submissions
+    Migration(6, 'submission keys', [
+        '''CREATE TABLE IF NOT EXISTS submission_keys (
+            key TEXT PRIMARY KEY,
+            row_id INTEGER,
+            created_at REAL NOT NULL
+        ) WITHOUT ROWID''',
+        'CREATE INDEX IF NOT EXISTS idx_submission_keys_created ON submission_keys (created_at)',
+    ]),
+
+    # Token buckets when RATE_LIMIT_STORE=sqlite
+    Migration(7, 'rate limits', [
+        '''CREATE TABLE IF NOT EXISTS rate_limits (
+            key TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated REAL NOT NULL,
+            full_at REAL NOT NULL
+        ) WITHOUT ROWID''',
+    ]),
+
+    # List indexes that also carry the non-message columns, so ?fields=
+    # projections without message are index-only scans. They supersede
+    # the plain (status,) created_at indexes from migration 2.
+    Migration(8, 'covering list indexes', [
+        '''CREATE INDEX IF NOT EXISTS idx_testimonials_created_cover
+            ON testimonials (created_at, id, name, company, position, rating, status)''',
+        '''CREATE INDEX IF NOT EXISTS idx_testimonials_status_created_cover
+            ON testimonials (status, created_at, id, name, company, position, rating)''',
+        '''CREATE INDEX IF NOT EXISTS idx_contact_messages_created_cover
+            ON contact_messages (created_at, id, name, email, subject, status)''',
+        '''CREATE INDEX IF NOT EXISTS idx_contact_messages_status_created_cover
+            ON contact_messages (status, created_at, id, name, email, subject)''',
+        'DROP INDEX IF EXISTS idx_testimonials_created',
+        'DROP INDEX IF EXISTS idx_testimonials_status_created',
+        'DROP INDEX IF EXISTS idx_contact_messages_created',
+        'DROP INDEX IF EXISTS idx_contact_messages_status_created',
+    ]),
+
+    # Public rating aggregates, one primary-key read instead of scanning
+    # every approved testimonial
+    Migration(9, 'testimonial summary', [
+        '''CREATE TABLE IF NOT EXISTS testimonial_summary (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            approved_count INTEGER NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            rating_1 INTEGER NOT NULL DEFAULT 0,
+            rating_2 INTEGER NOT NULL DEFAULT 0,
+            rating_3 INTEGER NOT NULL DEFAULT 0,
+            rating_4 INTEGER NOT NULL DEFAULT 0,
+            rating_5 INTEGER NOT NULL DEFAULT 0,
+            last_approved_at TIMESTAMP
+        )''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_summary_testimonials_insert
+            AFTER INSERT ON testimonials WHEN NEW.status = 'approved' BEGIN
+            UPDATE testimonial_summary SET
+                {_summary_delta('NEW', '+')},
+                last_approved_at = CURRENT_TIMESTAMP
+            WHERE id = 1;
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_summary_testimonials_update
+            AFTER UPDATE OF status, rating ON testimonials
+            WHEN OLD.status = 'approved' OR NEW.status = 'approved' BEGIN
+            UPDATE testimonial_summary SET
+                {_summary_delta('OLD', '-')}
+            WHERE id = 1 AND OLD.status = 'approved';
+            UPDATE testimonial_summary SET
+                {_summary_delta('NEW', '+')},
+                last_approved_at = CASE WHEN OLD.status = 'approved' THEN last_approved_at ELSE CURRENT_TIMESTAMP END
+            WHERE id = 1 AND NEW.status = 'approved';
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_summary_testimonials_delete
+            AFTER DELETE ON testimonials WHEN OLD.status = 'approved' BEGIN
+            UPDATE testimonial_summary SET
+                {_summary_delta('OLD', '-')}
+            WHERE id = 1;
+        END''',
+        REBUILD_TESTIMONIAL_SUMMARY_SQL,
+    ]),
+
+    # Data versions shared by every worker; response caches compare them
+    # on each read instead of trusting a per-process counter
+    Migration(10, 'cache versions', [
+        '''CREATE TABLE IF NOT EXISTS cache_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )''',
+        "INSERT OR IGNORE INTO cache_versions (name) VALUES ('testimonials')",
+        *[f'''CREATE TRIGGER IF NOT EXISTS trg_version_testimonials_{op.lower()}
+            AFTER {op} ON testimonials BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name = 'testimonials';
+        END''' for op in ('INSERT', 'UPDATE', 'DELETE')],
+    ]),
+
+    # Fingerprint of the body an Idempotency-Key was first used with
+    Migration(11, 'submission key payloads', [
+        'ALTER TABLE submission_keys ADD COLUMN payload TEXT',
+    ]),
+]
+
+# Bumped by anything that changes what the public testimonial endpoints
+# return without touching the testimonials table itself
+BUMP_TESTIMONIALS_VERSION_SQL = "UPDATE cache_versions SET version = version + 1 WHERE name = 'testimonials'"
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+SCHEMA_MIGRATIONS_TABLE = '''CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'applied',
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)'''
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def pending_migrations(conn):
+    version = schema_version(conn)
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+
+def migrate(conn):
+    """Apply pending migrations in order; returns the versions applied
+
+    A current database costs one PRAGMA read. Each migration commits on
+    its own together with its user_version bump, under BEGIN IMMEDIATE,
+    so workers starting at the same time apply it exactly once.
+    """
+    if schema_version(conn) >= LATEST_VERSION:
+        return []
+
+    applied = []
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # explicit transactions below
+    try:
+        conn.execute(SCHEMA_MIGRATIONS_TABLE)
+        for migration in MIGRATIONS:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if schema_version(conn) >= migration.version:
+                    conn.execute('COMMIT')
+                    continue
+                status = 'applied'
+                conn.execute('SAVEPOINT migration')
+                try:
+                    for statement in migration.statements:
+                        conn.execute(statement)
+                except sqlite3.OperationalError as e:
+                    if not migration.optional:
+                        raise
+                    conn.execute('ROLLBACK TO migration')
+                    status = 'skipped'
+                    log.warning("Skipped optional migration %s (%s): %s", migration.version, migration.name, e)
+                conn.execute('RELEASE migration')
+                conn.execute(
+                    'INSERT OR REPLACE INTO schema_migrations (version, name, status) VALUES (?, ?, ?)',
+                    (migration.version, migration.name, status)
+                )
+                conn.execute(f'PRAGMA user_version = {migration.version:d}')
+                conn.execute('COMMIT')
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+            applied.append(migration.version)
+    finally:
+        conn.isolation_level = isolation_level
+    return applied
+
+
+def schema_sql():
+    """The full schema as a SQL script (the source of database-setup.sql)"""
+    lines = [
+        '-- Portfolio database schema',
+        '-- Generated from migrations.py by `python init_db.py --sql`; do not edit by hand.',
+        '-- Users are not created here: run `python init_db.py` (or `flask seed-users`),',
+        '-- which stores bcrypt hashes.',
+        '',
+        'PRAGMA auto_vacuum = INCREMENTAL;',
+        SCHEMA_MIGRATIONS_TABLE + ';',
+    ]
+    for migration in MIGRATIONS:
+        lines += ['', f'-- {migration.version}: {migration.name}' + (' (optional)' if migration.optional else '')]
+        lines += [statement.strip() + ';' for statement in migration.statements]
+        lines.append(f"INSERT OR REPLACE INTO schema_migrations (version, name) VALUES ({migration.version}, '{migration.name}');")
+    lines += ['', f'PRAGMA user_version = {LATEST_VERSION};', '']
+    return '\n'.join(lines)
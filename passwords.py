@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""Bounded bcrypt executor with admission control"""
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import bcrypt
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue is full or a result took too long"""
+
+
+def _hashpw(password):
+    return bcrypt.hashpw(password, bcrypt.gensalt()).decode('utf-8')
+
+
+def _checkpw(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+class PasswordHasher:
+    """Runs bcrypt on `workers` threads/processes with at most
+    `max_queue` further requests waiting; the rest are rejected."""
+
+    def __init__(self, workers=2, max_queue=32, kind='thread', timeout=10.0, observer=None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.kind = kind
+        self.timeout = timeout
+        # Called as observer(op, seconds) after each completed hash/verify
+        self.observer = observer
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._executor = None
+
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.queue_wait_time = 0.0
+        self.latency = {'hash': [0, 0.0, 0.0], 'verify': [0, 0.0, 0.0]}  # count, total, max
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == 'process':
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix='bcrypt'
+                        )
+        return self._executor
+
+    def _run(self, op, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy('Too many password operations in progress')
+
+        submitted = time.monotonic()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            future = self._get_executor().submit(_timed, fn, *args)
+        except Exception:
+            self._finished(None)
+            raise
+        # The slot is held until the work itself finishes, even if the
+        # caller gives up waiting, so the bound covers abandoned work too
+        future.add_done_callback(self._finished)
+
+        try:
+            result, started_at, elapsed = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+            raise HasherBusy('Password operation timed out')
+
+        with self._lock:
+            self.completed += 1
+            self.queue_wait_time += max(0.0, started_at - submitted)
+            stats = self.latency[op]
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+        if self.observer is not None:
+            self.observer(op, elapsed)
+        return result
+
+    def _finished(self, future):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def hash(self, password):
+        """bcrypt hash of a str password, as str"""
+        return self._run('hash', _hashpw, password.encode('utf-8'))
+
+    def verify(self, password, hashed):
+        return self._run('verify', _checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'executor': self.kind,
+                'in_flight': self.in_flight,
+                'queue_depth': max(0, self.in_flight - self.workers),
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'queue_wait_ms': round(self.queue_wait_time * 1000, 3),
+                'latency': {
+                    op: {
+                        'count': count,
+                        'avg_ms': round(total / count * 1000, 3) if count else 0.0,
+                        'max_ms': round(peak * 1000, 3),
+                    }
+                    for op, (count, total, peak) in self.latency.items()
+                },
+            }
+
+
+def _timed(fn, *args):
+    # time.monotonic() is system-wide on Linux/macOS/Windows, so the start
+    # timestamp is comparable across the process pool too
+    started_at = time.monotonic()
+    result = fn(*args)
+    return result, started_at, time.monotonic() - started_at
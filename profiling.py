@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""Request profiles and slow-query capture for the admin diagnostics endpoints"""
+import cProfile
+import heapq
+import io
+import itertools
+import marshal
+import pstats
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+class RequestProfiler:
+    """cProfile around single requests, keeping only the slowest `keep`
+
+    start() returns None when another profiler is already active on this
+    thread (Python 3.12+ allows only one), so callers can just skip.
+    """
+
+    def __init__(self, keep=20, top=40):
+        self.keep = keep
+        self.top = top
+        self._lock = threading.Lock()
+        self._heap = []  # (duration, id, entry) min-heap of the slowest
+        self._ids = itertools.count(1)
+        self.profiled = 0
+
+    def start(self):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return None
+        return profile, time.perf_counter()
+
+    def finish(self, handle, **info):
+        """Stop profiling and keep the result if it is among the slowest
+
+        Returns the profile id, or None if it was not kept.
+        """
+        profile, started = handle
+        profile.disable()
+        duration = time.perf_counter() - started
+        self.profiled += 1
+        with self._lock:
+            if len(self._heap) >= self.keep and duration <= self._heap[0][0]:
+                return None
+            profile_id = next(self._ids)
+
+        report = io.StringIO()
+        stats = pstats.Stats(profile, stream=report)
+        raw = marshal.dumps(stats.stats)  # same format as cProfile's -o output
+        stats.sort_stats('cumulative').print_stats(self.top)
+        entry = dict(info, id=profile_id, duration_ms=round(duration * 1000, 3),
+                     at=time.time(), report=report.getvalue(), stats=raw)
+        with self._lock:
+            if len(self._heap) < self.keep:
+                heapq.heappush(self._heap, (duration, profile_id, entry))
+            elif duration > self._heap[0][0]:
+                heapq.heapreplace(self._heap, (duration, profile_id, entry))
+            else:
+                return None
+        return profile_id
+
+    def summaries(self):
+        """Kept profiles, slowest first, without their report bodies"""
+        with self._lock:
+            entries = [entry for _, _, entry in sorted(self._heap, reverse=True)]
+        return [{key: value for key, value in entry.items() if key not in ('report', 'stats')}
+                for entry in entries]
+
+    def get(self, profile_id):
+        with self._lock:
+            for _, entry_id, entry in self._heap:
+                if entry_id == profile_id:
+                    return entry
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+
+
+class SlowQueryLog:
+    """Ring buffer of the most recent statements slower than a threshold"""
+
+    def __init__(self, keep=200):
+        self._entries = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def record(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+            self.recorded += 1
+
+    def entries(self):
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def explain(conn, sql, params):
+    """EXPLAIN QUERY PLAN lines for a DML statement, or [] for anything else"""
+    if params is None or sql.lstrip().split(None, 1)[0].upper() not in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE'):
+        return []
+    # Plain sqlite3 execute so the plan query isn't timed/observed itself
+    rows = sqlite3.Connection.execute(conn, f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+    return [row[3] for row in rows]
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""Token-bucket rate limiting for the public endpoints"""
+import threading
+import time
+from collections import OrderedDict
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_rate(spec):
+    """'5/minute' -> (5, 60); '' / 'off' -> None (no limit)"""
+    spec = (spec or '').strip().lower()
+    if spec in ('', 'off', 'none', '0'):
+        return None
+    count, _, period = spec.partition('/')
+    period = period.strip().rstrip('s') or 'second'
+    if period not in PERIODS:
+        raise ValueError(f'Unknown rate period in {spec!r}')
+    return int(count), PERIODS[period]
+
+
+def _take(state, capacity, period, now):
+    """Apply one request to a bucket state (tokens, updated)
+
+    Returns (new_state, wait, full_at): wait is 0 when the request is
+    allowed, otherwise the seconds until a token is available; full_at is
+    when the bucket will have refilled completely and can be forgotten.
+    """
+    rate = capacity / period
+    if state is None:
+        tokens = float(capacity)
+    else:
+        tokens = min(capacity, state[0] + (now - state[1]) * rate)
+    if tokens >= 1:
+        tokens -= 1
+        wait = 0.0
+    else:
+        wait = (1 - tokens) / rate
+    return (tokens, now), wait, now + (capacity - tokens) / rate
+
+
+class MemoryBucketStore:
+    """Per-process buckets in a bounded LRU map
+
+    A bucket that has refilled completely behaves exactly like a missing
+    one, so idle keys are swept every `sweep_interval` seconds at no cost
+    to accuracy. If the map still outgrows `max_keys`, the least recently
+    used keys are dropped, which can only make the limiter more lenient.
+    """
+
+    def __init__(self, max_keys=10000, sweep_interval=60.0):
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.evicted = 0
+
+    def take(self, key, capacity, period):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._buckets.pop(key, None)
+            state, wait, full_at = _take(entry and entry[0], capacity, period, now)
+            self._buckets[key] = (state, full_at)
+            if now >= self._next_sweep:
+                self._sweep(now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evicted += 1
+        return wait
+
+    def _sweep(self, now):
+        idle = [key for key, (_, full_at) in self._buckets.items() if full_at <= now]
+        for key in idle:
+            del self._buckets[key]
+        self._next_sweep = now + self.sweep_interval
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteBucketStore:
+    """Buckets in the shared rate_limits table, for multi-process deployments
+
+    Uses wall-clock time so every worker agrees on refill; idle rows are
+    deleted every `sweep_every` calls.
+    """
+
+    def __init__(self, acquire, sweep_every=1000):
+        self.acquire = acquire
+        self.sweep_every = sweep_every
+        self._calls = 0
+        self.evicted = 0
+
+    def take(self, key, capacity, period):
+        now = time.time()
+        conn = self.acquire()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT tokens, updated FROM rate_limits WHERE key = ?', (key,)
+            ).fetchone()
+            state, wait, full_at = _take(row and (row[0], row[1]), capacity, period, now)
+            conn.execute('''
+                INSERT INTO rate_limits (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    tokens = excluded.tokens, updated = excluded.updated, full_at = excluded.full_at
+            ''', (key, state[0], state[1], full_at))
+            self._calls += 1
+            if self._calls % self.sweep_every == 0:
+                self.evicted += conn.execute(
+                    'DELETE FROM rate_limits WHERE full_at <= ?', (now,)
+                ).rowcount
+            conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return wait
+
+
+class RateLimiter:
+    """Checks requests against named limits like {'login:ip': (20, 60)}"""
+
+    def __init__(self, store, limits):
+        self.store = store
+        self.limits = {name: rate for name, rate in limits.items() if rate}
+
+    def hit(self, name, key):
+        """Count a request against limit `name` for `key`
+
+        Returns 0 when allowed, otherwise the seconds to wait.
+        """
+        rate = self.limits.get(name)
+        if rate is None or not key:
+            return 0.0
+        capacity, period = rate
+        return self.store.take(f'{name}:{key}', capacity, period)
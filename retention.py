@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""Moving old moderated rows into an attached archive database"""
+import logging
+import threading
+import time
+from collections import namedtuple
+
+log = logging.getLogger('portfolio')
+
+# Rows of `table` with `status` older than `days` days get archived
+Rule = namedtuple('Rule', 'table status days')
+
+ARCHIVABLE_TABLES = ('contact_messages', 'testimonials')
+
+
+def parse_policy(spec):
+    """'contact_messages:read=180,testimonials:rejected=30' -> [Rule, ...]"""
+    rules = []
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        target, _, days = item.partition('=')
+        table, _, status = target.partition(':')
+        if table not in ARCHIVABLE_TABLES or not status or not days:
+            raise ValueError(f'Invalid retention rule {item!r}')
+        rules.append(Rule(table, status, int(days)))
+    return rules
+
+
+class Archiver:
+    """Applies a retention policy in short transactions
+
+    Each batch copies up to `batch_size` rows into archive.<table> and
+    deletes them from main in one BEGIN IMMEDIATE transaction, then sleeps
+    `pause` seconds so request writers are never locked out for long.
+    Under WAL the two files commit separately; a crash in between can
+    leave a row in both, which the next run resolves (INSERT OR REPLACE
+    keyed by id).
+    """
+
+    def __init__(self, connect, archive_path, rules, batch_size=500, pause=0.05,
+                 checkpoint='PASSIVE', vacuum_pages=2000):
+        self.connect = connect
+        self.archive_path = archive_path
+        self.rules = rules
+        self.batch_size = batch_size
+        self.pause = pause
+        self.checkpoint = checkpoint
+        self.vacuum_pages = vacuum_pages
+        self._stop = threading.Event()
+        self._thread = None
+        self.archived = 0
+        self.runs = 0
+
+    def _open(self):
+        conn = self.connect()
+        conn.isolation_level = None  # explicit BEGIN/COMMIT per batch
+        conn.execute('ATTACH DATABASE ? AS archive', (self.archive_path,))
+        for table in ARCHIVABLE_TABLES:
+            conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS archive.{table} AS
+                SELECT *, CURRENT_TIMESTAMP AS archived_at FROM main.{table} WHERE 0
+            ''')
+            conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS archive.idx_{table}_id ON {table} (id)')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS archive.idx_{table}_created ON {table} (created_at, id)')
+        return conn
+
+    def pending(self):
+        """Rows each rule would archive right now, as {'table:status': count}"""
+        conn = self.connect()
+        try:
+            return {
+                f'{rule.table}:{rule.status}': conn.execute(
+                    f"SELECT COUNT(*) FROM {rule.table} WHERE status = ? AND created_at < datetime('now', ?)",
+                    (rule.status, f'-{rule.days} days')
+                ).fetchone()[0]
+                for rule in self.rules
+            }
+        finally:
+            conn.close()
+
+    def run_once(self):
+        """Archive everything the policy selects; returns {'table:status': moved}"""
+        moved = {}
+        conn = self._open()
+        try:
+            for rule in self.rules:
+                moved[f'{rule.table}:{rule.status}'] = self._archive_rule(conn, rule)
+            if any(moved.values()):
+                self._compact(conn)
+        finally:
+            conn.execute('DETACH DATABASE archive')
+            conn.close()
+        self.runs += 1
+        return moved
+
+    def _archive_rule(self, conn, rule):
+        total = 0
+        cutoff = conn.execute("SELECT datetime('now', ?)", (f'-{rule.days} days',)).fetchone()[0]
+        while not self._stop.is_set():
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                ids = [row[0] for row in conn.execute(
+                    f'SELECT id FROM main.{rule.table} WHERE status = ? AND created_at < ? ORDER BY id LIMIT ?',
+                    (rule.status, cutoff, self.batch_size)
+                )]
+                if ids:
+                    placeholders = ','.join('?' * len(ids))
+                    conn.execute(f'''
+                        INSERT OR REPLACE INTO archive.{rule.table}
+                        SELECT *, CURRENT_TIMESTAMP FROM main.{rule.table} WHERE id IN ({placeholders})
+                    ''', ids)
+                    conn.execute(f'DELETE FROM main.{rule.table} WHERE id IN ({placeholders})', ids)
+                conn.execute('COMMIT')
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+            total += len(ids)
+            self.archived += len(ids)
+            if len(ids) < self.batch_size:
+                break
+            time.sleep(self.pause)
+        if total:
+            log.info("Archived %s %s rows with status %s", total, rule.table, rule.status)
+        return total
+
+    def _compact(self, conn):
+        # incremental_vacuum only frees pages when auto_vacuum=INCREMENTAL
+        # (new databases; see enable_incremental_vacuum for existing ones)
+        if conn.execute('PRAGMA main.auto_vacuum').fetchone()[0] == 2:
+            conn.execute(f'PRAGMA main.incremental_vacuum({self.vacuum_pages:d})').fetchall()
+        conn.execute(f'PRAGMA main.wal_checkpoint({self.checkpoint})').fetchall()
+
+    def start(self, interval):
+        """Run every `interval` seconds on a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, args=(interval,), name='archiver', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.run_once()
+            except Exception:
+                log.exception("Archiving run failed")
+
+
+def enable_incremental_vacuum(conn):
+    """Switch an existing database to auto_vacuum=INCREMENTAL (rewrites the file)"""
+    conn.isolation_level = None
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('VACUUM')
@@ -23,7 +23,11 @@ const AdminPanel = ({ isVisible, onClose, user }) => {
   const [testimonials, setTestimonials] = useState([])
   const [contactMessages, setContactMessages] = useState([])
   const [shopInquiries, setShopInquiries] = useState([])
+  // Keyset cursors for the next page of each list (null = no more rows)
+  const [testimonialsCursor, setTestimonialsCursor] = useState(null)
+  const [messagesCursor, setMessagesCursor] = useState(null)
   const [isLoading, setIsLoading] = useState(false)
+  const [isLoadingMore, setIsLoadingMore] = useState(false)
 
   useEffect(() => {
     if (isVisible && user?.role === 'admin') {
@@ -39,51 +43,77 @@ const AdminPanel = ({ isVisible, onClose, user }) => {
   const loadDashboardData = async () => {
     setIsLoading(true)
     try {
-      // Load stats
-      const statsRes = await fetch('http://localhost:5000/api/admin/stats', {
-        headers: getAuthHeaders()
-      })
-      if (statsRes.ok) {
-        const statsData = await statsRes.json()
-        setStats(statsData)
+      // Stats and the first page of every list in one snapshot
+      const dashboardRes = await fetch(
+        'http://localhost:5000/api/admin/dashboard?sections=stats,testimonials,messages,users',
+        { headers: getAuthHeaders() }
+      )
+      if (dashboardRes.ok) {
+        const dashboard = await dashboardRes.json()
+        setStats(dashboard.stats)
+        setTestimonials(dashboard.testimonials.items)
+        setTestimonialsCursor(dashboard.testimonials.next_cursor)
+        setContactMessages(dashboard.messages.items)
+        setMessagesCursor(dashboard.messages.next_cursor)
+        console.log('📧 Loaded contact messages:', dashboard.messages.items)
+        console.log('👥 Loaded users:', dashboard.users.items)
+      } else {
+        console.error('Failed to load admin dashboard:', dashboardRes.status)
       }
+    } catch (error) {
+      console.error('Error loading admin data:', error)
+    } finally {
+      setIsLoading(false)
+    }
+  }
 
-      // Load testimonials
-      const testimonialsRes = await fetch('http://localhost:5000/api/admin/testimonials', {
+  // Refresh the counters only, so pages loaded with "Load more" are kept
+  const loadStats = async () => {
+    try {
+      const response = await fetch('http://localhost:5000/api/admin/dashboard?sections=stats', {
         headers: getAuthHeaders()
       })
-      if (testimonialsRes.ok) {
-        const testimonialsData = await testimonialsRes.json()
-        setTestimonials(testimonialsData)
+      if (response.ok) {
+        setStats((await response.json()).stats)
       }
+    } catch (error) {
+      console.error('Error loading admin stats:', error)
+    }
+  }
 
-      // Load contact messages
-      const contactRes = await fetch('http://localhost:5000/api/admin/messages', {
-        headers: getAuthHeaders()
-      })
-      if (contactRes.ok) {
-        const contactData = await contactRes.json()
-        setContactMessages(contactData)
-        console.log('📧 Loaded contact messages:', contactData)
+  const loadMore = async (path, cursor, setItems, setCursor) => {
+    setIsLoadingMore(true)
+    try {
+      const response = await fetch(
+        `http://localhost:5000/api/admin/${path}?after=${encodeURIComponent(cursor)}`,
+        { headers: getAuthHeaders() }
+      )
+      if (response.ok) {
+        const items = await response.json()
+        setItems(prev => [...prev, ...items.filter(item => !prev.some(p => p.id === item.id))])
+        setCursor(response.headers.get('X-Next-Cursor'))
       } else {
-        console.error('Failed to load contact messages:', contactRes.status)
-      }
-
-      // Load users
-      const usersRes = await fetch('http://localhost:5000/api/admin/users', {
-        headers: getAuthHeaders()
-      })
-      if (usersRes.ok) {
-        const usersData = await usersRes.json()
-        console.log('👥 Loaded users:', usersData)
+        console.error(`Failed to load more ${path}:`, response.status)
       }
     } catch (error) {
-      console.error('Error loading admin data:', error)
+      console.error(`Error loading more ${path}:`, error)
     } finally {
-      setIsLoading(false)
+      setIsLoadingMore(false)
     }
   }
 
+  const renderLoadMore = (path, cursor, setItems, setCursor) => cursor && (
+    <div className="flex justify-center mt-6">
+      <Button
+        onClick={() => loadMore(path, cursor, setItems, setCursor)}
+        disabled={isLoadingMore}
+        className="bg-slate-600 hover:bg-slate-500"
+      >
+        {isLoadingMore ? 'Loading...' : 'Load more'}
+      </Button>
+    </div>
+  )
+
   const toggleTestimonialVerification = async (id, shouldApprove) => {
     try {
       const status = shouldApprove ? 'approved' : 'pending'
@@ -97,7 +127,7 @@ const AdminPanel = ({ isVisible, onClose, user }) => {
         setTestimonials(prev => 
           prev.map(t => t.id === id ? { ...t, status } : t)
         )
-        loadDashboardData() // Refresh stats
+        loadStats()
         console.log('✅ Testimonial updated:', id, 'Status:', status)
       } else {
         console.error('Failed to update testimonial')
@@ -118,7 +148,7 @@ const AdminPanel = ({ isVisible, onClose, user }) => {
 
       if (response.ok) {
         setTestimonials(prev => prev.filter(t => t.id !== id))
-        loadDashboardData() // Refresh stats
+        loadStats()
       }
     } catch (error) {
       console.error('Error deleting testimonial:', error)
@@ -137,7 +167,7 @@ const AdminPanel = ({ isVisible, onClose, user }) => {
         setContactMessages(prev =>
           prev.map(m => m.id === id ? { ...m, status, replied } : m)
         )
-        loadDashboardData() // Refresh stats
+        loadStats()
       }
     } catch (error) {
       console.error('Error updating contact message:', error)
@@ -367,6 +397,7 @@ const AdminPanel = ({ isVisible, onClose, user }) => {
                   </div>
                 ))}
               </div>
+              {renderLoadMore('testimonials', testimonialsCursor, setTestimonials, setTestimonialsCursor)}
             </div>
           )}
 
@@ -435,6 +466,7 @@ const AdminPanel = ({ isVisible, onClose, user }) => {
                   </div>
                 ))}
               </div>
+              {renderLoadMore('messages', messagesCursor, setContactMessages, setMessagesCursor)}
             </div>
           )}
 
@@ -15,7 +15,7 @@ const Testimonials = () => {
     const fetchTestimonials = async () => {
       try {
         setIsLoading(true)
-        const response = await fetch('http://localhost:5000/api/testimonials')
+        const response = await fetch('http://localhost:5000/api/testimonials?fields=name,company,position,message,rating,status')
         if (response.ok) {
           const data = await response.json()
           // Show only the first 6 testimonials for display
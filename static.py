@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Serving the built frontend (dist/) with precompressed variants"""
+import gzip
+import logging
+import mimetypes
+import os
+import re
+
+from flask import send_file
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # in requirements.txt; gzip only without it
+    brotli = None
+
+log = logging.getLogger('portfolio')
+
+# Text formats worth compressing; images and PDFs are already compressed
+COMPRESSIBLE = {'.html', '.js', '.mjs', '.css', '.json', '.map', '.svg', '.txt', '.xml', '.webmanifest'}
+MIN_COMPRESS_SIZE = 1024
+
+# Vite content-hashes bundle names, e.g. assets/index-aq4u1a49.js
+HASHED_NAME = re.compile(r'-[A-Za-z0-9_-]{8,}\.[a-z0-9]+$')
+
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _compress(source, target, encode):
+    """Write target from source unless it is already up to date"""
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+        return False
+    with open(source, 'rb') as f:
+        data = encode(f.read())
+    tmp = f'{target}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, target)
+    return True
+
+
+def precompress(root):
+    """Create .gz (and .br when brotli is installed) next to compressible files
+
+    Returns the number of files written.
+    """
+    encoders = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.append(('.br', lambda data: brotli.compress(data, quality=11)))
+    else:
+        log.warning("brotli is not installed; writing .gz files only (pip install -r requirements.txt)")
+
+    written = 0
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            if os.path.splitext(name)[1] not in COMPRESSIBLE or os.path.getsize(path) < MIN_COMPRESS_SIZE:
+                continue
+            for suffix, encode in encoders:
+                written += _compress(path, path + suffix, encode)
+    return written
+
+
+def cache_control(path):
+    if HASHED_NAME.search(path):
+        return 'public, max-age=31536000, immutable'
+    if path.endswith('.html'):
+        return 'no-cache'
+    return 'public, max-age=3600'
+
+
+def serve_file(root, path, request):
+    """Response for root/path, or None if it is not a file
+
+    Picks a precompressed variant from Accept-Encoding. send_file handles
+    conditional requests, Range and wsgi.file_wrapper (sendfile).
+    """
+    full_path = safe_join(root, path)
+    if full_path is None or not os.path.isfile(full_path):
+        return None
+
+    mimetype = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    encoding = None
+    served = full_path
+    for name, suffix in ENCODINGS:
+        if request.accept_encodings[name] and os.path.isfile(full_path + suffix):
+            encoding, served = name, full_path + suffix
+            break
+
+    response = send_file(served, mimetype=mimetype, conditional=True, etag=True, max_age=None)
+    if os.path.splitext(full_path)[1] in COMPRESSIBLE:
+        response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = cache_control(path)
+    return response
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""Fixtures that run the same requests through Flask's test client and asgi.py
+
+    python -m pytest tests
+"""
+import asyncio
+import itertools
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# app.py reads its configuration at import time
+SCRATCH = tempfile.mkdtemp(prefix='portfolio-tests-')
+STATIC_ROOT = os.path.join(SCRATCH, 'dist')
+os.makedirs(os.path.join(STATIC_ROOT, 'assets'))
+with open(os.path.join(STATIC_ROOT, 'index.html'), 'w') as f:
+    f.write('<!doctype html><div id="root"></div>')
+with open(os.path.join(STATIC_ROOT, 'assets', 'index-aq4u1a49.js'), 'w') as f:
+    f.write('console.log("portfolio");\n' * 100)
+os.environ.update({
+    'DB_PATH': os.path.join(SCRATCH, 'test.db'),
+    'STATIC_ROOT': STATIC_ROOT,
+    'LOG_LEVEL': 'WARNING',
+    'RATE_LIMIT_REGISTER_IP': '3/hour',
+    'CHANGE_FEED_HEARTBEAT': '0.2',
+    'ASGI_MAX_BODY': '65536',
+})
+sys.path.insert(0, ROOT)
+
+_addresses = itertools.count(1)
+
+
+class Response:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = {name.lower(): value for name, value in headers}
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class ClientTransport:
+    """Requests through app.test_client()"""
+
+    def __init__(self, portfolio, address):
+        self.client = portfolio.app.test_client()
+        self.environ = {'REMOTE_ADDR': address}
+
+    def request(self, method, path, json_body=None, headers=None, data=None):
+        response = self.client.open(path, method=method, json=json_body, data=data,
+                                    headers=headers or {}, environ_base=self.environ)
+        return Response(response.status_code, response.headers.items(), response.get_data())
+
+    def stream(self, path, headers=None):
+        response = self.client.get(path, headers=headers or {}, environ_base=self.environ, buffered=False)
+        return ClientStream(response)
+
+
+class ClientStream:
+    def __init__(self, response):
+        self.response = response
+        self.status = response.status_code
+        self.chunks = iter(response.response)
+
+    def next_chunk(self):
+        chunk = next(self.chunks)
+        return chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+
+    def close(self):
+        self.response.close()
+
+
+class ASGITransport:
+    """Requests through asgi.application on an event loop thread"""
+
+    loop = None
+
+    def __init__(self, portfolio, address):
+        import asgi
+        self.application = asgi.application
+        self.address = address
+        if ASGITransport.loop is None:
+            ASGITransport.loop = asyncio.new_event_loop()
+            threading.Thread(target=ASGITransport.loop.run_forever, daemon=True).start()
+
+    def _scope(self, method, path, headers):
+        path, _, query = path.partition('?')
+        return {
+            'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http',
+            'path': path, 'root_path': '', 'query_string': query.encode('latin-1'),
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()],
+            'server': ('localhost', 80), 'client': (self.address, 40000),
+        }
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout=30)
+
+    def request(self, method, path, json_body=None, headers=None, data=None):
+        headers = dict(headers or {})
+        if json_body is not None:
+            data = json.dumps(json_body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        scope = self._scope(method, path, headers)
+        messages = []
+
+        async def call():
+            pending = [{'type': 'http.request', 'body': data or b'', 'more_body': False}]
+
+            async def receive():
+                if pending:
+                    return pending.pop()
+                await asyncio.Event().wait()
+
+            async def send(message):
+                messages.append(message)
+
+            await self.application(scope, receive, send)
+
+        self._run(call())
+        start = messages[0]
+        headers = [(name.decode('latin-1'), value.decode('latin-1')) for name, value in start['headers']]
+        return Response(start['status'], headers, b''.join(m.get('body', b'') for m in messages[1:]))
+
+    def stream(self, path, headers=None):
+        return ASGIStream(self, self._scope('GET', path, dict(headers or {})))
+
+
+class ASGIStream:
+    def __init__(self, transport, scope):
+        self.loop = transport.loop
+        self.received = queue.Queue()
+        self.inbox = None
+        ready = threading.Event()
+
+        async def call():
+            self.inbox = asyncio.Queue()
+            await self.inbox.put({'type': 'http.request', 'body': b'', 'more_body': False})
+            ready.set()
+
+            async def send(message):
+                self.received.put(message)
+
+            await transport.application(scope, self.inbox.get, send)
+
+        self.task = asyncio.run_coroutine_threadsafe(call(), self.loop)
+        ready.wait(5)
+        self.status = self.received.get(timeout=5)['status']
+
+    def next_chunk(self):
+        return self.received.get(timeout=5)['body'].decode('utf-8')
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.inbox.put_nowait, {'type': 'http.disconnect'})
+        self.task.result(timeout=5)
+
+
+@pytest.fixture(scope='session')
+def portfolio():
+    import app as portfolio
+    portfolio.init_database()
+    portfolio.seed_default_users()
+    return portfolio
+
+
+@pytest.fixture(params=['client', 'asgi'])
+def api(request, portfolio):
+    """One transport per serving mode, each test from its own client address"""
+    transport = ClientTransport if request.param == 'client' else ASGITransport
+    n = next(_addresses)
+    return transport(portfolio, f'10.0.{n // 250}.{n % 250 + 1}')
+
+
+@pytest.fixture(scope='session')
+def admin_headers(portfolio):
+    client = portfolio.app.test_client()
+    response = client.post('/api/auth/login', json={'email': 'admin', 'password': 'admin123'})
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+@pytest.fixture
+def write_behind(portfolio, monkeypatch):
+    """Turn WRITE_BEHIND on with a fresh queue; returns the app config to tweak first"""
+    for name in [name for name in portfolio.app.config if name.startswith('WRITE_BEHIND_')]:
+        monkeypatch.setitem(portfolio.app.config, name, portfolio.app.config[name])  # restored afterwards
+    monkeypatch.setitem(portfolio.app.config, 'WRITE_BEHIND', True)
+    monkeypatch.setattr(portfolio, '_write_queue', None)
+    yield portfolio.app.config
+    if portfolio._write_queue is not None:
+        portfolio._write_queue.close()
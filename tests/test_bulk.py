@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Bulk moderation"""
+import uuid
+
+
+def submit_messages(api, count):
+    email = f'{uuid.uuid4().hex}@example.com'
+    for _ in range(count):
+        assert api.request('POST', '/api/contact', {'name': 'B', 'email': email, 'message': uuid.uuid4().hex}).status == 200
+    return email
+
+
+def test_bulk_by_ids(api, admin_headers):
+    email = submit_messages(api, 2)
+    ids = [row['id'] for row in api.request('GET', f'/api/admin/messages?email={email}', headers=admin_headers).json()]
+    response = api.request('POST', '/api/admin/messages/bulk',
+                           {'action': 'update', 'status': 'read', 'ids': ids + [10 ** 9]}, admin_headers)
+    assert response.status == 200
+    body = response.json()
+    assert body['affected'] == 2 and body['truncated'] is False
+    assert {'id': 10 ** 9, 'result': 'not_found'} in body['results']
+
+
+def test_filter_over_the_cap_is_truncated(api, portfolio, admin_headers, monkeypatch):
+    monkeypatch.setattr(portfolio, 'BULK_MAX_ITEMS', 2)
+    email = submit_messages(api, 3)
+    request = {'action': 'update', 'status': 'archived', 'filter': {'email': email}}
+
+    first = api.request('POST', '/api/admin/messages/bulk', request, admin_headers).json()
+    assert (first['affected'], first['truncated'], first['remaining']) == (2, True, 1)
+
+    # Sending it again picks up the rows the first request left
+    second = api.request('POST', '/api/admin/messages/bulk', request, admin_headers).json()
+    assert (second['affected'], second['truncated'], second['remaining']) == (1, False, 0)
+    assert not {row['id'] for row in first['results']} & {row['id'] for row in second['results']}
+
+    statuses = {row['status'] for row in api.request('GET', f'/api/admin/messages?email={email}', headers=admin_headers).json()}
+    assert statuses == {'archived'}
+
+    delete = {'action': 'delete', 'filter': {'email': email}}
+    first = api.request('POST', '/api/admin/messages/bulk', delete, admin_headers).json()
+    assert (first['affected'], first['truncated'], first['remaining']) == (2, True, 1)
+    second = api.request('POST', '/api/admin/messages/bulk', delete, admin_headers).json()
+    assert (second['affected'], second['truncated']) == (1, False)
+    assert api.request('GET', f'/api/admin/messages?email={email}', headers=admin_headers).json() == []
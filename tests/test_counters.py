@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Trigger-maintained admin_counters behind /api/admin/stats"""
+import uuid
+
+
+def actual_stats(portfolio):
+    conn = portfolio.get_db_connection()
+    row = conn.execute('''
+        SELECT (SELECT COUNT(*) FROM users),
+               (SELECT COUNT(*) FROM testimonials),
+               (SELECT COUNT(*) FROM testimonials WHERE status = 'pending'),
+               (SELECT COUNT(*) FROM contact_messages),
+               (SELECT COUNT(*) FROM contact_messages WHERE status = 'unread')
+    ''').fetchone()
+    conn.close()
+    return dict(zip(['totalUsers', 'totalTestimonials', 'pendingTestimonials', 'totalMessages', 'unreadMessages'], row))
+
+
+def stats(api, admin_headers):
+    response = api.request('GET', '/api/admin/stats', headers=admin_headers)
+    assert response.status == 200
+    return response.json()
+
+
+def test_counters_follow_writes(api, portfolio, admin_headers):
+    before = stats(api, admin_headers)
+    assert before == actual_stats(portfolio)
+
+    email = f'{uuid.uuid4().hex}@example.com'
+    message = api.request('POST', '/api/contact', {'name': 'S', 'email': email, 'message': uuid.uuid4().hex})
+    testimonial = api.request('POST', '/api/testimonials', {'name': 'S', 'email': email, 'message': uuid.uuid4().hex, 'rating': 5})
+    after_insert = stats(api, admin_headers)
+    assert after_insert['totalMessages'] == before['totalMessages'] + 1
+    assert after_insert['unreadMessages'] == before['unreadMessages'] + 1
+    assert after_insert['totalTestimonials'] == before['totalTestimonials'] + 1
+    assert after_insert['pendingTestimonials'] == before['pendingTestimonials'] + 1
+
+    api.request('PUT', f"/api/admin/messages/{message.json()['id']}", {'status': 'read'}, admin_headers)
+    api.request('PUT', f"/api/admin/testimonials/{testimonial.json()['id']}", {'status': 'approved'}, admin_headers)
+    after_update = stats(api, admin_headers)
+    assert after_update['unreadMessages'] == before['unreadMessages']
+    assert after_update['pendingTestimonials'] == before['pendingTestimonials']
+    assert after_update['totalTestimonials'] == before['totalTestimonials'] + 1
+
+    api.request('DELETE', f"/api/admin/testimonials/{testimonial.json()['id']}", headers=admin_headers)
+    after_delete = stats(api, admin_headers)
+    assert after_delete['totalTestimonials'] == before['totalTestimonials']
+    assert after_delete == actual_stats(portfolio)
+
+
+def test_reconcile_corrects_drift(portfolio):
+    conn = portfolio.get_db_connection()
+    conn.execute('UPDATE admin_counters SET total_messages = total_messages + 7, unread_messages = -1 WHERE id = 1')
+    conn.commit()
+    drift = portfolio.reconcile_counters(conn)
+    conn.close()
+
+    assert drift['total_messages'] == -7
+    assert 'unread_messages' in drift
+    assert 'total_users' not in drift
+
+    conn = portfolio.get_db_connection()
+    assert portfolio.read_stats(conn) == actual_stats(portfolio)
+    assert portfolio.reconcile_counters(conn) == {}
+    conn.close()
+
+
+def test_missing_counters_row_is_rebuilt(api, portfolio, admin_headers):
+    conn = portfolio.get_db_connection()
+    conn.execute('DELETE FROM admin_counters')
+    conn.commit()
+    conn.close()
+    assert stats(api, admin_headers) == actual_stats(portfolio)
+
+
+def test_reconcile_command(portfolio):
+    conn = portfolio.get_db_connection()
+    conn.execute('UPDATE admin_counters SET total_users = total_users + 3 WHERE id = 1')
+    conn.commit()
+    conn.close()
+
+    result = portfolio.app.test_cli_runner().invoke(args=['reconcile-counters'])
+    assert result.exit_code == 0
+    assert "'total_users': -3" in result.output
+    assert 'already consistent' in portfolio.app.test_cli_runner().invoke(args=['reconcile-counters']).output
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""The built frontend and the catch-all route around it"""
+import logging
+
+import pytest
+
+import static
+
+
+def test_index_and_spa_routes(api):
+    assert api.request('GET', '/').status == 200
+    spa = api.request('GET', '/admin/testimonials')
+    assert spa.status == 200
+    assert b'id="root"' in spa.body
+    assert spa.headers['cache-control'] == 'no-cache'
+
+
+def test_head_on_spa_route(api):
+    response = api.request('HEAD', '/admin')
+    assert response.status == 200
+    assert response.body == b''
+
+
+def test_hashed_asset_is_immutable(api):
+    response = api.request('GET', '/assets/index-aq4u1a49.js', headers={'Accept-Encoding': 'gzip'})
+    assert response.status == 200
+    assert 'immutable' in response.headers['cache-control']
+    assert response.headers['content-encoding'] == 'gzip'
+
+
+def test_missing_asset_is_404(api):
+    response = api.request('GET', '/assets/missing-12345678.js')
+    assert response.status == 404
+    assert response.json() == {'error': 'Endpoint not found'}
+
+
+@pytest.mark.parametrize('method, path', [
+    ('GET', '/api/nope'),
+    ('POST', '/api/nope'),
+    ('DELETE', '/api/nope'),
+    ('PUT', '/api/admin/testimonials/abc'),
+    ('POST', '/admin'),
+    ('PATCH', '/'),
+])
+def test_unknown_routes_are_json_404(api, method, path):
+    response = api.request(method, path, {})
+    assert response.status == 404
+    assert response.json() == {'error': 'Endpoint not found'}
+
+
+def test_precompress_without_brotli_warns(tmp_path, monkeypatch):
+    (tmp_path / 'app.js').write_text('console.log(1);\n' * 200)
+    monkeypatch.setattr(static, 'brotli', None)
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger('portfolio')
+    logger.addHandler(handler)
+    try:
+        assert static.precompress(str(tmp_path)) == 1
+    finally:
+        logger.removeHandler(handler)
+    assert (tmp_path / 'app.js.gz').exists() and not (tmp_path / 'app.js.br').exists()
+    assert any('brotli is not installed' in record.getMessage() for record in records)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""Schema migrations from a pre-migration (user_version 0) database"""
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from conftest import ROOT
+from migrations import LATEST_VERSION, MIGRATIONS, migrate, pending_migrations, schema_sql, schema_version
+
+# The schema database-setup.sql created before migrations existed
+BASELINE_SCHEMA = '''
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    password TEXT NOT NULL,
+    role TEXT DEFAULT 'user',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE testimonials (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    company TEXT,
+    position TEXT,
+    message TEXT NOT NULL,
+    rating INTEGER DEFAULT 5,
+    status TEXT DEFAULT 'pending',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE contact_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    subject TEXT,
+    message TEXT NOT NULL,
+    status TEXT DEFAULT 'unread',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO users (username, email, password, role) VALUES
+    ('admin', 'admin@example.com', 'x', 'admin'), ('testuser', 'test@example.com', 'x', 'user');
+INSERT INTO testimonials (name, email, message, rating, status) VALUES
+    ('A', 'a@example.com', 'Exceptional web application', 5, 'approved'),
+    ('B', 'b@example.com', 'Delivered on time', 3, 'approved'),
+    ('C', 'c@example.com', 'Waiting for review', 4, 'pending');
+INSERT INTO contact_messages (name, email, subject, message, status) VALUES
+    ('D', 'd@example.com', 'Hi', 'Quick question about pricing', 'unread'),
+    ('E', 'e@example.com', 'Hi', 'Thanks again', 'read');
+'''
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'baseline.db'))
+    conn.row_factory = sqlite3.Row
+    conn.executescript(BASELINE_SCHEMA)
+    yield conn
+    conn.close()
+
+
+def test_baseline_upgrades_to_latest(baseline):
+    assert schema_version(baseline) == 0
+    assert migrate(baseline) == [migration.version for migration in MIGRATIONS]
+    assert schema_version(baseline) == LATEST_VERSION == 11
+    assert pending_migrations(baseline) == []
+
+    recorded = baseline.execute('SELECT version, status FROM schema_migrations ORDER BY version').fetchall()
+    assert [tuple(row) for row in recorded] == [(m.version, 'applied') for m in MIGRATIONS]
+
+    # A current database is left alone
+    assert migrate(baseline) == []
+
+
+def test_existing_rows_are_carried_into_derived_tables(baseline):
+    migrate(baseline)
+
+    counters = baseline.execute('SELECT * FROM admin_counters WHERE id = 1').fetchone()
+    assert (counters['total_users'], counters['total_testimonials'], counters['pending_testimonials'],
+            counters['total_messages'], counters['unread_messages']) == (2, 3, 1, 2, 1)
+
+    summary = baseline.execute('SELECT * FROM testimonial_summary WHERE id = 1').fetchone()
+    assert (summary['approved_count'], summary['rating_sum'], summary['rating_5'], summary['rating_3']) == (2, 8, 1, 1)
+
+    hits = baseline.execute(
+        "SELECT rowid FROM contact_messages_fts WHERE contact_messages_fts MATCH 'pricing'").fetchall()
+    assert [row[0] for row in hits] == [1]
+
+    columns = {row['name'] for row in baseline.execute('PRAGMA table_info(submission_keys)')}
+    assert columns == {'key', 'row_id', 'created_at', 'payload'}
+    assert baseline.execute("SELECT version FROM cache_versions WHERE name = 'testimonials'").fetchone()[0] == 0
+
+
+def test_upgraded_triggers_maintain_derived_tables(baseline):
+    migrate(baseline)
+    baseline.execute("INSERT INTO testimonials (name, email, message, rating, status) VALUES ('F', 'f@example.com', 'm', 4, 'approved')")
+    baseline.execute("UPDATE contact_messages SET status = 'read' WHERE id = 1")
+    baseline.commit()
+
+    counters = baseline.execute('SELECT total_testimonials, unread_messages FROM admin_counters').fetchone()
+    assert tuple(counters) == (4, 0)
+    summary = baseline.execute('SELECT approved_count, rating_4 FROM testimonial_summary').fetchone()
+    assert tuple(summary) == (3, 1)
+    assert baseline.execute('SELECT version FROM cache_versions').fetchone()[0] == 1
+
+
+def test_partial_upgrade_resumes(baseline):
+    for migration in MIGRATIONS[:6]:
+        for statement in migration.statements:
+            baseline.execute(statement)
+    baseline.execute('PRAGMA user_version = 6')
+    baseline.commit()
+
+    assert migrate(baseline) == [7, 8, 9, 10, 11]
+    assert schema_version(baseline) == LATEST_VERSION
+
+
+def test_checked_in_database_upgrades(tmp_path):
+    path = str(tmp_path / 'portfolio.db')
+    shutil.copy(os.path.join(ROOT, 'portfolio.db'), path)
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    assert schema_version(conn) == LATEST_VERSION
+    assert conn.execute('SELECT total_users FROM admin_counters').fetchone()[0] == \
+        conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+    conn.close()
+
+
+def test_schema_sql_builds_the_same_database(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'script.db'))
+    conn.executescript(schema_sql())
+    assert schema_version(conn) == LATEST_VERSION
+    assert migrate(conn) == []
+    with open(os.path.join(ROOT, 'database-setup.sql')) as f:
+        assert f.read() == schema_sql()
+    conn.close()
+
+
+def test_seeding_only_creates_missing_users(portfolio):
+    assert portfolio.seed_default_users() == []
+    portfolio.init_database()  # already current: nothing to apply, nobody seeded
+    conn = portfolio.get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM users WHERE username IN ('admin', 'testuser')").fetchone()[0] == 2
+    conn.close()
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Token-bucket rate limiting"""
+import uuid
+
+import pytest
+
+from db import ConnectionPool
+
+
+@pytest.fixture
+def sqlite_limiter(portfolio, monkeypatch):
+    """RATE_LIMIT_STORE=sqlite on a one-connection pool"""
+    pool = ConnectionPool(portfolio.DB_PATH, size=1, timeout=0.5)
+    monkeypatch.setattr(portfolio, '_pool', pool)
+    monkeypatch.setattr(portfolio, '_rate_limiter', None)
+    monkeypatch.setitem(portfolio.app.config, 'RATE_LIMIT_STORE', 'sqlite')
+    yield portfolio.get_rate_limiter()
+    pool.close_all()
+
+
+def test_sqlite_store_uses_the_request_connection(portfolio, sqlite_limiter):
+    with portfolio.app.test_request_context('/api/contact', method='POST'):
+        conn = portfolio.get_db_connection()  # the request's only pool slot
+        assert sqlite_limiter.hit('contact:ip', f'10.9.{uuid.uuid4().int % 250}.1') == 0
+        assert conn.execute('SELECT 1').fetchone()[0] == 1
+    assert portfolio.get_pool().timeouts == 0
+
+
+def test_sqlite_store_limits_across_requests(api, sqlite_limiter):
+    statuses = []
+    for _ in range(4):
+        name = uuid.uuid4().hex[:12]
+        response = api.request('POST', '/api/auth/register',
+                               {'username': name, 'email': f'{name}@example.com', 'password': 'secret123'})
+        statuses.append(response.status)
+    assert statuses == [201, 201, 201, 429]
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Retention: archiving aged rows and listing them with ?archived=true"""
+import uuid
+
+import pytest
+
+from retention import Rule, parse_policy
+
+
+def insert_aged(portfolio, table, status, days, email):
+    conn = portfolio.get_db_connection()
+    if table == 'contact_messages':
+        cursor = conn.execute(f'''
+            INSERT INTO contact_messages (name, email, subject, message, status, created_at)
+            VALUES ('R', ?, 'Old', ?, ?, datetime('now', '-{days:d} days'))
+        ''', (email, uuid.uuid4().hex, status))
+    else:
+        cursor = conn.execute(f'''
+            INSERT INTO testimonials (name, email, message, rating, status, created_at)
+            VALUES ('R', ?, ?, 2, ?, datetime('now', '-{days:d} days'))
+        ''', (email, uuid.uuid4().hex, status))
+    conn.commit()
+    conn.close()
+    return cursor.lastrowid
+
+
+def ids_in(portfolio, table, email):
+    conn = portfolio.get_db_connection()
+    ids = {row[0] for row in conn.execute(f'SELECT id FROM {table} WHERE email = ?', (email,))}
+    conn.close()
+    return ids
+
+
+def test_parse_policy():
+    assert parse_policy('contact_messages:read=180, testimonials:rejected=30') == [
+        Rule('contact_messages', 'read', 180), Rule('testimonials', 'rejected', 30)]
+    assert parse_policy('') == []
+    for spec in ('users:admin=1', 'contact_messages=3', 'testimonials:rejected='):
+        with pytest.raises(ValueError):
+            parse_policy(spec)
+
+
+def test_archive_moves_only_aged_rows(api, portfolio, admin_headers):
+    email = f'{uuid.uuid4().hex}@example.com'
+    old_read = insert_aged(portfolio, 'contact_messages', 'read', 200, email)
+    old_unread = insert_aged(portfolio, 'contact_messages', 'unread', 200, email)
+    recent_read = insert_aged(portfolio, 'contact_messages', 'read', 10, email)
+    old_rejected = insert_aged(portfolio, 'testimonials', 'rejected', 45, email)
+    old_approved = insert_aged(portfolio, 'testimonials', 'approved', 45, email)
+    stats_before = api.request('GET', '/api/admin/stats', headers=admin_headers).json()
+
+    runner = portfolio.app.test_cli_runner()
+    dry_run = runner.invoke(args=['archive', '--dry-run'])
+    assert dry_run.exit_code == 0
+    assert 'Would archive' in dry_run.output
+    assert ids_in(portfolio, 'contact_messages', email) == {old_read, old_unread, recent_read}
+
+    moved = portfolio.get_archiver().run_once()
+    assert moved['contact_messages:read'] >= 1
+    assert moved['testimonials:rejected'] >= 1
+    assert ids_in(portfolio, 'contact_messages', email) == {old_unread, recent_read}
+    assert ids_in(portfolio, 'testimonials', email) == {old_approved}
+
+    # The delete triggers keep the dashboard counters in step
+    stats_after = api.request('GET', '/api/admin/stats', headers=admin_headers).json()
+    assert stats_after['totalMessages'] == stats_before['totalMessages'] - moved['contact_messages:read']
+    assert stats_after['totalTestimonials'] == stats_before['totalTestimonials'] - moved['testimonials:rejected']
+
+    archived = api.request('GET', f'/api/admin/messages?archived=true&email={email}', headers=admin_headers)
+    assert archived.status == 200
+    [row] = archived.json()
+    assert row['id'] == old_read and row['status'] == 'read' and row['archived_at']
+
+    archived = api.request('GET', f'/api/admin/testimonials?archived=true&email={email}', headers=admin_headers)
+    assert [row['id'] for row in archived.json()] == [old_rejected]
+
+    live = api.request('GET', f'/api/admin/messages?email={email}', headers=admin_headers)
+    assert {row['id'] for row in live.json()} == {old_unread, recent_read}
+
+    # Nothing left to move on the next run
+    assert not any(portfolio.get_archiver().run_once().values())
+
+
+def test_archived_listing_pages(api, portfolio, admin_headers):
+    email = f'{uuid.uuid4().hex}@example.com'
+    for _ in range(3):
+        insert_aged(portfolio, 'contact_messages', 'read', 365, email)
+    portfolio.get_archiver().run_once()
+
+    first = api.request('GET', f'/api/admin/messages?archived=true&email={email}&limit=2', headers=admin_headers)
+    assert len(first.json()) == 2
+    cursor = first.headers['x-next-cursor']
+    second = api.request('GET', f'/api/admin/messages?archived=true&email={email}&limit=2&after={cursor}',
+                         headers=admin_headers)
+    assert len(second.json()) == 1
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""Admin full-text search"""
+import uuid
+
+
+def test_snippet_escapes_visitor_text(api, admin_headers):
+    word = f'xss{uuid.uuid4().hex[:10]}'
+    payload = f'<img src=x onerror=alert(1)> {word} & more'
+    assert api.request('POST', '/api/contact',
+                       {'name': 'S', 'email': f'{uuid.uuid4().hex}@example.com', 'message': payload}).status == 200
+
+    response = api.request('GET', f'/api/admin/search?q={word}', headers=admin_headers)
+    assert response.status == 200
+    [result] = response.json()['results']
+    assert '<img' not in result['snippet']
+    assert '&lt;img src=x onerror=alert(1)&gt;' in result['snippet']
+    assert f'<mark>{word}</mark> &amp; more' in result['snippet']
+    assert result['message'] == payload
+
+
+def test_offset_validation(api, admin_headers):
+    response = api.request('GET', '/api/admin/search?q=hello&offset=abc', headers=admin_headers)
+    assert response.status == 400
+    assert response.json() == {'error': 'offset must be an integer'}
+
+    response = api.request('GET', '/api/admin/search?q=hello&offset=-1', headers=admin_headers)
+    assert response.status == 400
+    assert response.json() == {'error': 'offset must not be negative'}
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""The API behaves the same under the WSGI app and the ASGI adapter
+
+Every test gets `api` once per mode (see conftest.py).
+"""
+import uuid
+
+
+def unique(label):
+    return f'{label} {uuid.uuid4().hex}'
+
+
+def test_health(api):
+    response = api.request('GET', '/health')
+    assert response.status == 200
+    assert response.json()['database'] == 'Connected'
+
+
+def test_unknown_api_path_is_404(api):
+    response = api.request('GET', '/api/does-not-exist')
+    assert response.status == 404
+
+
+def test_public_testimonials_etag_and_304(api):
+    response = api.request('GET', '/api/testimonials')
+    assert response.status == 200
+    assert response.headers['cache-control'].startswith('public, max-age=')
+    etag = response.headers['etag']
+
+    conditional = api.request('GET', '/api/testimonials', headers={'If-None-Match': etag})
+    assert conditional.status == 304
+    assert conditional.body == b''
+
+
+def test_fields_projection(api, admin_headers):
+    created = api.request('POST', '/api/testimonials',
+                          {'name': 'F', 'email': f'{uuid.uuid4().hex}@example.com', 'message': unique('Fields'), 'rating': 3})
+    api.request('PUT', f"/api/admin/testimonials/{created.json()['id']}", {'status': 'approved'}, admin_headers)
+
+    response = api.request('GET', '/api/testimonials?fields=name,rating')
+    assert response.status == 200
+    rows = response.json()
+    assert rows
+    # id and created_at always come along as the keyset columns
+    assert all(set(row) == {'id', 'created_at', 'name', 'rating'} for row in rows)
+
+    assert api.request('GET', '/api/testimonials?fields=password').status == 400
+
+
+def test_approval_reaches_list_and_summary(api, admin_headers):
+    before = api.request('GET', '/api/testimonials/summary')
+    etag = before.headers['etag']
+
+    message = unique('Great work')
+    created = api.request('POST', '/api/testimonials',
+                          {'name': 'T', 'email': f'{uuid.uuid4().hex}@example.com', 'message': message, 'rating': 4})
+    assert created.status == 201
+    testimonial_id = created.json()['id']
+
+    updated = api.request('PUT', f'/api/admin/testimonials/{testimonial_id}', {'status': 'approved'}, admin_headers)
+    assert updated.status == 200
+
+    listed = api.request('GET', '/api/testimonials')
+    assert message in [row['message'] for row in listed.json()]
+
+    after = api.request('GET', '/api/testimonials/summary', headers={'If-None-Match': etag})
+    assert after.status == 200
+    assert after.json()['count'] == before.json()['count'] + 1
+    assert after.json()['distribution']['4'] == before.json()['distribution']['4'] + 1
+
+
+def test_idempotency_key_replay_and_conflict(api):
+    body = {'name': 'C', 'email': f'{uuid.uuid4().hex}@example.com', 'message': unique('Hello')}
+    headers = {'Idempotency-Key': uuid.uuid4().hex}
+
+    first = api.request('POST', '/api/contact', body, headers)
+    assert first.status == 200
+    assert 'idempotent-replayed' not in first.headers
+
+    retry = api.request('POST', '/api/contact', body, headers)
+    assert retry.status == 200
+    assert retry.json()['id'] == first.json()['id']
+    assert retry.headers['idempotent-replayed'] == 'true'
+
+    changed = api.request('POST', '/api/contact', dict(body, message=unique('Other')), headers)
+    assert changed.status == 422
+
+
+def test_missing_fields_rejected(api):
+    response = api.request('POST', '/api/contact', {'name': 'C'})
+    assert response.status == 400
+    assert 'error' in response.json()
+
+
+def test_admin_requires_token(api):
+    assert api.request('GET', '/api/admin/stats').status == 401
+
+
+def test_admin_keyset_pagination(api, admin_headers):
+    email = f'{uuid.uuid4().hex}@example.com'
+    for i in range(3):
+        assert api.request('POST', '/api/contact', {'name': 'P', 'email': email, 'message': unique(f'Page {i}')}).status == 200
+
+    first = api.request('GET', f'/api/admin/messages?email={email}&limit=2', headers=admin_headers)
+    assert first.status == 200
+    assert len(first.json()) == 2
+    cursor = first.headers['x-next-cursor']
+    assert 'rel="next"' in first.headers['link']
+
+    second = api.request('GET', f'/api/admin/messages?email={email}&limit=2&after={cursor}', headers=admin_headers)
+    assert len(second.json()) == 1
+    assert 'x-next-cursor' not in second.headers
+    assert {row['id'] for row in first.json()}.isdisjoint(row['id'] for row in second.json())
+
+
+def test_bulk_filter_validation(api, admin_headers):
+    response = api.request('POST', '/api/admin/testimonials/bulk',
+                           {'action': 'delete', 'filter': {'older_than_days': [1]}}, admin_headers)
+    assert response.status == 400
+
+
+def test_rate_limit_retry_after(api):
+    # RATE_LIMIT_REGISTER_IP is 3/hour in conftest.py; each test has its own address
+    statuses = []
+    for _ in range(4):
+        name = uuid.uuid4().hex[:12]
+        response = api.request('POST', '/api/auth/register',
+                               {'username': name, 'email': f'{name}@example.com', 'password': 'secret123'})
+        statuses.append(response.status)
+    assert statuses[-1] == 429
+    assert int(response.headers['retry-after']) > 0
+
+
+def test_csv_export(api, admin_headers):
+    response = api.request('GET', '/api/admin/export/messages?format=csv', headers=admin_headers)
+    assert response.status == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    assert response.body.decode('utf-8').splitlines()[0].startswith('id,')
+
+
+def test_event_stream(api, portfolio, admin_headers):
+    stream = api.stream('/api/admin/events?topics=message', admin_headers)
+    try:
+        assert stream.status == 200
+        assert stream.next_chunk() == 'retry: 3000\n\n'
+
+        portfolio.publish_change('testimonial.created', {'id': -1})  # filtered out
+        portfolio.publish_change('message.created', {'id': -2})
+        # The ASGI adapter may send several SSE chunks in one body message
+        received = ''
+        while ': keepalive' not in received or 'message.created' not in received:
+            received += stream.next_chunk()
+        assert 'event: message.created\ndata: {"id": -2}' in received
+        assert 'testimonial.created' not in received
+    finally:
+        stream.close()
+
+
+def test_asgi_rejects_oversized_body(portfolio):
+    from conftest import ASGITransport
+    api = ASGITransport(portfolio, '10.1.0.1')
+    # ASGI_MAX_BODY is 64 KiB in conftest.py
+    response = api.request('POST', '/api/contact', data=b'x' * 70000, headers={'Content-Type': 'application/json'})
+    assert response.status == 413
+    assert response.json() == {'error': 'Request body too large'}
+
+
+def test_dashboard_sections(api, admin_headers):
+    full = api.request('GET', '/api/admin/dashboard', headers=admin_headers)
+    assert full.status == 200
+    assert {'stats', 'testimonials', 'messages'} <= set(full.json())
+
+    empty = api.request('GET', '/api/admin/dashboard?sections=', headers=admin_headers)
+    assert empty.status == 200
+    assert set(empty.json()) == set(full.json())
+
+    stats = api.request('GET', '/api/admin/dashboard?sections=stats,', headers=admin_headers)
+    assert set(stats.json()) == {'stats'}
+
+    unknown = api.request('GET', '/api/admin/dashboard?sections=stats,nope', headers=admin_headers)
+    assert unknown.status == 400
+    assert unknown.json() == {'error': 'Unknown sections: nope'}
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Public submissions: write-behind batching and duplicate suppression"""
+import sqlite3
+import time
+import uuid
+
+from dedupe import SubmissionKeys
+from migrations import migrate
+
+
+def contact(label='Hello'):
+    return {'name': 'C', 'email': f'{uuid.uuid4().hex}@example.com', 'message': f'{label} {uuid.uuid4().hex}'}
+
+
+def count_messages(portfolio, email):
+    conn = portfolio.get_db_connection()
+    count = conn.execute('SELECT COUNT(*) FROM contact_messages WHERE email = ?', (email,)).fetchone()[0]
+    conn.close()
+    return count
+
+
+def claimed_row(portfolio, key):
+    conn = portfolio.get_db_connection()
+    row = conn.execute('SELECT row_id FROM submission_keys WHERE key = ?', (key,)).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def test_write_behind_timeout_keeps_the_claim(api, portfolio, write_behind):
+    # The batch waits longer than the request does, so every submit times out
+    write_behind['WRITE_BEHIND_TIMEOUT'] = 0.01
+    write_behind['WRITE_BEHIND_MAX_DELAY_MS'] = 300
+    body = contact()
+    headers = {'Idempotency-Key': uuid.uuid4().hex}
+
+    assert api.request('POST', '/api/contact', body, headers).status == 503
+    retry = api.request('POST', '/api/contact', body, headers)
+    assert retry.status == 409
+    assert retry.headers['retry-after'] == '1'
+
+    # Once the batch commits, the claim points at the queued row
+    key = portfolio.fingerprint('contact_messages', body['email'], headers['Idempotency-Key'], prefix='idem')
+    deadline = time.monotonic() + 5
+    while claimed_row(portfolio, key) is None and time.monotonic() < deadline:
+        time.sleep(0.02)
+    replay = api.request('POST', '/api/contact', body, headers)
+    assert replay.status == 200
+    assert replay.headers['idempotent-replayed'] == 'true'
+    assert count_messages(portfolio, body['email']) == 1
+
+
+def test_duplicate_content_is_replayed(api, portfolio):
+    body = contact()
+    first = api.request('POST', '/api/contact', body)
+    assert first.status == 200
+
+    # Case, width and whitespace differences are the same submission
+    again = dict(body, message='  ' + body['message'].upper().replace(' ', '   ') + '\n')
+    duplicate = api.request('POST', '/api/contact', again)
+    assert duplicate.status == 200
+    assert duplicate.json()['id'] == first.json()['id']
+    assert duplicate.headers['idempotent-replayed'] == 'true'
+    assert count_messages(portfolio, body['email']) == 1
+
+    different = api.request('POST', '/api/contact', dict(body, subject='Other'))
+    assert different.json()['id'] != first.json()['id']
+
+
+def test_duplicate_testimonial_is_replayed(api):
+    body = dict(contact(), rating=5)
+    first = api.request('POST', '/api/testimonials', body)
+    assert first.status == 201
+    duplicate = api.request('POST', '/api/testimonials', body)
+    assert duplicate.status == 201
+    assert duplicate.json()['id'] == first.json()['id']
+
+
+def test_idempotency_keys_are_scoped_per_submitter(api, portfolio):
+    headers = {'Idempotency-Key': uuid.uuid4().hex}
+    first, second = contact(), contact()
+    assert api.request('POST', '/api/contact', first, headers).status == 200
+    other = api.request('POST', '/api/contact', second, headers)
+    assert other.status == 200
+    assert 'idempotent-replayed' not in other.headers
+    assert count_messages(portfolio, second['email']) == 1
+
+
+def test_idempotency_key_with_a_new_payload_is_rejected(api, portfolio):
+    body = contact()
+    headers = {'Idempotency-Key': uuid.uuid4().hex}
+    assert api.request('POST', '/api/contact', body, headers).status == 200
+    reused = api.request('POST', '/api/contact', dict(body, subject='Changed'), headers)
+    assert reused.status == 422
+    assert 'error' in reused.json()
+    assert count_messages(portfolio, body['email']) == 1
+
+
+def test_claims_expire_after_the_window(tmp_path):
+    path = str(tmp_path / 'keys.db')
+    migrate(sqlite3.connect(path))
+    keys = SubmissionKeys(lambda: sqlite3.connect(path), window=0.2)
+
+    assert keys.claim('fp:t:1') is None
+    assert keys.claim('fp:t:1') == 0  # still being written
+    keys.complete('fp:t:1', 42)
+    assert keys.claim('fp:t:1') == 42
+    assert keys.duplicates == 2
+
+    time.sleep(0.25)
+    assert keys.claim('fp:t:1') is None  # expired: a new submission
+
+    keys.release('fp:t:1')
+    assert keys.claim('fp:t:1') is None  # a failed insert frees its key
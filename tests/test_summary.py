@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Trigger-maintained public testimonial rating summary"""
+import uuid
+
+
+def actual_summary(portfolio):
+    conn = portfolio.get_db_connection()
+    rows = conn.execute("SELECT rating FROM testimonials WHERE status = 'approved'").fetchall()
+    conn.close()
+    ratings = [row[0] for row in rows]
+    return {
+        'count': len(ratings),
+        'average': round(sum(ratings) / len(ratings), 2) if ratings else None,
+        'distribution': {str(rating): ratings.count(rating) for rating in range(1, 6)},
+    }
+
+
+def summary(api):
+    response = api.request('GET', '/api/testimonials/summary')
+    assert response.status == 200
+    body = response.json()
+    return {key: body[key] for key in ('count', 'average', 'distribution')}
+
+
+def submit_testimonial(api, rating):
+    response = api.request('POST', '/api/testimonials',
+                           {'name': 'S', 'email': f'{uuid.uuid4().hex}@example.com',
+                            'message': uuid.uuid4().hex, 'rating': rating})
+    assert response.status == 201
+    return response.json()['id']
+
+
+def set_status(api, admin_headers, testimonial_id, status):
+    assert api.request('PUT', f'/api/admin/testimonials/{testimonial_id}', {'status': status}, admin_headers).status == 200
+
+
+def test_summary_follows_moderation(api, portfolio, admin_headers):
+    assert summary(api) == actual_summary(portfolio)
+    first, second = submit_testimonial(api, 2), submit_testimonial(api, 5)
+    assert summary(api) == actual_summary(portfolio)  # pending rows don't count
+
+    set_status(api, admin_headers, first, 'approved')
+    set_status(api, admin_headers, second, 'approved')
+    assert summary(api) == actual_summary(portfolio)
+
+    set_status(api, admin_headers, first, 'rejected')
+    assert summary(api) == actual_summary(portfolio)
+
+    assert api.request('DELETE', f'/api/admin/testimonials/{second}', headers=admin_headers).status == 200
+    assert summary(api) == actual_summary(portfolio)
+
+
+def test_rating_change_on_an_approved_row(api, portfolio, admin_headers):
+    testimonial_id = submit_testimonial(api, 1)
+    set_status(api, admin_headers, testimonial_id, 'approved')
+    before = summary(api)
+
+    conn = portfolio.get_db_connection()
+    conn.execute('UPDATE testimonials SET rating = 4 WHERE id = ?', (testimonial_id,))
+    conn.commit()
+    conn.close()
+
+    after = summary(api)
+    assert after['count'] == before['count']
+    assert after['distribution']['1'] == before['distribution']['1'] - 1
+    assert after['distribution']['4'] == before['distribution']['4'] + 1
+    assert after == actual_summary(portfolio)
+
+
+def test_rebuild_corrects_drift_and_keeps_approval_time(api, portfolio, admin_headers):
+    set_status(api, admin_headers, submit_testimonial(api, 3), 'approved')
+    last_approved = api.request('GET', '/api/testimonials/summary').json()['lastApprovedAt']
+    assert last_approved
+
+    conn = portfolio.get_db_connection()
+    conn.execute('UPDATE testimonial_summary SET approved_count = approved_count + 9, rating_3 = 0 WHERE id = 1')
+    conn.commit()
+    conn.close()
+
+    rebuilt = api.request('POST', '/api/admin/testimonials/summary/rebuild', headers=admin_headers)
+    assert rebuilt.status == 200
+    body = api.request('GET', '/api/testimonials/summary').json()
+    assert {key: body[key] for key in ('count', 'average', 'distribution')} == actual_summary(portfolio)
+    assert body['lastApprovedAt'] == last_approved
+
+
+def test_cli_rebuild_invalidates_cached_summary(api, portfolio):
+    # A drifted summary row that a request has since cached
+    conn = portfolio.get_db_connection()
+    conn.execute('UPDATE testimonial_summary SET rating_sum = rating_sum + 100 WHERE id = 1')
+    conn.execute(portfolio.BUMP_TESTIMONIALS_VERSION_SQL)
+    conn.commit()
+    conn.close()
+    drifted = api.request('GET', '/api/testimonials/summary')
+    assert summary(api) != actual_summary(portfolio)
+
+    result = portfolio.app.test_cli_runner().invoke(args=['rebuild-testimonial-summary'])
+    assert result.exit_code == 0
+    # The rebuild bumps the shared version, so the cached body is re-read
+    response = api.request('GET', '/api/testimonials/summary', headers={'If-None-Match': drifted.headers['etag']})
+    assert response.status == 200
+    assert summary(api) == actual_summary(portfolio)
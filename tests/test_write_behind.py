@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Group-commit write-behind queue"""
+import os
+import sqlite3
+import threading
+import uuid
+
+import pytest
+
+from writebehind import QueueFull, WriteBehindQueue
+
+INSERT = 'INSERT INTO items (value) VALUES (?)'
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = os.path.join(tmp_path, 'queue.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT NOT NULL UNIQUE)')
+    conn.close()
+    return path
+
+
+def connector(path, ready=None):
+    def connect():
+        if ready is not None:
+            ready.wait(5)
+        return sqlite3.connect(path, check_same_thread=False)
+    return connect
+
+
+def values(path):
+    conn = sqlite3.connect(path)
+    rows = [row[0] for row in conn.execute('SELECT value FROM items ORDER BY id')]
+    conn.close()
+    return rows
+
+
+def test_batches_up_to_max_batch(database):
+    ready = threading.Event()
+    write_queue = WriteBehindQueue(connector(database, ready), max_batch=10, max_delay=0.05)
+    futures = [write_queue.submit(INSERT, (f'v{i}',)) for i in range(25)]
+    ready.set()  # the writer connects only now, so all 25 are queued
+
+    row_ids = [future.result(timeout=5) for future in futures]
+    assert len(set(row_ids)) == 25
+    stats = write_queue.stats()
+    assert stats['rows'] == 25
+    assert stats['batches'] == 3
+    assert stats['max_batch'] == 10
+    write_queue.close()
+    assert values(database) == [f'v{i}' for i in range(25)]
+
+
+def test_failing_row_does_not_fail_its_batch(database):
+    ready = threading.Event()
+    write_queue = WriteBehindQueue(connector(database, ready), max_batch=10, max_delay=0.05)
+    futures = [write_queue.submit(INSERT, (value,)) for value in ('a', 'dup', 'dup', 'b')]
+    ready.set()
+
+    assert futures[0].result(timeout=5) and futures[1].result(timeout=5) and futures[3].result(timeout=5)
+    with pytest.raises(sqlite3.IntegrityError):
+        futures[2].result(timeout=5)
+    write_queue.close()
+    assert values(database) == ['a', 'dup', 'b']
+    assert write_queue.stats()['failures'] == 1
+
+
+def test_close_flushes_queued_writes(database):
+    ready = threading.Event()
+    # A long max_delay: without the shutdown flush these would sit for 10s
+    write_queue = WriteBehindQueue(connector(database, ready), max_batch=100, max_delay=10)
+    futures = [write_queue.submit(INSERT, (f'v{i}',)) for i in range(5)]
+    ready.set()
+    write_queue.close(timeout=5)
+
+    assert all(future.done() and future.exception() is None for future in futures)
+    assert values(database) == [f'v{i}' for i in range(5)]
+    with pytest.raises(QueueFull):
+        write_queue.submit(INSERT, ('late',))
+
+
+def test_full_queue_rejects(database):
+    ready = threading.Event()
+    write_queue = WriteBehindQueue(connector(database, ready), max_pending=2)
+    write_queue.submit(INSERT, ('a',))
+    write_queue.submit(INSERT, ('b',))
+    with pytest.raises(QueueFull):
+        write_queue.submit(INSERT, ('c',))
+    assert write_queue.stats()['rejected'] == 1
+    ready.set()
+    write_queue.close(timeout=5)
+    assert values(database) == ['a', 'b']
+
+
+def test_submissions_go_through_the_queue(api, portfolio, write_behind):
+    email = f'{uuid.uuid4().hex}@example.com'
+    response = api.request('POST', '/api/contact', {'name': 'W', 'email': email, 'message': uuid.uuid4().hex})
+    assert response.status == 200
+    assert portfolio.get_write_queue().stats()['rows'] == 1
+
+    conn = portfolio.get_db_connection()
+    row = conn.execute('SELECT email FROM contact_messages WHERE id = ?', (response.json()['id'],)).fetchone()
+    conn.close()
+    assert row['email'] == email
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""Group-commit write-behind queue for public form submissions"""
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+
+class QueueFull(Exception):
+    """Raised when too many writes are already waiting for the writer"""
+
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """Single writer thread that commits queued INSERTs in batches
+
+    A batch is flushed once it holds `max_batch` statements or its oldest
+    statement has waited `max_delay` seconds, whichever comes first. Each
+    submit() returns a Future resolved with the row id after its batch
+    commits.
+    """
+
+    def __init__(self, connect, max_batch=100, max_delay=0.01, max_pending=10000,
+                 synchronous='NORMAL'):
+        self.connect = connect
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.synchronous = synchronous
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self.batches = 0
+        self.rows = 0
+        self.failures = 0
+        self.rejected = 0
+        self.commit_time = 0.0
+        self.max_batch_seen = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='write-behind', daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, sql, params):
+        """Queue an INSERT; the returned Future resolves to its row id"""
+        if self._closed:
+            raise QueueFull('Write queue is shut down')
+        self.start()
+        future = Future()
+        try:
+            self._queue.put_nowait((sql, params, future))
+        except queue.Full:
+            self.rejected += 1
+            raise QueueFull('Too many pending writes')
+        return future
+
+    def close(self, timeout=10.0):
+        """Flush everything still queued and stop the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def _run(self):
+        conn = self.connect()
+        conn.isolation_level = None  # explicit BEGIN/COMMIT per batch
+        conn.execute(f'PRAGMA synchronous = {self.synchronous}')
+        stopping = False
+        try:
+            while not stopping:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + self.max_delay
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        item = self._queue.get(timeout=max(remaining, 0.0))
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                self._flush(conn, batch)
+            # Drain anything submitted before close() was called
+            leftovers = []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP:
+                    leftovers.append(item)
+            for start in range(0, len(leftovers), self.max_batch):
+                self._flush(conn, leftovers[start:start + self.max_batch])
+        finally:
+            conn.close()
+
+    def _flush(self, conn, batch):
+        started = time.monotonic()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row_ids = [conn.execute(sql, params).lastrowid for sql, params, _ in batch]
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            # Retry one by one so a single bad row doesn't fail its neighbours
+            for item in batch:
+                self._flush_one(conn, item)
+            return
+
+        self._record(len(batch), time.monotonic() - started)
+        for (_, _, future), row_id in zip(batch, row_ids):
+            future.set_result(row_id)
+
+    def _flush_one(self, conn, item):
+        sql, params, future = item
+        started = time.monotonic()
+        try:
+            row_id = conn.execute(sql, params).lastrowid
+        except sqlite3.Error as e:
+            self.failures += 1
+            future.set_exception(e)
+            return
+        self._record(1, time.monotonic() - started)
+        future.set_result(row_id)
+
+    def _record(self, rows, seconds):
+        self.batches += 1
+        self.rows += rows
+        self.commit_time += seconds
+        self.max_batch_seen = max(self.max_batch_seen, rows)
+
+    def stats(self):
+        return {
+            'pending': self._queue.qsize(),
+            'batches': self.batches,
+            'rows': self.rows,
+            'avg_batch': round(self.rows / self.batches, 2) if self.batches else 0.0,
+            'max_batch': self.max_batch_seen,
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'commit_time_ms': round(self.commit_time * 1000, 3),
+        }